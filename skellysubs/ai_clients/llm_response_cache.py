@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Type
+
+from pydantic import BaseModel
+
+from skellysubs.system.files_and_folder_names import get_skellysubs_data_folder_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+DEFAULT_LLM_CACHE_MAX_ENTRIES = 100_000
+LLM_CACHE_EVICTION_SLACK_FRACTION = 0.1  # let the table overshoot by this much, so eviction runs in occasional batches
+LLM_CACHE_EXPIRY_PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+def make_llm_cache_key(model_name: str,
+                       system_prompt: str,
+                       user_input: str | None,
+                       prompt_model: Type[BaseModel],
+                       temperature: float) -> str:
+    key_data = json.dumps({"model_name": model_name,
+                           "system_prompt": system_prompt,
+                           "user_input": user_input,
+                           "response_schema": prompt_model.model_json_schema(),
+                           "temperature": temperature}, sort_keys=True)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+class LlmResponseCache:
+    """
+    SQLite store of raw JSON-mode responses, keyed by a hash of everything that determines the response.
+
+    Entries expire after `ttl_seconds` (expired rows are purged at most once per purge interval), and once there are
+    more than `max_entries` (plus some slack) the least recently used are evicted in one batch.
+
+    Calls block on disk I/O - async callers should run them in a worker thread (e.g. `asyncio.to_thread`).
+    """
+
+    def __init__(self,
+                 database_path: str | Path,
+                 ttl_seconds: float = DEFAULT_LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_LLM_CACHE_MAX_ENTRIES):
+        self.database_path = Path(database_path)
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.database_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # a lost write after a power cut just means a cache miss, so skip the fsync on every commit
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS llm_responses ("
+                                 "cache_key TEXT PRIMARY KEY, "
+                                 "response_json TEXT NOT NULL, "
+                                 "created_at REAL NOT NULL, "
+                                 "last_accessed_at REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_accessed "
+                                 "ON llm_responses (last_accessed_at)")
+        self._connection.commit()
+        self._entry_count = self._connection.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        self._last_expiry_purge = 0.0
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = 100 * self.hits / lookups if lookups else 0.0
+        return f"LLM response cache - {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate)"
+
+    def get(self, cache_key: str, prompt_model: Type[BaseModel]) -> BaseModel | None:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT response_json, created_at FROM llm_responses WHERE cache_key = ?",
+                                           (cache_key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._connection.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+                self._connection.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE llm_responses SET last_accessed_at = ? WHERE cache_key = ?",
+                                     (now, cache_key))
+            self._connection.commit()
+        try:
+            output = prompt_model(**json.loads(row[0]))
+        except (json.JSONDecodeError, ValueError):
+            # e.g. the schema changed in a way the hash didn't capture - treat as a miss and let it be overwritten
+            logger.warning(f"Discarding unparseable LLM cache entry: {cache_key[:12]}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.trace(f"LLM response cache hit: {cache_key[:12]}")
+        return output
+
+    def put(self, cache_key: str, response_json: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?)",
+                                     (cache_key, response_json, now, now))
+            self._entry_count += 1  # over-counts replacements, which only makes eviction run a little early
+            if now - self._last_expiry_purge > LLM_CACHE_EXPIRY_PURGE_INTERVAL_SECONDS:
+                self._last_expiry_purge = now
+                self._connection.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._entry_count = self._connection.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            if self._entry_count > self.max_entries * (1 + LLM_CACHE_EVICTION_SLACK_FRACTION):
+                self._evict_least_recently_used()
+            self._connection.commit()
+
+    def _evict_least_recently_used(self) -> None:
+        self._connection.execute("DELETE FROM llm_responses WHERE cache_key IN ("
+                                 "SELECT cache_key FROM llm_responses ORDER BY last_accessed_at DESC "
+                                 "LIMIT -1 OFFSET ?)", (self.max_entries,))
+        self._entry_count = self._connection.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        logger.debug(f"Evicted least recently used LLM cache entries down to {self._entry_count}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_responses")
+            self._connection.commit()
+            self._entry_count = 0
+
+
+_LLM_RESPONSE_CACHE: LlmResponseCache | None = None
+
+
+def get_or_create_llm_response_cache() -> LlmResponseCache:
+    global _LLM_RESPONSE_CACHE
+    if _LLM_RESPONSE_CACHE is None:
+        _LLM_RESPONSE_CACHE = LlmResponseCache(
+            database_path=Path(get_skellysubs_data_folder_path()) / "llm_response_cache.sqlite")
+    return _LLM_RESPONSE_CACHE
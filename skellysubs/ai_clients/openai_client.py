@@ -1,33 +1,118 @@
+import asyncio
 import json
 import logging
 from typing import Type
 
-from openai import AsyncOpenAI, BaseModel
+import httpx
+from openai import AsyncOpenAI, BaseModel, DefaultAsyncHttpxClient
 from openai.types.audio import TranscriptionVerbose
+from pydantic import PrivateAttr
 
 from skellysubs.ai_clients.ai_client_abc import AiClientConfigABC, AiClientABC, AiSystemMessage, AiUserMessage
+from skellysubs.ai_clients.llm_response_cache import get_or_create_llm_response_cache, make_llm_cache_key
+from skellysubs.ai_clients.openai_request_scheduler import OpenaiRequestScheduler, RequestPriority
+from skellysubs.ai_clients.token_estimation import estimate_messages_token_count
 from skellysubs.utilities.load_env_variables import OPENAI_API_KEY
 
 logger = logging.getLogger(__name__)
 
+WHISPER_API_MODEL_NAME = "whisper-1"
+# connection pool size - a little above the scheduler's concurrency so retries never wait on a socket
+OPENAI_MAX_CONNECTIONS = 100
+
 
 class OpenAIClientConfig(AiClientConfigABC):
     model_name: str = "gpt-4o"
     max_context_length: int = 128_000
+    max_output_tokens: int = 16_384
+    # rate limits for the account's usage tier - requests beyond these are queued rather than sent and rejected
+    requests_per_minute: int = 5_000
+    tokens_per_minute: int = 800_000
+    whisper_requests_per_minute: int = 500
+    max_concurrent_requests: int = 64
+    max_concurrent_whisper_requests: int = 16
+    max_request_retries: int = 6
+    # reserved against tokens/min up front for the (unknown) completion, then corrected from the response's usage
+    expected_output_tokens: int = 1_000
+    # identical JSON-mode requests (same model, prompts, schema and temperature) are answered from the on-disk cache
+    cache_json_mode_responses: bool = True
 
 
 class OpenaiClient(AiClientABC):
     config: OpenAIClientConfig = OpenAIClientConfig()
-    client: AsyncOpenAI = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    # retries are done by the scheduler, which knows about the shared rate limit
+    client: AsyncOpenAI = AsyncOpenAI(api_key=OPENAI_API_KEY,
+                                      max_retries=0,
+                                      http_client=DefaultAsyncHttpxClient(
+                                          limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                                              max_keepalive_connections=OPENAI_MAX_CONNECTIONS)))
+    _chat_scheduler: OpenaiRequestScheduler = PrivateAttr()
+    _whisper_scheduler: OpenaiRequestScheduler = PrivateAttr()
+
+    def model_post_init(self, __context) -> None:
+        self._chat_scheduler = OpenaiRequestScheduler(requests_per_minute=self.config.requests_per_minute,
+                                                      tokens_per_minute=self.config.tokens_per_minute,
+                                                      max_concurrent_requests=self.config.max_concurrent_requests,
+                                                      max_retries=self.config.max_request_retries,
+                                                      name="openai chat")
+        self._whisper_scheduler = OpenaiRequestScheduler(
+            requests_per_minute=self.config.whisper_requests_per_minute,
+            tokens_per_minute=None,
+            max_concurrent_requests=self.config.max_concurrent_whisper_requests,
+            max_retries=self.config.max_request_retries,
+            name="openai whisper")
+
+    @property
+    def chat_scheduler(self) -> OpenaiRequestScheduler:
+        return self._chat_scheduler
+
+    @property
+    def whisper_scheduler(self) -> OpenaiRequestScheduler:
+        return self._whisper_scheduler
+
+    async def _make_chat_request(self,
+                                 messages: list[dict],
+                                 llm_model: str | None,
+                                 priority: RequestPriority | None,
+                                 **kwargs):
+        model_name = self.config.model_name if llm_model is None else llm_model
+        estimated_tokens = (estimate_messages_token_count(messages, model_name=model_name)
+                            + self.config.expected_output_tokens)
+        response = await self._chat_scheduler.run(
+            lambda: self.client.beta.chat.completions.parse(model=model_name, messages=messages, **kwargs),
+            estimated_tokens=estimated_tokens,
+            priority=priority)
+        if response.usage is not None:
+            self._chat_scheduler.reconcile_tokens(estimated_tokens=estimated_tokens,
+                                                  actual_tokens=response.usage.total_tokens)
+        return response
 
     async def make_json_mode_request(self,
                                      system_prompt: str,
                                      prompt_model: Type[BaseModel],
                                      llm_model: str | None = None,
                                      temperature: float | None = None,
-                                     user_input: str | None = None) -> BaseModel:
+                                     user_input: str | None = None,
+                                     priority: RequestPriority | None = None,
+                                     use_cache: bool = True) -> BaseModel:
         logger.trace(
             f"Making OpenAI JSON mode request -  prompt_model={prompt_model.__class__.__name__}, llm_model={llm_model}")
+        model_name = self.config.model_name if llm_model is None else llm_model
+        temperature = self.config.temperature if temperature is None else temperature
+        cache_key = None
+        if use_cache and self.config.cache_json_mode_responses:
+            cache_key = make_llm_cache_key(model_name=model_name,
+                                           system_prompt=system_prompt,
+                                           user_input=user_input,
+                                           prompt_model=prompt_model,
+                                           temperature=temperature)
+            # SQLite I/O runs in a worker thread so thousands of concurrent requests don't stall the event loop
+            cached_output = await asyncio.to_thread(get_or_create_llm_response_cache().get,
+                                                    cache_key=cache_key,
+                                                    prompt_model=prompt_model)
+            if cached_output is not None:
+                return cached_output
+
         messages = [
             AiSystemMessage(role="system", content=system_prompt).model_dump()
         ]
@@ -35,13 +120,18 @@ class OpenaiClient(AiClientABC):
             messages.append(
                 AiUserMessage(role="user", content=user_input).model_dump()
             )
-        response = await self.client.beta.chat.completions.parse(
-            model=self.config.model_name if llm_model is None else llm_model,
+        response = await self._make_chat_request(
             messages=messages,
+            llm_model=model_name,
+            priority=priority,
             response_format=prompt_model,
-            temperature=self.config.temperature if temperature is None else temperature,
+            temperature=temperature,
         )
         output = prompt_model(**json.loads(response.choices[0].message.content))
+        if cache_key is not None:
+            await asyncio.to_thread(get_or_create_llm_response_cache().put,
+                                    cache_key=cache_key,
+                                    response_json=response.choices[0].message.content)
 
         logger.trace(f"OpenAI JSON Mode request completed!  Output: {output.__class__.__name__}")
         return output
@@ -49,18 +139,20 @@ class OpenaiClient(AiClientABC):
     async def make_text_generation_request(self,
                                            system_prompt: str,
                                            llm_model: str | None = None,
-                                           temperature: float | None = None) -> str:
+                                           temperature: float | None = None,
+                                           priority: RequestPriority | None = None) -> str:
         messages = [
             AiSystemMessage(role="system", content=system_prompt).model_dump()
         ]
         logger.debug("Making OpenAI text generation request")
-        response = await self.client.beta.chat.completions.parse(
-            model=self.config.model_name if llm_model is None else llm_model,
+        response = await self._make_chat_request(
             messages=messages,
+            llm_model=llm_model,
+            priority=priority,
             temperature=self.config.temperature if temperature is None else temperature,
         )
         output = response.choices[0].message.content
-        logger.debug(f"OpenAI text generation request completed!")
+        logger.debug("OpenAI text generation request completed!")
         return output
 
     async def make_whisper_transcription_request(self,
@@ -70,18 +162,25 @@ class OpenaiClient(AiClientABC):
                                                  response_format: str = "verbose_json",
                                                  temperature: float = 0.0,
                                                  timestamp_granularity=None,
+                                                 priority: RequestPriority | None = None,
                                                  ) -> TranscriptionVerbose:
         if timestamp_granularity is None:
             timestamp_granularity = ["segment", "word"]
-        # noinspection PyTypeChecker
-        transcript_response = await self.client.audio.transcriptions.create(file=audio_file,
-                                                                            model="whisper-1",
-                                                                            response_format=response_format,
-                                                                            prompt=prompt,
-                                                                            timestamp_granularities=timestamp_granularity,
-                                                                            temperature=temperature,
-                                                                            language=language,
-                                                                            )
+
+        def make_request():
+            if hasattr(audio_file, "seek"):
+                audio_file.seek(0)  # a retried upload has to start from the beginning of the file again
+            # noinspection PyTypeChecker
+            return self.client.audio.transcriptions.create(file=audio_file,
+                                                           model=WHISPER_API_MODEL_NAME,
+                                                           response_format=response_format,
+                                                           prompt=prompt,
+                                                           timestamp_granularities=timestamp_granularity,
+                                                           temperature=temperature,
+                                                           language=language,
+                                                           )
+
+        transcript_response = await self._whisper_scheduler.run(make_request, priority=priority)
 
         for segment in transcript_response.segments:
             if len(segment.text) == 0:
@@ -0,0 +1,239 @@
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, TypeVar
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BASE_BACKOFF_SECONDS = 0.5
+DEFAULT_MAX_BACKOFF_SECONDS = 60.0
+
+
+class RequestPriority(enum.IntEnum):
+    """
+    Lower values are admitted first - interactive (API/UI) requests jump ahead of queued batch work
+    """
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+_CURRENT_REQUEST_PRIORITY: ContextVar[RequestPriority] = ContextVar("openai_request_priority",
+                                                                    default=RequestPriority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    """
+    Requests made inside this block (including tasks created inside it) use `priority` unless they pass their own
+    """
+    context_token = _CURRENT_REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _CURRENT_REQUEST_PRIORITY.reset(context_token)
+
+
+def get_current_request_priority() -> RequestPriority:
+    return _CURRENT_REQUEST_PRIORITY.get()
+
+
+class TokenBucket:
+    """
+    Refills continuously at `capacity_per_minute / 60` per second, up to `capacity_per_minute`
+    """
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = float(capacity_per_minute)
+        self.refill_per_second = self.capacity / 60
+        self._level = self.capacity
+        self._last_refill = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._last_refill) * self.refill_per_second)
+        self._last_refill = now
+
+    def seconds_until_available(self, amount: float) -> float:
+        self._refill()
+        # a request bigger than the whole bucket waits for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Charge (positive) or refund (negative) the difference between an estimate and the real cost - the level can go
+        negative, which just delays the next admissions
+        """
+        self._refill()
+        self._level = min(self.capacity, self._level - amount)
+
+
+@dataclass(order=True)
+class _PendingRequest:
+    priority: int
+    sequence: int
+    estimated_tokens: int = field(compare=False)
+    wakeup: asyncio.Event = field(compare=False, default_factory=asyncio.Event)
+
+
+class OpenaiRequestScheduler:
+    """
+    Admits requests in (priority, arrival) order, only when there is a free concurrency slot and enough requests/min
+    and tokens/min budget, and retries rate-limit/server/connection errors with jittered exponential backoff.
+
+    A 429 pauses admissions for the whole scheduler, so everyone backs off together instead of re-triggering the limit.
+    """
+
+    def __init__(self,
+                 requests_per_minute: int,
+                 tokens_per_minute: int | None,
+                 max_concurrent_requests: int,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_backoff_seconds: float = DEFAULT_BASE_BACKOFF_SECONDS,
+                 max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+                 name: str = "openai"):
+        self.name = name
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._request_bucket = TokenBucket(requests_per_minute)
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._pending: list[_PendingRequest] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.completed_requests = 0
+        self.retried_requests = 0
+        self.rate_limited_responses = 0
+
+    def __str__(self) -> str:
+        return (f"{self.name} scheduler - {self._in_flight} in flight, {len(self._pending)} queued, "
+                f"{self.completed_requests} completed, {self.retried_requests} retried "
+                f"({self.rate_limited_responses} rate limited)")
+
+    async def run(self,
+                  make_request: Callable[[], Awaitable[T]],
+                  estimated_tokens: int = 0,
+                  priority: RequestPriority | None = None) -> T:
+        """
+        `make_request` is called once per attempt, so it must build a fresh request (e.g. rewind file handles) each time
+        """
+        priority = get_current_request_priority() if priority is None else priority
+        for attempt in itertools.count():
+            await self._acquire(estimated_tokens=estimated_tokens, priority=priority)
+            try:
+                result = await make_request()
+                self.completed_requests += 1
+                return result
+            except Exception as e:
+                retry_delay = self._get_retry_delay(error=e, attempt=attempt)
+                if retry_delay is None or attempt == self.max_retries:
+                    raise
+                self.retried_requests += 1
+                logger.warning(f"{self.name} request failed ({e.__class__.__name__}) - retrying in {retry_delay:.1f}s "
+                               f"(attempt {attempt + 1}/{self.max_retries})")
+            finally:
+                self._release()
+            await asyncio.sleep(retry_delay)
+
+    def reconcile_tokens(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self._token_bucket is not None:
+            self._token_bucket.adjust(actual_tokens - estimated_tokens)
+
+    def _get_retry_delay(self, error: Exception, attempt: int) -> float | None:
+        """
+        Seconds to wait before retrying `error`, or None if it isn't worth retrying
+        """
+        status_code = getattr(error, "status_code", None)
+        is_rate_limited = status_code == 429
+        if not (is_rate_limited
+                or (status_code is not None and status_code >= 500)
+                or isinstance(error, openai.APIConnectionError)):
+            return None
+        # "full jitter" backoff - spreads retries out so they don't arrive in synchronized waves
+        retry_delay = random.uniform(0, min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after is not None:
+            try:
+                retry_delay = (min(float(retry_after), self.max_backoff_seconds)
+                               + random.uniform(0, self.base_backoff_seconds))
+            except ValueError:
+                pass
+        if is_rate_limited:
+            self.rate_limited_responses += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_delay)
+        return retry_delay
+
+    def _seconds_until_admissible(self, estimated_tokens: int) -> float:
+        seconds_until_admissible = max(self._paused_until - time.monotonic(),
+                                       self._request_bucket.seconds_until_available(1))
+        if self._token_bucket is not None:
+            seconds_until_admissible = max(seconds_until_admissible,
+                                           self._token_bucket.seconds_until_available(estimated_tokens))
+        return seconds_until_admissible
+
+    async def _acquire(self, estimated_tokens: int, priority: RequestPriority) -> None:
+        running_loop = asyncio.get_running_loop()
+        if self._loop is not running_loop:
+            # queue state (and its events) belongs to one event loop - e.g. a previous `asyncio.run`
+            self._loop = running_loop
+            self._pending = []
+            self._in_flight = 0
+
+        pending_request = _PendingRequest(priority=int(priority),
+                                          sequence=next(self._sequence),
+                                          estimated_tokens=estimated_tokens)
+        heapq.heappush(self._pending, pending_request)
+        try:
+            while True:
+                pending_request.wakeup.clear()
+                wait_seconds = None  # not at the head of the queue (or no free slot) - wait until woken
+                if self._pending[0] is pending_request and self._in_flight < self.max_concurrent_requests:
+                    wait_seconds = self._seconds_until_admissible(estimated_tokens)
+                    if wait_seconds <= 0:
+                        heapq.heappop(self._pending)
+                        self._request_bucket.consume(1)
+                        if self._token_bucket is not None:
+                            self._token_bucket.consume(estimated_tokens)
+                        self._in_flight += 1
+                        self._wake_next()
+                        return
+                try:
+                    await asyncio.wait_for(pending_request.wakeup.wait(), timeout=wait_seconds)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if pending_request in self._pending:
+                self._pending.remove(pending_request)
+                heapq.heapify(self._pending)
+                self._wake_next()
+            raise
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake_next()
+
+    def _wake_next(self) -> None:
+        if self._pending:
+            self._pending[0].wakeup.set()
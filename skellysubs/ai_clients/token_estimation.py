@@ -0,0 +1,37 @@
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+CHARACTERS_PER_TOKEN_ESTIMATE = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role/formatting tokens the chat API adds around every message
+
+
+@lru_cache(maxsize=8)
+def _get_tiktoken_encoding(model_name: str):
+    """
+    `tiktoken` is optional - without it (or for a model it doesn't know) token counts fall back to a character estimate
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.debug("tiktoken not installed - estimating token counts from character counts")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def estimate_token_count(text: str | None, model_name: str = "gpt-4o") -> int:
+    if not text:
+        return 0
+    encoding = _get_tiktoken_encoding(model_name)
+    if encoding is None:
+        return len(text) // CHARACTERS_PER_TOKEN_ESTIMATE + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def estimate_messages_token_count(messages: list[dict], model_name: str = "gpt-4o") -> int:
+    return sum(estimate_token_count(message.get("content"), model_name=model_name) + MESSAGE_OVERHEAD_TOKENS
+               for message in messages)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from skellysubs.api.server.server_constants import BATCH_MEDIA_ROOTS
+from skellysubs.core.batch_processing.batch_job_runner import BatchFileCheckpoint, BatchJobConfig, BatchJobRunner, \
+    collect_batch_input_paths
+from skellysubs.system.files_and_folder_names import get_skellysubs_data_folder_path
+
+logger = logging.getLogger(__name__)
+
+batch_router = APIRouter()
+
+BATCH_JOBS: dict[str, BatchJobRunner] = {}
+BATCH_JOB_TASKS: dict[str, asyncio.Task] = {}
+BATCH_JOB_FINISHED_AT: dict[str, float] = {}
+BATCH_JOB_RETENTION_SECONDS = 24 * 60 * 60  # finished jobs' status stays queryable this long
+
+
+class BatchJobRequest(BaseModel):
+    input_path: str  # folder of videos, or a JSON/text manifest of paths
+    config: BatchJobConfig
+
+
+class BatchJobStatusResponse(BaseModel):
+    job_id: str
+    total_files: int
+    is_running: bool
+    checkpoints: dict[str, BatchFileCheckpoint]
+
+
+def get_batch_allowed_roots() -> list[Path]:
+    return [Path(root).resolve() for root in [get_skellysubs_data_folder_path(), *BATCH_MEDIA_ROOTS]]
+
+
+def check_batch_path_allowed(path: str) -> None:
+    """
+    HTTP clients may only point batch jobs at (and write into) the data folder or a configured media root
+    """
+    resolved_path = Path(path).resolve()
+    if not any(resolved_path.is_relative_to(root) for root in get_batch_allowed_roots()):
+        raise ValueError(f"Path is outside the allowed batch folders: {path}")
+
+
+def prune_finished_batch_jobs() -> None:
+    expired_job_ids = [job_id for job_id, finished_at in BATCH_JOB_FINISHED_AT.items()
+                       if time.time() - finished_at > BATCH_JOB_RETENTION_SECONDS]
+    for job_id in expired_job_ids:
+        BATCH_JOBS.pop(job_id, None)
+        BATCH_JOB_TASKS.pop(job_id, None)
+        BATCH_JOB_FINISHED_AT.pop(job_id, None)
+    if expired_job_ids:
+        logger.debug(f"Pruned {len(expired_job_ids)} finished batch jobs")
+
+
+@batch_router.post("/batch", response_model=BatchJobStatusResponse)
+async def start_batch_job_endpoint(request: BatchJobRequest) -> BatchJobStatusResponse:
+    prune_finished_batch_jobs()
+    try:
+        check_batch_path_allowed(request.input_path)
+        check_batch_path_allowed(request.config.output_folder)
+        source_paths = collect_batch_input_paths(request.input_path)
+        # manifests can list paths anywhere, so check every entry too
+        for source_path in source_paths:
+            check_batch_path_allowed(source_path)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job_id = uuid.uuid4().hex
+    runner = BatchJobRunner(source_paths=source_paths, config=request.config)
+    BATCH_JOBS[job_id] = runner
+    BATCH_JOB_TASKS[job_id] = asyncio.create_task(runner.run())
+
+    def record_finish_time(_: asyncio.Task) -> None:
+        BATCH_JOB_FINISHED_AT[job_id] = time.time()
+
+    BATCH_JOB_TASKS[job_id].add_done_callback(record_finish_time)
+    logger.api(f"Started batch job {job_id} with {len(source_paths)} files")
+    return get_batch_job_status(job_id)
+
+
+@batch_router.get("/batch/{job_id}", response_model=BatchJobStatusResponse)
+async def batch_job_status_endpoint(job_id: str) -> BatchJobStatusResponse:
+    prune_finished_batch_jobs()
+    if job_id not in BATCH_JOBS:
+        raise HTTPException(status_code=404, detail=f"Unknown batch job: {job_id}")
+    return get_batch_job_status(job_id)
+
+
+def get_batch_job_status(job_id: str) -> BatchJobStatusResponse:
+    runner = BATCH_JOBS[job_id]
+    return BatchJobStatusResponse(job_id=job_id,
+                                  total_files=len(runner.source_paths),
+                                  is_running=not BATCH_JOB_TASKS[job_id].done(),
+                                  checkpoints=runner.checkpoints)
@@ -6,9 +6,9 @@ from fastapi import APIRouter, File, UploadFile, HTTPException, Form
 from openai.types.audio import TranscriptionVerbose
 from pydantic import BaseModel
 
-from skellysubs.ai_clients.openai_client import get_or_create_openai_client
 from skellysubs.core.subtitles.formatters.base_subtitle_formatter import FormattedSubtitles
 from skellysubs.core.subtitles.subtitle_generator import SubtitleGenerator
+from skellysubs.core.transcription.get_or_compute_video_transcription import get_or_compute_verbose_transcription
 from skellysubs.core.translation.models.transcript_models import OriginalLanguageTranscript
 
 logger = logging.getLogger(__name__)
@@ -40,12 +40,9 @@ async def transcribe_endpoint(
         with open(audio_temp_filename, "wb") as incoming_f:
             incoming_f.write(audio_file.file.read())
 
-        with open(audio_temp_filename, "rb") as f:
-            transcription_result = await get_or_create_openai_client().make_whisper_transcription_request(
-                audio_file=f,
-                language=language,
-                prompt=prompt
-            )
+        transcription_result = await get_or_compute_verbose_transcription(audio_path=audio_temp_filename,
+                                                                          language=language,
+                                                                          prompt=prompt)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -2,6 +2,7 @@ import logging
 
 from fastapi import APIRouter, HTTPException
 from fastapi import Body, Query
+from fastapi.responses import StreamingResponse
 from openai.types.audio import TranscriptionVerbose
 from pydantic import BaseModel
 
@@ -11,9 +12,10 @@ from skellysubs.core.translation.language_configs.language_configs import Langua
 from skellysubs.core.translation.models.text_models import TranslatedTextModel
 from skellysubs.core.translation.models.transcript_models import TranslatedTranscript
 from skellysubs.core.translation.models.translation_typehints import LanguageNameString
-from skellysubs.core.translation.translation_subtasks.translate_full_text import text_translation
-from skellysubs.core.translation.translation_subtasks.translate_transcript_segments import \
-    transcript_translation
+from skellysubs.core.translation.translation_subtasks.stream_transcript_translation import \
+    stream_transcript_translation
+from skellysubs.core.translation.translation_subtasks.translate_transcript_to_languages import \
+    translate_transcript_to_languages
 
 logger = logging.getLogger(__name__)
 
@@ -40,46 +42,61 @@ class TranscriptTranslationResponse(BaseModel):
 @translate_router.post("/translate/transcript", response_model=TranscriptTranslationResponse)
 async def translate_transcript_endpoint(
         transcript: TranscriptionVerbose = Body(...),
-        target_languages: dict[LanguageNameString, LanguageConfig] = Body(...)) -> TranscriptTranslationResponse:
+        target_languages: dict[LanguageNameString, LanguageConfig] = Body(...),
+        context_window_segments: int | None = Query(None, ge=0,
+                                                    description="Only include this many neighboring segments as "
+                                                                "context in each request, instead of the full text"),
+        batch_segments: bool = Query(False, description="Translate several consecutive segments per request"),
+        multi_language: bool = Query(False, description="Translate into several target languages per request")
+) -> TranscriptTranslationResponse:
     logger.info(
         f"Translation request received for transcription with {len(transcript.segments)} segments and target languages: {[key for key in target_languages.keys()]}")
-    translated_transcripts = {}
     subtitles_by_language: [LanguageNameString, FormattedSubtitles] = {}
     subtitle_generator = SubtitleGenerator()
-    for segment in transcript.segments:
-        if len(segment.text) == 0:
-            segment.text = "..."
     try:
-        full_text_prompts, full_text_translations = await text_translation(text=transcript.text,
-                                                                           target_languages=target_languages,
-                                                                           original_language=transcript.language)
-
-        segment_prompts_by_language, translated_segments_by_language = await transcript_translation(
-            original_transcript=transcript,
-            full_text_translations=full_text_translations,
+        translated_transcripts, segment_prompts_by_language = await translate_transcript_to_languages(
+            transcript=transcript,
             target_languages=target_languages,
-        )
-
-        for language, language_config in target_languages.items():
-            translated_transcripts[language] = TranslatedTranscript(original_language=transcript.language,
-                                                                    original_full_text=transcript.text,
-                                                                    translated_language_config=language_config,
-                                                                    translated_full_text=full_text_translations[
-                                                                        language],
-                                                                    translated_segments=translated_segments_by_language[
-                                                                        language]
-                                                                    )
-
-            subtitles_by_language[language] = subtitle_generator.generate_all_formats(translated_transcripts[language])
+            context_window_segments=context_window_segments,
+            batch_segments=batch_segments,
+            multi_language=multi_language)
 
+        for language, translated_transcript in translated_transcripts.items():
+            subtitles_by_language[language] = subtitle_generator.generate_all_formats(translated_transcript)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.exception(f"Transcription initialization failed - {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
-    logger.info(f"Transcription translation complete!")
+    logger.info("Transcription translation complete!")
     return TranscriptTranslationResponse(translated_transcripts=translated_transcripts,
                                          segment_prompts_by_language=segment_prompts_by_language,
                                          subtitles_by_language=subtitles_by_language
                                          )
+
+
+@translate_router.post("/translate/transcript/stream")
+async def stream_translate_transcript_endpoint(
+        transcript: TranscriptionVerbose = Body(...),
+        target_languages: dict[LanguageNameString, LanguageConfig] = Body(...),
+        context_window_segments: int | None = Query(None, ge=0,
+                                                    description="Only include this many neighboring segments as "
+                                                                "context in each request, instead of the full text"),
+        batch_segments: bool = Query(False, description="Translate several consecutive segments per request")
+) -> StreamingResponse:
+    """
+    Newline-delimited JSON `TranslationStreamEvent`s, one per translated segment (with its subtitle cues) as soon as
+    it's done, then a final `complete` event
+    """
+    logger.info(
+        f"Streaming translation request received for transcription with {len(transcript.segments)} segments and target languages: {[key for key in target_languages.keys()]}")
+
+    async def ndjson_events():
+        async for event in stream_transcript_translation(transcript=transcript,
+                                                         target_languages=target_languages,
+                                                         context_window_segments=context_window_segments,
+                                                         batch_segments=batch_segments):
+            yield event.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(ndjson_events(), media_type="application/x-ndjson")
@@ -1,5 +1,6 @@
 from skellysubs.api.http.app.health import health_router
 from skellysubs.api.http.app.state import state_router
+from skellysubs.api.http.processing.batch.batch_router import batch_router
 from skellysubs.api.http.processing.transcribe.transcribe_router import transcribe_router
 from skellysubs.api.http.processing.translate.translate_router import translate_router
 from skellysubs.api.http.ui.ui_router import ui_router
@@ -20,6 +21,7 @@ SKELLYSUBS_ROUTERS = {
     "/processing": {
         "transcribe": transcribe_router,
         "translate": translate_router,
+        "batch": batch_router,
         # "match_words": match_words_router,
 
     },
@@ -4,3 +4,5 @@ PROTOCOL = "http"
 HOSTNAME = "0.0.0.0"
 PORT = int(os.environ.get("PORT", 8080))  # Read PORT from environment variables
 APP_URL = f"{PROTOCOL}://{HOSTNAME}:{PORT}"
+# extra folders (besides the skellysubs data folder) that HTTP batch jobs may read from / write to, os.pathsep-separated
+BATCH_MEDIA_ROOTS = [root for root in os.environ.get("SKELLYSUBS_BATCH_MEDIA_ROOTS", "").split(os.pathsep) if root]
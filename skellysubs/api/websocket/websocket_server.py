@@ -1,14 +1,21 @@
 import asyncio
+import json
 import logging
 import multiprocessing
 import uuid
 from typing import Optional
 
-from pydantic import BaseModel
+from openai.types.audio import TranscriptionVerbose
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 from starlette.websockets import WebSocket, WebSocketState, WebSocketDisconnect
 
 from skellysubs.app.skellysubs_app_state import get_skellysubs_app_state, \
     SkellySubsAppState
+from skellysubs.core.transcription.streaming_transcriber import StreamingTranscriber, StreamingTranscriptionUpdate, \
+    DEFAULT_TRANSCRIBE_EVERY_SECONDS, DEFAULT_STABILITY_MARGIN_SECONDS, DEFAULT_MAX_WINDOW_SECONDS
+from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
+from skellysubs.core.translation.translation_subtasks.stream_transcript_translation import \
+    stream_transcript_translation
 
 logger = logging.getLogger(__name__)
 
@@ -18,12 +25,51 @@ class WebsocketPayload(BaseModel):
     session_id: uuid.UUID
 
 
+class StartTranscriptionMessage(BaseModel):
+    """
+    The client-settable options of a streaming transcription - the backend (local whisper or not, and which model)
+    is the server's choice, so it isn't accepted here
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    language: str | None = Field(default=None, max_length=32)
+    base_prompt: str | None = Field(default=None, max_length=2000)
+    transcribe_every_seconds: float = Field(default=DEFAULT_TRANSCRIBE_EVERY_SECONDS, ge=0.5, le=30)
+    stability_margin_seconds: float = Field(default=DEFAULT_STABILITY_MARGIN_SECONDS, ge=0, le=30)
+    max_window_seconds: float = Field(default=DEFAULT_MAX_WINDOW_SECONDS, ge=5, le=300)
+
+
+class WebsocketErrorMessage(BaseModel):
+    message_type: str = "error"
+    error: str
+
+
 class SkellySubsWebsocketServer:
+    """
+    Relays queued messages to the client, and handles streaming transcription:
+
+    - binary messages are raw 16 kHz mono s16le PCM audio chunks
+    - text message `{"type": "start_transcription", ...}` (optional) starts a new stream, with the options in
+      `StartTranscriptionMessage` (e.g. `language`) - an invalid message is answered with a `WebsocketErrorMessage`
+    - text message `{"type": "end_of_audio"}` finalizes the current stream
+
+    Transcribed segments are sent back as `WebsocketPayload`s wrapping `StreamingTranscriptionUpdate`s - first as
+    partial results, then once more when finalized.
+
+    Text message `{"type": "translate_transcript", "transcript": {...}, "target_languages": {...}}` (optionally with
+    `context_window_segments` / `batch_segments`) starts a streamed translation - each `TranslationStreamEvent` is sent
+    back as a `WebsocketPayload` as soon as it happens.
+    """
+
     def __init__(self, websocket: WebSocket, session_id: str):
         self.websocket = websocket
         self.session_id = session_id
         self._skellysubs_app_state: SkellySubsAppState = get_skellysubs_app_state()
         self.frontend_image_relay_task: Optional[asyncio.Task] = None
+        self._streaming_transcriber: StreamingTranscriber | None = None
+        self._end_of_audio = False
+        self._audio_received = asyncio.Event()
+        self._translation_tasks: set[asyncio.Task] = set()
 
     async def __aenter__(self):
         logger.debug("Entering SkellySubs  WebsocketServer context manager...")
@@ -31,19 +77,121 @@ class SkellySubsWebsocketServer:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         logger.debug(" SkellySubs  WebsocketServer context manager exiting...")
+        for translation_task in self._translation_tasks:
+            translation_task.cancel()
         if not self.websocket.client_state == WebSocketState.DISCONNECTED:
             await self.websocket.close()
 
     async def run(self):
         logger.info("Starting websocket runner...")
+        tasks = [asyncio.create_task(self._websocket_queue_relay()),
+                 asyncio.create_task(self._client_message_listener()),
+                 asyncio.create_task(self._streaming_transcription_loop())]
         try:
-            await asyncio.gather(
-                asyncio.create_task(self._websocket_queue_relay()),
-            )
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                task.result()
         except Exception as e:
             logger.exception(f"Error in websocket runner: {e.__class__}: {e}")
             raise
 
+    async def _client_message_listener(self):
+        """
+        Receive audio chunks and control messages from the client
+        """
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    logger.api("Client disconnected, ending client message listener...")
+                    return
+                if message.get("bytes") is not None:
+                    if self._streaming_transcriber is None:
+                        self._streaming_transcriber = StreamingTranscriber()
+                    self._streaming_transcriber.add_audio(message["bytes"])
+                    self._audio_received.set()
+                elif message.get("text") is not None:
+                    await self._handle_client_text_message(message["text"])
+        except WebSocketDisconnect:
+            logger.api("Client disconnected, ending client message listener...")
+
+    async def _handle_client_text_message(self, text: str):
+        try:
+            control_message = json.loads(text)
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring non-JSON text message from client: {text[:100]}")
+            return
+        message_type = control_message.pop("type", None) if isinstance(control_message, dict) else None
+        if message_type == "start_transcription":
+            try:
+                start_message = StartTranscriptionMessage(**control_message)
+            except ValidationError as e:
+                logger.warning(f"Rejecting invalid start_transcription message: {e}")
+                await self._send_error(f"Invalid start_transcription message: {e}")
+                return
+            logger.info(f"Starting streaming transcription for session {self.session_id[-5:]}: {start_message}")
+            self._streaming_transcriber = StreamingTranscriber(**start_message.model_dump())
+        elif message_type == "end_of_audio":
+            self._end_of_audio = True
+            self._audio_received.set()
+        elif message_type == "translate_transcript":
+            translation_task = asyncio.create_task(self._stream_translation(control_message))
+            self._translation_tasks.add(translation_task)
+            translation_task.add_done_callback(self._translation_tasks.discard)
+        else:
+            logger.warning(f"Ignoring unknown client message: {text[:100]}")
+
+    async def _streaming_transcription_loop(self):
+        """
+        Transcribe the rolling audio window whenever enough new audio has arrived, and send the results back
+        """
+        while True:
+            await self._audio_received.wait()
+            self._audio_received.clear()
+            streaming_transcriber = self._streaming_transcriber
+            if streaming_transcriber is None:
+                self._end_of_audio = False
+                continue
+            try:
+                if self._end_of_audio:
+                    self._end_of_audio = False
+                    self._streaming_transcriber = None
+                    updates = await streaming_transcriber.transcribe_pending(end_of_stream=True)
+                elif streaming_transcriber.should_transcribe():
+                    updates = await streaming_transcriber.transcribe_pending()
+                else:
+                    continue
+            except Exception as e:
+                logger.exception(f"Streaming transcription failed: {e.__class__}: {e}")
+                continue
+            for update in updates:
+                await self._send_transcription_update(update)
+
+    async def _stream_translation(self, translation_request: dict):
+        try:
+            async for event in stream_transcript_translation(
+                    transcript=TranscriptionVerbose(**translation_request["transcript"]),
+                    target_languages={language: LanguageConfig(**language_config) for language, language_config
+                                      in translation_request["target_languages"].items()},
+                    context_window_segments=translation_request.get("context_window_segments"),
+                    batch_segments=translation_request.get("batch_segments", False)):
+                payload = WebsocketPayload(payload=event, session_id=uuid.UUID(self.session_id))
+                await self.websocket.send_json(payload.model_dump(mode="json", exclude_none=True))
+        except WebSocketDisconnect:
+            logger.api("Client disconnected, ending streamed translation...")
+        except Exception as e:
+            logger.exception(f"Streamed translation failed: {e.__class__}: {e}")
+
+    async def _send_error(self, error: str):
+        payload = WebsocketPayload(payload=WebsocketErrorMessage(error=error), session_id=uuid.UUID(self.session_id))
+        await self.websocket.send_json(payload.model_dump(mode="json"))
+
+    async def _send_transcription_update(self, update: StreamingTranscriptionUpdate):
+        payload = WebsocketPayload(payload=update, session_id=uuid.UUID(self.session_id))
+        await self.websocket.send_json(payload.model_dump(mode="json"))
+
     async def _websocket_queue_relay(self):
         """
         Relay messages from the sub-processes to the frontend via the websocket.
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+
+from openai.types.audio import TranscriptionVerbose
+from pydantic import BaseModel
+
+from skellysubs.ai_clients.openai_request_scheduler import RequestPriority, request_priority
+from skellysubs.core.subtitles.formatters.base_subtitle_formatter import FormattedSubtitles
+from skellysubs.core.subtitles.subtitle_generator import SubtitleGenerator
+from skellysubs.core.transcription.audio_extraction import extract_audio
+from skellysubs.core.transcription.get_or_compute_video_transcription import get_or_compute_verbose_transcription
+from skellysubs.core.transcription.whisper_audio_transcription import TRANSCRIPTION_BASE_PROMPT
+from skellysubs.core.translation.language_configs.language_configs import get_language_configs
+from skellysubs.core.translation.models.transcript_models import TranslatedTranscript
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.translation.translation_subtasks.translate_transcript_to_languages import \
+    translate_transcript_to_languages
+
+logger = logging.getLogger(__name__)
+
+BATCH_STAGES = ("extraction", "transcription", "translation", "subtitles")
+BATCH_INPUT_EXTENSIONS = {".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4a", ".mp3", ".wav", ".ogg"}
+CHECKPOINT_FILE_NAME = "checkpoint.json"
+
+
+class BatchJobConfig(BaseModel):
+    output_folder: str
+    target_languages: list[LanguageNameString] | None = None  # None -> every configured language
+    language: str | None = None
+    transcription_prompt: str | None = TRANSCRIPTION_BASE_PROMPT
+    batch_segments: bool = True  # several segments per translation request
+    multi_language: bool = False  # several target languages per translation request
+    max_concurrent_files: int = 4
+    stage_concurrency: dict[str, int] = {"extraction": 2,
+                                         "transcription": 4,
+                                         "translation": 2,
+                                         "subtitles": 4}
+
+
+class BatchFileCheckpoint(BaseModel):
+    """
+    Per-file progress, saved after every stage so an interrupted batch resumes where each file left off
+    """
+    source_path: str
+    completed_stages: list[str] = []
+    artifacts: dict[str, str] = {}
+    stage_seconds: dict[str, float] = {}
+    error: str | None = None
+
+    @property
+    def is_complete(self) -> bool:
+        return all(stage in self.completed_stages for stage in BATCH_STAGES)
+
+
+def collect_batch_input_paths(input_path: str) -> list[str]:
+    """
+    A folder (searched recursively for audio/video files), a JSON list of paths, or a text file with one path per line
+    """
+    path = Path(input_path)
+    if path.is_dir():
+        return sorted(str(file_path) for file_path in path.rglob("*")
+                      if file_path.suffix.lower() in BATCH_INPUT_EXTENSIONS and file_path.is_file())
+    if not path.is_file():
+        raise FileNotFoundError(f"Batch input not found: {input_path}")
+    if path.suffix.lower() == ".json":
+        manifest_paths = json.loads(path.read_text(encoding="utf-8"))
+    else:
+        manifest_paths = [line.strip() for line in path.read_text(encoding="utf-8").splitlines()
+                          if line.strip() and not line.strip().startswith("#")]
+    # relative manifest entries are relative to the manifest itself
+    return [str(manifest_path if Path(manifest_path).is_absolute() else path.parent / manifest_path)
+            for manifest_path in manifest_paths]
+
+
+class BatchJobRunner:
+    """
+    Runs extraction -> transcription -> translation -> subtitles for many files.
+
+    Up to `max_concurrent_files` files are in flight at once, and each stage has its own concurrency limit (e.g. few
+    simultaneous ffmpeg extractions, more simultaneous API transcriptions). Each file gets its own output folder with
+    a checkpoint that is updated after every stage, so re-running the same batch skips finished work.
+    """
+
+    def __init__(self, source_paths: list[str], config: BatchJobConfig):
+        self.source_paths = source_paths
+        self.config = config
+        self.output_folder = Path(config.output_folder)
+        self.checkpoints: dict[str, BatchFileCheckpoint] = {}
+        self._stage_semaphores = {stage: asyncio.Semaphore(config.stage_concurrency.get(stage, 1))
+                                  for stage in BATCH_STAGES}
+        self._subtitle_generator = SubtitleGenerator()
+
+    def get_file_output_folder(self, source_path: str) -> Path:
+        path_hash = hashlib.sha1(str(Path(source_path).resolve()).encode()).hexdigest()[:8]
+        return self.output_folder / f"{Path(source_path).stem}_{path_hash}"
+
+    def load_checkpoint(self, source_path: str) -> BatchFileCheckpoint:
+        checkpoint_path = self.get_file_output_folder(source_path) / CHECKPOINT_FILE_NAME
+        if not checkpoint_path.exists():
+            return BatchFileCheckpoint(source_path=source_path)
+        checkpoint = BatchFileCheckpoint(**json.loads(checkpoint_path.read_text(encoding="utf-8")))
+        # a stage only counts as done if its output is still on disk (and so do the stages after it)
+        for stage_number, stage in enumerate(BATCH_STAGES):
+            if stage in checkpoint.completed_stages and not Path(checkpoint.artifacts.get(stage, "")).exists():
+                checkpoint.completed_stages = [completed for completed in checkpoint.completed_stages
+                                               if completed in BATCH_STAGES[:stage_number]]
+                break
+        checkpoint.error = None
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint: BatchFileCheckpoint) -> None:
+        file_output_folder = self.get_file_output_folder(checkpoint.source_path)
+        file_output_folder.mkdir(parents=True, exist_ok=True)
+        (file_output_folder / CHECKPOINT_FILE_NAME).write_text(checkpoint.model_dump_json(indent=4), encoding="utf-8")
+
+    async def run(self) -> dict[str, BatchFileCheckpoint]:
+        logger.info(f"Starting batch job - {len(self.source_paths)} files, "
+                    f"{self.config.max_concurrent_files} concurrent files, stage limits: {self.config.stage_concurrency}")
+        file_queue: asyncio.Queue[str] = asyncio.Queue()
+        for source_path in self.source_paths:
+            file_queue.put_nowait(source_path)
+
+        async def worker() -> None:
+            # batch API calls queue behind interactive ones in the shared OpenAI scheduler
+            with request_priority(RequestPriority.BATCH):
+                while not file_queue.empty():
+                    await self._process_file(file_queue.get_nowait())
+
+        await asyncio.gather(*[worker() for _ in range(max(self.config.max_concurrent_files, 1))])
+
+        completed_count = sum(checkpoint.is_complete for checkpoint in self.checkpoints.values())
+        logger.info(f"Batch job finished - {completed_count}/{len(self.source_paths)} files complete")
+        return self.checkpoints
+
+    async def _process_file(self, source_path: str) -> None:
+        checkpoint = self.load_checkpoint(source_path)
+        self.checkpoints[source_path] = checkpoint
+        if checkpoint.is_complete:
+            logger.info(f"Skipping already completed file: {source_path}")
+            return
+        for stage in BATCH_STAGES:
+            if stage in checkpoint.completed_stages:
+                continue
+            try:
+                async with self._stage_semaphores[stage]:
+                    stage_start = time.perf_counter()
+                    checkpoint.artifacts[stage] = await self._run_stage(stage=stage, checkpoint=checkpoint)
+                    checkpoint.stage_seconds[stage] = time.perf_counter() - stage_start
+            except Exception as e:
+                logger.exception(f"Batch stage `{stage}` failed for {source_path}: {e}")
+                checkpoint.error = f"{stage}: {e.__class__.__name__}: {e}"
+                self.save_checkpoint(checkpoint)
+                return
+            checkpoint.completed_stages.append(stage)
+            self.save_checkpoint(checkpoint)
+            logger.debug(f"Finished batch stage `{stage}` for {source_path} in {checkpoint.stage_seconds[stage]:.1f}s")
+
+    async def _run_stage(self, stage: str, checkpoint: BatchFileCheckpoint) -> str:
+        """
+        Run one stage for one file and return the path of its output
+        """
+        file_output_folder = self.get_file_output_folder(checkpoint.source_path)
+        file_output_folder.mkdir(parents=True, exist_ok=True)
+
+        if stage == "extraction":
+            return await asyncio.to_thread(extract_audio, checkpoint.source_path, "ogg")
+
+        if stage == "transcription":
+            transcript = await get_or_compute_verbose_transcription(audio_path=checkpoint.artifacts["extraction"],
+                                                                    language=self.config.language,
+                                                                    prompt=self.config.transcription_prompt)
+            transcription_path = file_output_folder / "transcription.json"
+            transcription_path.write_text(transcript.model_dump_json(indent=4), encoding="utf-8")
+            return str(transcription_path)
+
+        transcript = TranscriptionVerbose(**json.loads(Path(checkpoint.artifacts["transcription"]).read_text(
+            encoding="utf-8")))
+
+        if stage == "translation":
+            language_configs = get_language_configs()
+            target_language_names = self.config.target_languages
+            if target_language_names is None:
+                target_language_names = list(language_configs.keys())
+            translated_transcripts, _ = await translate_transcript_to_languages(
+                transcript=transcript,
+                target_languages={name: language_configs[name] for name in target_language_names},
+                batch_segments=self.config.batch_segments,
+                multi_language=self.config.multi_language)
+            translations_path = file_output_folder / "translations.json"
+            translations_path.write_text(json.dumps({language: translated_transcript.model_dump(mode="json")
+                                                     for language, translated_transcript in
+                                                     translated_transcripts.items()}, indent=4),
+                                         encoding="utf-8")
+            return str(translations_path)
+
+        if stage == "subtitles":
+            subtitles_folder = file_output_folder / "subtitles"
+            subtitles_folder.mkdir(parents=True, exist_ok=True)
+            self._write_subtitles(subtitles_folder, "original",
+                                  self._subtitle_generator.generate_all_formats(transcript))
+            translations = json.loads(Path(checkpoint.artifacts["translation"]).read_text(encoding="utf-8"))
+            for language, translated_transcript_data in translations.items():
+                self._write_subtitles(subtitles_folder, language,
+                                      self._subtitle_generator.generate_all_formats(
+                                          TranslatedTranscript(**translated_transcript_data)))
+            return str(subtitles_folder)
+
+        raise ValueError(f"Unknown batch stage: {stage}")
+
+    @staticmethod
+    def _write_subtitles(subtitles_folder: Path, label: str, formatted_subtitles: FormattedSubtitles) -> None:
+        for subtitle_format, subtitles_by_variant in formatted_subtitles.model_dump().items():
+            for variant, subtitle_text in subtitles_by_variant.items():
+                variant_name = getattr(variant, "value", variant)
+                (subtitles_folder / f"{label}.{variant_name}.{subtitle_format}").write_text(subtitle_text,
+                                                                                           encoding="utf-8")
+
+
+async def run_batch_job(input_path: str, config: BatchJobConfig) -> dict[str, BatchFileCheckpoint]:
+    return await BatchJobRunner(source_paths=collect_batch_input_paths(input_path), config=config).run()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Transcribe, translate, and subtitle a folder (or manifest) of videos")
+    parser.add_argument("input_path", help="Folder of videos, JSON list of paths, or text file with one path per line")
+    parser.add_argument("--output-folder", required=True)
+    parser.add_argument("--languages", nargs="*", default=None, help="Target languages (default: all configured)")
+    parser.add_argument("--max-concurrent-files", type=int, default=4)
+    parser.add_argument("--max-concurrent-transcriptions", type=int, default=4)
+    parser.add_argument("--max-concurrent-translations", type=int, default=2)
+    args = parser.parse_args()
+
+    batch_config = BatchJobConfig(output_folder=args.output_folder,
+                                  target_languages=args.languages,
+                                  max_concurrent_files=args.max_concurrent_files)
+    batch_config.stage_concurrency.update(transcription=args.max_concurrent_transcriptions,
+                                          translation=args.max_concurrent_translations)
+    asyncio.run(run_batch_job(input_path=args.input_path, config=batch_config))
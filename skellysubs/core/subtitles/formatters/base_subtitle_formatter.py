@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from skellysubs.core.subtitles.subtitle_types import SrtFormattedString, VttFormattedString, MdFormattedString, \
     FormattedSubtitleStringsByVariant, SubtitleFormattedString, SubtitleVariant
+from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
 from skellysubs.core.translation.models.transcript_models import TranslatedTranscript
 
 
@@ -45,11 +46,16 @@ class SubtitleFormatter(ABC):
     Concrete implementations should handle specific subtitle format requirements.
     """
 
+    @staticmethod
+    def has_romanization(language_config: LanguageConfig) -> bool:
+        """Check if a target language has a valid romanization method"""
+        return bool(language_config.romanization_method and
+                    language_config.romanization_method.lower() != "none")
+
     @staticmethod
     def _has_romanization(transcript: TranslatedTranscript) -> bool:
         """Check if transcript has valid romanization"""
-        return (transcript.translated_language_config.romanization_method and
-                transcript.translated_language_config.romanization_method.lower() != "none")
+        return SubtitleFormatter.has_romanization(transcript.translated_language_config)
 
     @abstractmethod
     def format_transcript(
@@ -6,7 +6,9 @@ from skellysubs.core.subtitles.subtitle_types import (
     SubtitleVariant,
     FormattedSubtitleStringsByVariant
 )
+from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
 from skellysubs.core.translation.models.transcript_models import TranslatedTranscript
+from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment
 
 
 class SrtSubtitleFormatter(SubtitleFormatter):
@@ -39,6 +41,20 @@ class SrtSubtitleFormatter(SubtitleFormatter):
 
         raise ValueError("Invalid transcript type!")
 
+    def format_segment_cues(
+            self,
+            segment_number: int,
+            segment: TranslatedTranscriptSegment,
+            language_config: LanguageConfig
+    ) -> FormattedSubtitleStringsByVariant:
+        """Format a single translated segment as SRT cues - translation_only, plus translation_with_romanization if the
+        language has romanization - each matching that segment's cue in the full-file variant"""
+        cues = {SubtitleVariant.translation_only: self._format_translated_segment(index=segment_number,
+                                                                                 segment=segment)}
+        if self.has_romanization(language_config):
+            cues[SubtitleVariant.translation_with_romanization] = self._format_romanized_segment(index=segment_number,
+                                                                                                segment=segment)
+        return cues
 
     @staticmethod
     def _format_segment(index: int, start_time: float, end_time: float, text: str) -> str:
@@ -67,20 +83,41 @@ class SrtSubtitleFormatter(SubtitleFormatter):
 
         return "\n\n".join(srt_segments)
 
+    @staticmethod
+    def _format_translated_segment(index: int, segment: TranslatedTranscriptSegment) -> str:
+        """Format a single segment's translated text as an SRT subtitle segment"""
+        return SrtSubtitleFormatter._format_segment(
+            index=index,
+            start_time=segment.start,
+            end_time=segment.end,
+            text=segment.translated_text.translated_text.strip()
+        )
+
+    @staticmethod
+    def _format_romanized_segment(index: int, segment: TranslatedTranscriptSegment) -> str:
+        """Format a single segment's translated and romanized text as an SRT subtitle segment"""
+        # Adjust start time slightly if it's at 0 to prevent timing issues
+        start = segment.start + 0.01 if segment.start == 0 else segment.start
+
+        text = (
+            f"{segment.translated_text.translated_text.strip()}\n"
+            f"{segment.translated_text.romanized_text.strip()}"
+        )
+
+        return SrtSubtitleFormatter._format_segment(
+            index=index,
+            start_time=start,
+            end_time=segment.end,
+            text=text
+        )
+
     @staticmethod
     def _format_translation(transcript: TranslatedTranscript) -> str:
         """Format a translation into SRT"""
         srt_segments = []
 
         for index, segment in enumerate(transcript.segments, 1):
-            srt_segments.append(
-                SrtSubtitleFormatter._format_segment(
-                    index=index,
-                    start_time=segment.start,
-                    end_time=segment.end,
-                    text=segment.translated_text.translated_text.strip()
-                )
-            )
+            srt_segments.append(SrtSubtitleFormatter._format_translated_segment(index=index, segment=segment))
 
         return "\n\n".join(srt_segments)
 
@@ -90,22 +127,7 @@ class SrtSubtitleFormatter(SubtitleFormatter):
         srt_segments = []
 
         for index, segment in enumerate(translated_transcript.segments, 1):
-            # Adjust start time slightly if it's at 0 to prevent timing issues
-            start = segment.start + 0.01 if segment.start == 0 else segment.start
-
-            text = (
-                f"{segment.translated_text.translated_text.strip()}\n"
-                f"{segment.translated_text.romanized_text.strip()}"
-            )
-
-            srt_segments.append(
-                SrtSubtitleFormatter._format_segment(
-                    index=index,
-                    start_time=start,
-                    end_time=segment.end,
-                    text=text
-                )
-            )
+            srt_segments.append(SrtSubtitleFormatter._format_romanized_segment(index=index, segment=segment))
 
         return "\n\n".join(srt_segments)
 
@@ -6,7 +6,9 @@ from openai.types.audio import TranscriptionVerbose
 from skellysubs.core.subtitles.formatters.base_subtitle_formatter import SubtitleFormatter
 from skellysubs.core.subtitles.formatters.subtitle_time_formatter import SubtitleTimeFormatter
 from skellysubs.core.subtitles.subtitle_types import SubtitleVariant, FormattedSubtitleStringsByVariant
+from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
 from skellysubs.core.translation.models.transcript_models import TranslatedTranscript
+from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment
 
 
 class VttConfiguration(BaseModel):
@@ -141,6 +143,40 @@ class VttSubtitleFormatter(SubtitleFormatter):
 
         raise ValueError("Invalid transcript type!")
 
+    def format_segment_cues(
+            self,
+            segment_number: int,
+            segment: TranslatedTranscriptSegment,
+            language_config: LanguageConfig
+    ) -> FormattedSubtitleStringsByVariant:
+        """Format a single translated segment as WebVTT cues (without the file header) - translation_only, plus
+        translation_with_romanization if the language has romanization"""
+        cues = {SubtitleVariant.translation_only: self._format_translated_segment(index=segment_number,
+                                                                                 segment=segment)}
+        if self.has_romanization(language_config):
+            cues[SubtitleVariant.translation_with_romanization] = self._format_romanized_segment(index=segment_number,
+                                                                                                segment=segment)
+        return cues
+
+    def _format_translated_segment(self, index: int, segment: TranslatedTranscriptSegment) -> str:
+        """Format a single segment's translated text"""
+        return self._format_segment(
+            index=index,
+            start_time=segment.start,
+            end_time=segment.end,
+            text=segment.translated_text.translated_text.strip()
+        )
+
+    def _format_romanized_segment(self, index: int, segment: TranslatedTranscriptSegment) -> str:
+        """Format a single segment's translated text with italicized romanization"""
+        translated = segment.translated_text.translated_text.strip()
+        romanized = segment.translated_text.romanized_text.strip()
+        return self._format_segment(
+            index=index,
+            start_time=segment.start,
+            end_time=segment.end,
+            text=f"{translated}\n<i>{romanized}</i>"
+        )
 
     def _format_transcription(self, transcript: TranscriptionVerbose) -> str:
         """Format basic transcription with VTT header"""
@@ -160,32 +196,14 @@ class VttSubtitleFormatter(SubtitleFormatter):
         """Format translated text only"""
         vtt_content = [self._build_vtt_header()]
         for index, segment in enumerate(transcript.segments, 1):
-            text = segment.translated_text.translated_text.strip()
-            vtt_content.append(
-                self._format_segment(
-                    index=index,
-                    start_time=segment.start,
-                    end_time=segment.end,
-                    text=text
-                )
-            )
+            vtt_content.append(self._format_translated_segment(index=index, segment=segment))
         return "\n\n".join(vtt_content)
 
     def _format_romanized(self, transcript: TranslatedTranscript) -> str:
         """Format with translated text and italicized romanization"""
         vtt_content = [self._build_vtt_header()]
         for index, segment in enumerate(transcript.segments, 1):
-            translated = segment.translated_text.translated_text.strip()
-            romanized = segment.translated_text.romanized_text.strip()
-            text = f"{translated}\n<i>{romanized}</i>"
-            vtt_content.append(
-                self._format_segment(
-                    index=index,
-                    start_time=segment.start,
-                    end_time=segment.end,
-                    text=text
-                )
-            )
+            vtt_content.append(self._format_romanized_segment(index=index, segment=segment))
         return "\n\n".join(vtt_content)
 
     def _format_multi_language(self, transcript: TranslatedTranscript) -> str:
@@ -4,8 +4,10 @@ from skellysubs.core.subtitles.formatters.base_subtitle_formatter import Formatt
 from skellysubs.core.subtitles.formatters.md_subtitle_formatter import MDFormatter
 from skellysubs.core.subtitles.formatters.srt_subtitle_formatter import SrtSubtitleFormatter
 from skellysubs.core.subtitles.formatters.vtt_subtitle_formatter import VttSubtitleFormatter
-from skellysubs.core.subtitles.subtitle_types import SubtitleFormats
+from skellysubs.core.subtitles.subtitle_types import SubtitleFormats, SubtitleVariant
+from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
 from skellysubs.core.translation.models.transcript_models import TranslatedTranscript
+from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment
 
 
 class SubtitleGenerator:
@@ -37,6 +39,11 @@ class SubtitleGenerator:
             SubtitleFormats.MD: MDFormatter(),
             SubtitleFormats.VTT: VttSubtitleFormatter()
         }
+        # the formats that can be rendered one segment at a time (see `generate_segment_cues`)
+        self._cue_formatters: dict[SubtitleFormats, SrtSubtitleFormatter | VttSubtitleFormatter] = {
+            SubtitleFormats.SRT: self._formatters[SubtitleFormats.SRT],
+            SubtitleFormats.VTT: self._formatters[SubtitleFormats.VTT],
+        }
 
     def generate_all_formats(
             self,
@@ -61,3 +68,28 @@ class SubtitleGenerator:
         return FormattedSubtitles(srt= formatted_subtitles[SubtitleFormats.SRT.value],
                                   vtt= formatted_subtitles[SubtitleFormats.VTT.value],
                                   md= formatted_subtitles[SubtitleFormats.MD.value])
+
+    def generate_segment_cues(
+            self,
+            segment_number: int,
+            segment: TranslatedTranscriptSegment,
+            language_config: LanguageConfig
+    ) -> dict[str, dict[SubtitleVariant, str]]:
+        """
+        Generate the SRT and VTT cues for a single translated segment, for streaming subtitles as they're translated
+
+        Args:
+            segment_number: The 1-based cue number, i.e. the segment's position in the full transcript
+            segment: The translated segment
+            language_config: The target language config (decides whether a romanized variant is included)
+
+        Returns:
+            Cue strings keyed by format ("srt", "vtt") and then by variant - only the translation_only and (for
+            romanized languages) translation_with_romanization variants, each matching that segment's cue in the
+            `generate_all_formats` file of the same variant. The multi_language variant and markdown are whole-file
+            formats and are not produced per segment
+        """
+        return {format_type.value: formatter.format_segment_cues(segment_number=segment_number,
+                                                                segment=segment,
+                                                                language_config=language_config)
+                for format_type, formatter in self._cue_formatters.items()}
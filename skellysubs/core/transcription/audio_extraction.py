@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Literal
+
+import ffmpeg
+import numpy as np
+
+from skellysubs.system.files_and_folder_names import get_skellysubs_data_folder_path
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTION_SAMPLE_RATE = 16_000
+OPUS_BITRATE = "32k"
+SOURCE_FINGERPRINT_SAMPLE_BYTES = 1024 ** 2
+DEFAULT_EXTRACTED_AUDIO_CACHE_MAX_SIZE_BYTES = 4 * 1024 ** 3  # 16 kHz wav is ~115 MB per hour of source
+
+ExtractedAudioFormat = Literal["wav", "ogg", "mp3"]
+
+# 16 kHz mono is all whisper uses, so there is no point extracting (or uploading) anything richer
+_FFMPEG_OUTPUT_ARGS: dict[str, dict] = {
+    "wav": dict(acodec="pcm_s16le", ac=1, ar=TRANSCRIPTION_SAMPLE_RATE),
+    "ogg": dict(acodec="libopus", ac=1, ar=TRANSCRIPTION_SAMPLE_RATE, audio_bitrate=OPUS_BITRATE),
+    "mp3": dict(acodec="libmp3lame", ac=1, ar=TRANSCRIPTION_SAMPLE_RATE, audio_bitrate="64k"),
+}
+
+
+def get_source_fingerprint(source_path: str) -> str:
+    """
+    Cheap sampled hash of a (possibly multi-gigabyte) media file - its size plus its first, middle, and last MiB.
+
+    Only the file's bytes go in (no path, mtime, or inode), so a copied, re-uploaded, or touched file still hits the
+    cache. It is a sample rather than a full content hash, so two files that differ only outside the sampled windows
+    (and have the same size) would collide
+    """
+    file_size = os.path.getsize(source_path)
+    source_hash = hashlib.sha256(str(file_size).encode())
+    with open(source_path, "rb") as source_file:
+        for offset in {0, max(file_size // 2 - SOURCE_FINGERPRINT_SAMPLE_BYTES // 2, 0),
+                       max(file_size - SOURCE_FINGERPRINT_SAMPLE_BYTES, 0)}:
+            source_file.seek(offset)
+            source_hash.update(source_file.read(SOURCE_FINGERPRINT_SAMPLE_BYTES))
+    return source_hash.hexdigest()
+
+
+def get_extracted_audio_folder() -> Path:
+    folder = Path(get_skellysubs_data_folder_path()) / "extracted_audio"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+def extract_audio_to_file(source_path: str,
+                          audio_path: str,
+                          audio_format: ExtractedAudioFormat | None = None) -> str:
+    """
+    Demux + resample the audio track of `source_path` straight to `audio_path` with ffmpeg (the video stream is
+    never decoded). The format defaults to the output file's extension
+    """
+    if not Path(source_path).is_file():
+        raise FileNotFoundError(f"File not found: {source_path}")
+    audio_format = audio_format or Path(audio_path).suffix.lstrip(".")
+    if audio_format not in _FFMPEG_OUTPUT_ARGS:
+        raise ValueError(f"Unsupported audio format: {audio_format} - must be one of {list(_FFMPEG_OUTPUT_ARGS)}")
+    Path(audio_path).parent.mkdir(parents=True, exist_ok=True)
+    # unique per call, so concurrent extractions of the same source don't write over each other
+    temporary_file_descriptor, temporary_path = tempfile.mkstemp(dir=Path(audio_path).parent,
+                                                                 prefix=f"{Path(audio_path).name}.",
+                                                                 suffix=".partial")
+    os.close(temporary_file_descriptor)
+    try:
+        (
+            ffmpeg
+            .input(source_path)
+            .output(temporary_path, vn=None, format=audio_format, **_FFMPEG_OUTPUT_ARGS[audio_format])
+            .global_args('-loglevel', 'error', '-nostats')
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        Path(temporary_path).unlink(missing_ok=True)
+        raise ValueError(f"ffmpeg could not extract audio from {source_path}: "
+                         f"{e.stderr.decode(errors='replace')[-500:]}") from e
+    os.replace(temporary_path, audio_path)
+    return audio_path
+
+
+def extract_audio(source_path: str, audio_format: ExtractedAudioFormat = "ogg") -> str:
+    """
+    Extract the audio of `source_path` to a cached file keyed by the source's content fingerprint, so the same
+    video is only ever extracted once per format. Use "ogg" (16 kHz Opus, small uploads) for the Whisper API and
+    "wav" (16 kHz PCM, no decode cost) for local whisper
+    """
+    audio_path = get_extracted_audio_folder() / f"{get_source_fingerprint(source_path)}.{audio_format}"
+    try:
+        os.utime(audio_path)  # refreshes the recency used for eviction
+        logger.debug(f"Using cached extracted audio for {source_path}: {audio_path}")
+        return str(audio_path)
+    except FileNotFoundError:
+        pass
+    logger.info(f"Extracting audio from {source_path} to {audio_path}")
+    extract_audio_to_file(source_path=source_path, audio_path=str(audio_path), audio_format=audio_format)
+    evict_least_recently_used_audio(keep_path=audio_path)
+    return str(audio_path)
+
+
+_EXTRACTED_AUDIO_EVICTION_LOCK = threading.Lock()
+
+
+def evict_least_recently_used_audio(keep_path: Path | None = None,
+                                    max_size_bytes: int = DEFAULT_EXTRACTED_AUDIO_CACHE_MAX_SIZE_BYTES) -> None:
+    """
+    Delete the least recently used extracted audio files until the folder is back under `max_size_bytes`
+    """
+    with _EXTRACTED_AUDIO_EVICTION_LOCK:
+        entries = []
+        for entry in get_extracted_audio_folder().iterdir():
+            if entry.suffix.lstrip(".") not in _FFMPEG_OUTPUT_ARGS or entry == keep_path:
+                continue
+            try:
+                entries.append((entry.stat(), entry))
+            except FileNotFoundError:
+                continue
+        total_size = sum(entry_stat.st_size for entry_stat, _ in entries)
+        if keep_path is not None and keep_path.exists():
+            total_size += keep_path.stat().st_size
+        for entry_stat, entry in sorted(entries, key=lambda item: item[0].st_mtime_ns):
+            if total_size <= max_size_bytes:
+                break
+            logger.debug(f"Evicting extracted audio: {entry.name}")
+            entry.unlink(missing_ok=True)
+            total_size -= entry_stat.st_size
+
+
+def open_pcm_audio_pipe(source_path: str, sample_rate: int = TRANSCRIPTION_SAMPLE_RATE) -> subprocess.Popen:
+    """
+    Start an ffmpeg process that decodes the audio of `source_path` to mono s16le PCM on its stdout
+    """
+    if not Path(source_path).is_file():
+        raise FileNotFoundError(f"File not found: {source_path}")
+    return (
+        ffmpeg
+        .input(source_path)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+        .global_args('-loglevel', 'error', '-nostats')
+        .run_async(pipe_stdout=True, pipe_stderr=True, quiet=True)
+    )
+
+
+def extract_audio_samples(source_path: str, sample_rate: int = TRANSCRIPTION_SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode the audio of `source_path` to mono int16 samples in memory (no temporary file)
+    """
+    process = open_pcm_audio_pipe(source_path=source_path, sample_rate=sample_rate)
+    output, stderr = process.communicate()
+    if process.returncode != 0:
+        raise ValueError(f"ffmpeg could not decode audio from {source_path}: {stderr.decode(errors='replace')[-500:]}")
+    return np.frombuffer(output, dtype=np.int16)
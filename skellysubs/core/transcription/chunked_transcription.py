@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+import ffmpeg
+import numpy as np
+from openai.types.audio import TranscriptionVerbose
+
+from skellysubs.ai_clients.openai_client import get_or_create_openai_client
+from skellysubs.core.transcription.audio_extraction import extract_audio_samples, TRANSCRIPTION_SAMPLE_RATE
+from skellysubs.core.transcription.whisper_transcript_result_model import WhisperTranscriptionResult
+
+logger = logging.getLogger(__name__)
+
+CHUNKING_SAMPLE_RATE = TRANSCRIPTION_SAMPLE_RATE
+DEFAULT_MAX_CHUNK_SECONDS = 600.0
+DEFAULT_CHUNK_OVERLAP_SECONDS = 5.0
+DEFAULT_MAX_CONCURRENT_CHUNK_REQUESTS = 4
+WHISPER_API_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+SILENCE_SEARCH_WINDOW_RATIO = 0.1  # look for the quietest point within +/- 10% of the chunk length around each cut
+ENERGY_FRAME_SECONDS = 0.05
+WHISPER_SEEK_FRAMES_PER_SECOND = 100
+
+
+@dataclass(frozen=True)
+class AudioChunk:
+    """
+    A slice of the source audio. `[owned_start, owned_end)` is the part of the timeline this chunk is responsible
+    for in the stitched result - `[start, end)` extends it by the overlap on each side
+    """
+    index: int
+    start: float
+    end: float
+    owned_start: float
+    owned_end: float
+
+
+def get_frame_energies(samples: np.ndarray, sample_rate: int, frame_seconds: float = ENERGY_FRAME_SECONDS) -> np.ndarray:
+    frame_length = max(int(sample_rate * frame_seconds), 1)
+    number_of_frames = len(samples) // frame_length
+    frames = samples[:number_of_frames * frame_length].reshape(number_of_frames, frame_length).astype(np.float32)
+    return np.sqrt(np.einsum('ij,ij->i', frames, frames) / frame_length)
+
+
+def find_low_energy_cut_points(samples: np.ndarray,
+                               sample_rate: int,
+                               max_chunk_seconds: float,
+                               frame_seconds: float = ENERGY_FRAME_SECONDS) -> list[float]:
+    """
+    Cut times (seconds) that split the audio into roughly `max_chunk_seconds`-long pieces, each placed at the
+    lowest-energy frame near the ideal evenly-spaced cut so that chunk boundaries fall in pauses rather than words
+    """
+    duration = len(samples) / sample_rate
+    if duration <= max_chunk_seconds:
+        return []
+    frame_energies = get_frame_energies(samples=samples, sample_rate=sample_rate, frame_seconds=frame_seconds)
+    number_of_chunks = int(np.ceil(duration / max_chunk_seconds))
+    chunk_seconds = duration / number_of_chunks
+    search_window_frames = int(chunk_seconds * SILENCE_SEARCH_WINDOW_RATIO / frame_seconds)
+
+    cut_points = []
+    for chunk_number in range(1, number_of_chunks):
+        ideal_frame = int(chunk_number * chunk_seconds / frame_seconds)
+        window_start = max(ideal_frame - search_window_frames, 0)
+        window_end = min(ideal_frame + search_window_frames, len(frame_energies))
+        if window_end <= window_start:
+            cut_points.append(ideal_frame * frame_seconds)
+            continue
+        quietest_frame = window_start + int(np.argmin(frame_energies[window_start:window_end]))
+        cut_points.append((quietest_frame + 0.5) * frame_seconds)
+    return cut_points
+
+
+def plan_audio_chunks(duration: float, cut_points: list[float], overlap_seconds: float) -> list[AudioChunk]:
+    boundaries = [0.0] + cut_points + [duration]
+    return [AudioChunk(index=chunk_index,
+                       start=max(owned_start - overlap_seconds, 0.0),
+                       end=min(owned_end + overlap_seconds, duration),
+                       owned_start=owned_start,
+                       owned_end=owned_end)
+            for chunk_index, (owned_start, owned_end) in enumerate(zip(boundaries[:-1], boundaries[1:]))]
+
+
+def write_audio_chunk(audio_path: str, chunk: AudioChunk, chunk_path: str) -> None:
+    (
+        ffmpeg
+        .input(audio_path, ss=chunk.start, t=chunk.end - chunk.start)
+        .output(chunk_path, ac=1, ar=CHUNKING_SAMPLE_RATE, audio_bitrate='64k')
+        .global_args('-loglevel', 'error', '-nostats')
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+
+def stitch_chunk_transcripts(chunks: list[AudioChunk],
+                             chunk_transcripts: list[TranscriptionVerbose]) -> TranscriptionVerbose:
+    """
+    Shift each chunk's segments/words onto the full-audio timeline, and de-duplicate the overlaps by keeping each
+    segment/word only in the chunk that owns its midpoint
+    """
+
+    def is_owned(chunk: AudioChunk, start: float, end: float) -> bool:
+        midpoint = (start + end) / 2
+        if chunk.index == len(chunks) - 1:
+            return chunk.owned_start <= midpoint
+        return chunk.owned_start <= midpoint < chunk.owned_end
+
+    segments = []
+    words = []
+    for chunk, chunk_transcript in zip(chunks, chunk_transcripts):
+        offset = chunk.start
+        for segment in chunk_transcript.segments or []:
+            if is_owned(chunk, segment.start + offset, segment.end + offset):
+                segments.append(segment.model_copy(update={
+                    "id": len(segments),
+                    "start": segment.start + offset,
+                    "end": segment.end + offset,
+                    "seek": segment.seek + int(offset * WHISPER_SEEK_FRAMES_PER_SECOND),
+                }))
+        for word in chunk_transcript.words or []:
+            if is_owned(chunk, word.start + offset, word.end + offset):
+                words.append(word.model_copy(update={"start": word.start + offset,
+                                                     "end": word.end + offset}))
+
+    return TranscriptionVerbose(duration=max((chunk.end for chunk in chunks), default=0.0),
+                                language=chunk_transcripts[0].language if chunk_transcripts else "",
+                                text=" ".join(segment.text.strip() for segment in segments),
+                                segments=segments,
+                                words=words)
+
+
+async def transcribe_audio_openai_chunked(audio_path: str,
+                                          prompt: str | None = None,
+                                          language: str | None = None,
+                                          max_chunk_seconds: float = DEFAULT_MAX_CHUNK_SECONDS,
+                                          overlap_seconds: float = DEFAULT_CHUNK_OVERLAP_SECONDS,
+                                          max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_CHUNK_REQUESTS,
+                                          ) -> WhisperTranscriptionResult:
+    return WhisperTranscriptionResult.from_verbose_transcript(
+        await transcribe_audio_openai_chunked_verbose(audio_path=audio_path,
+                                                      prompt=prompt,
+                                                      language=language,
+                                                      max_chunk_seconds=max_chunk_seconds,
+                                                      overlap_seconds=overlap_seconds,
+                                                      max_concurrent_requests=max_concurrent_requests))
+
+
+async def transcribe_audio_openai_chunked_verbose(audio_path: str,
+                                                  prompt: str | None = None,
+                                                  language: str | None = None,
+                                                  max_chunk_seconds: float = DEFAULT_MAX_CHUNK_SECONDS,
+                                                  overlap_seconds: float = DEFAULT_CHUNK_OVERLAP_SECONDS,
+                                                  max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_CHUNK_REQUESTS,
+                                                  ) -> TranscriptionVerbose:
+    """
+    Split long audio on quiet points into overlapping chunks, transcribe the chunks concurrently (at most
+    `max_concurrent_requests` in flight), and stitch them back into a single transcript.
+
+    Keeps each upload under the API size limit and makes end-to-end latency roughly proportional to the chunk
+    length rather than the full recording length.
+    """
+    samples = await asyncio.to_thread(extract_audio_samples, audio_path, CHUNKING_SAMPLE_RATE)
+    duration = len(samples) / CHUNKING_SAMPLE_RATE
+    cut_points = find_low_energy_cut_points(samples=samples,
+                                            sample_rate=CHUNKING_SAMPLE_RATE,
+                                            max_chunk_seconds=max_chunk_seconds)
+    del samples
+    chunks = plan_audio_chunks(duration=duration, cut_points=cut_points, overlap_seconds=overlap_seconds)
+    logger.info(f"Transcribing {duration:.1f}s of audio from {audio_path} in {len(chunks)} chunks "
+                f"(max {max_concurrent_requests} concurrent requests)")
+
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+    with tempfile.TemporaryDirectory(prefix="skellysubs_chunks_") as chunks_folder:
+        async def transcribe_chunk(chunk: AudioChunk) -> TranscriptionVerbose:
+            chunk_path = str(Path(chunks_folder) / f"chunk_{chunk.index:04d}.mp3")
+            async with semaphore:
+                await asyncio.to_thread(write_audio_chunk, audio_path, chunk, chunk_path)
+                with open(chunk_path, "rb") as chunk_file:
+                    chunk_transcript = await get_or_create_openai_client().make_whisper_transcription_request(
+                        audio_file=chunk_file,
+                        language=language,
+                        prompt=prompt)
+            logger.debug(f"Transcribed chunk {chunk.index + 1}/{len(chunks)} ({chunk.start:.1f}s - {chunk.end:.1f}s)")
+            return chunk_transcript
+
+        chunk_transcripts = await asyncio.gather(*[transcribe_chunk(chunk) for chunk in chunks])
+
+    return stitch_chunk_transcripts(chunks=chunks, chunk_transcripts=list(chunk_transcripts))
@@ -1,39 +1,95 @@
+import asyncio
 import json
+import logging
+import os
 from pathlib import Path
 
-from moviepy import VideoFileClip
+from openai.types.audio import TranscriptionVerbose
 
-from skellysubs.core.transcription.whisper_audio_transcription import transcribe_audio
+from skellysubs.ai_clients.openai_client import WHISPER_API_MODEL_NAME, get_or_create_openai_client
+from skellysubs.core.transcription.audio_extraction import extract_audio, extract_audio_to_file
+from skellysubs.core.transcription.chunked_transcription import WHISPER_API_MAX_UPLOAD_BYTES, \
+    transcribe_audio_openai_chunked_verbose
+from skellysubs.core.transcription.transcription_cache import get_or_create_transcription_cache, \
+    get_decoded_audio_hash, make_transcription_cache_key
+from skellysubs.core.transcription.whisper_audio_transcription import transcribe_audio, TRANSCRIPTION_BASE_PROMPT
 from skellysubs.core.transcription.whisper_transcript_result_model import WhisperTranscriptionResult
 
+logger = logging.getLogger(__name__)
+
 
 async def get_or_compute_video_transcription(video_path: str,
                                              local_whisper: bool = False,
-                                             re_transcribe: bool = False) -> WhisperTranscriptionResult:
+                                             re_transcribe: bool = False,
+                                             model_name: str = "large",
+                                             skip_silence: bool = False) -> WhisperTranscriptionResult:
+    """
+    Returns the `<video>_transcription.json` sidecar if it was written after the video last changed. Otherwise checks
+    the content-addressed transcription cache (keyed by the decoded audio, not the file path) before transcribing, so
+    renamed or duplicate videos are not re-sent to Whisper - and writes the result to the sidecar.
+    """
     extension = Path(video_path).suffix
-    audio_path = video_path.replace(f"{extension}", ".mp3")
     transcript_path = video_path.replace(f"{extension}", "_transcription.json")
-    if Path(transcript_path).exists() and not re_transcribe:
-        with open(transcript_path, 'r') as f:
-            transcription_json = json.load(f)
-        transcription_result = WhisperTranscriptionResult(**transcription_json)
+    if (not re_transcribe and Path(transcript_path).is_file()
+            and Path(transcript_path).stat().st_mtime_ns >= Path(video_path).stat().st_mtime_ns):
+        logger.debug(f"Using transcription sidecar: {transcript_path}")
+        return WhisperTranscriptionResult(**json.loads(Path(transcript_path).read_text()))
+
+    transcription_cache = get_or_create_transcription_cache()
+    cache_model_name = f"local-whisper-{model_name}" if local_whisper else WHISPER_API_MODEL_NAME
+    if skip_silence:
+        cache_model_name += "+vad"
+    cache_key = make_transcription_cache_key(audio_hash=await asyncio.to_thread(get_decoded_audio_hash, video_path),
+                                             model_name=cache_model_name,
+                                             prompt=TRANSCRIPTION_BASE_PROMPT)
+    cached_transcription = None if re_transcribe else transcription_cache.get(cache_key)
+    if cached_transcription is not None:
+        transcription_result = WhisperTranscriptionResult(**cached_transcription)
+    else:
+        audio_path = await asyncio.to_thread(extract_audio, video_path, "wav" if local_whisper else "ogg")
+        transcription_result = await transcribe_audio(audio_path=audio_path,
+                                                      local_whisper=local_whisper,
+                                                      model_name=model_name,
+                                                      skip_silence=skip_silence)
+        transcription_cache.put(cache_key, transcription_result.model_dump())
+    Path(transcript_path).write_text(json.dumps(transcription_result.model_dump(), indent=4))
+    return transcription_result
+
+
+async def get_or_compute_verbose_transcription(audio_path: str,
+                                               language: str | None = None,
+                                               prompt: str | None = None) -> TranscriptionVerbose:
+    """
+    Whisper API transcription of an audio file, checking the content-addressed transcription cache first - audio over
+    the API's upload limit is split into chunks (see `transcribe_audio_openai_chunked_verbose`)
+    """
+    transcription_cache = get_or_create_transcription_cache()
+    cache_key = make_transcription_cache_key(audio_hash=await asyncio.to_thread(get_decoded_audio_hash, audio_path),
+                                             model_name=WHISPER_API_MODEL_NAME,
+                                             language=language,
+                                             prompt=prompt)
+    cached_transcription = transcription_cache.get(cache_key)
+    if cached_transcription is not None:
+        return TranscriptionVerbose(**cached_transcription)
+
+    if os.path.getsize(audio_path) >= WHISPER_API_MAX_UPLOAD_BYTES:
+        transcription_result = await transcribe_audio_openai_chunked_verbose(audio_path=audio_path,
+                                                                             language=language,
+                                                                             prompt=prompt)
     else:
-        scrape_and_save_audio_from_video(audio_path, video_path)
-        transcription_result = await transcribe_audio(audio_path=audio_path, local_whisper=local_whisper)
-        Path(transcript_path).write_text(json.dumps(transcription_result.model_dump(), indent=4))
+        with open(audio_path, "rb") as audio_file:
+            transcription_result = await get_or_create_openai_client().make_whisper_transcription_request(
+                audio_file=audio_file,
+                language=language,
+                prompt=prompt
+            )
+    transcription_cache.put(cache_key, transcription_result.model_dump())
     return transcription_result
 
 
 def scrape_and_save_audio_from_video(audio_path: str, video_path: str) -> None:
-    if not Path(video_path).exists() or not Path(video_path).is_file():
-        raise FileNotFoundError(f"File not found: {video_path}")
-    video = VideoFileClip(video_path)
-    audio = video.audio
-    Path(audio_path).parent.mkdir(parents=True, exist_ok=True)
-    audio.write_audiofile(audio_path)
+    extract_audio_to_file(source_path=video_path, audio_path=audio_path)
 
 
 if __name__ == "__main__":
-    import asyncio
-
     asyncio.run(get_or_compute_video_transcription(video_path="../sample_data/short_video_short/short_video_short.mp4"))
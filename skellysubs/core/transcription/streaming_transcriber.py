@@ -0,0 +1,181 @@
+import asyncio
+import io
+import logging
+import wave
+
+import numpy as np
+from pydantic import BaseModel
+
+from skellysubs.ai_clients.openai_client import get_or_create_openai_client
+from skellysubs.core.transcription.whisper_model_pool import get_or_create_whisper_model_pool
+from skellysubs.core.transcription.whisper_transcript_result_model import WhisperTranscriptionResult, \
+    WhisperTranscriptSegment
+
+logger = logging.getLogger(__name__)
+
+STREAMING_SAMPLE_RATE = 16_000  # clients push raw 16 kHz mono s16le PCM
+DEFAULT_TRANSCRIBE_EVERY_SECONDS = 2.0
+DEFAULT_STABILITY_MARGIN_SECONDS = 2.0  # segments ending this close to the live edge may still change
+DEFAULT_MAX_WINDOW_SECONDS = 30.0
+PROMPT_CONTEXT_CHARACTERS = 200
+
+
+class StreamingTranscriptionUpdate(BaseModel):
+    """
+    A transcribed segment on the full stream timeline. Partial segments may be revised by later updates, finalized
+    ones never change
+    """
+    is_final: bool
+    segment: WhisperTranscriptSegment
+
+
+def pcm_samples_to_wav_bytes(samples: np.ndarray, sample_rate: int = STREAMING_SAMPLE_RATE) -> bytes:
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(samples.astype(np.int16).tobytes())
+    return wav_buffer.getvalue()
+
+
+class StreamingTranscriber:
+    """
+    Rolling-window transcription of a live PCM stream.
+
+    Every `transcribe_every_seconds` of new audio, the window from the end of the last finalized segment up to the
+    live edge is re-transcribed. Segments that end at least `stability_margin_seconds` before the live edge are
+    finalized (and the window start moves past them); the rest are emitted as partial results. A window that
+    grows past `max_window_seconds` is finalized as a whole, so each request stays bounded.
+    """
+
+    def __init__(self,
+                 local_whisper: bool = False,
+                 model_name: str = "large",
+                 language: str | None = None,
+                 base_prompt: str | None = None,
+                 transcribe_every_seconds: float = DEFAULT_TRANSCRIBE_EVERY_SECONDS,
+                 stability_margin_seconds: float = DEFAULT_STABILITY_MARGIN_SECONDS,
+                 max_window_seconds: float = DEFAULT_MAX_WINDOW_SECONDS):
+        self.local_whisper = local_whisper
+        self.model_name = model_name
+        self.language = language
+        self.base_prompt = base_prompt
+        self.transcribe_every_seconds = transcribe_every_seconds
+        self.stability_margin_seconds = stability_margin_seconds
+        self.max_window_seconds = max_window_seconds
+
+        self._samples = np.zeros(0, dtype=np.int16)  # audio from `_window_start_sample` to the live edge
+        self._window_start_sample = 0
+        self._last_transcribed_sample = 0
+        self._finalized_segments: list[WhisperTranscriptSegment] = []
+        self._finalized_word_count = 0
+        self._pending_byte = b""
+
+    @property
+    def live_edge_seconds(self) -> float:
+        return (self._window_start_sample + len(self._samples)) / STREAMING_SAMPLE_RATE
+
+    @property
+    def finalized_segments(self) -> list[WhisperTranscriptSegment]:
+        return list(self._finalized_segments)
+
+    def add_audio(self, pcm_bytes: bytes) -> None:
+        pcm_bytes = self._pending_byte + pcm_bytes
+        if len(pcm_bytes) % 2:
+            pcm_bytes, self._pending_byte = pcm_bytes[:-1], pcm_bytes[-1:]
+        else:
+            self._pending_byte = b""
+        self._samples = np.concatenate([self._samples, np.frombuffer(pcm_bytes, dtype=np.int16)])
+
+    def should_transcribe(self) -> bool:
+        live_edge_sample = self._window_start_sample + len(self._samples)
+        return live_edge_sample - self._last_transcribed_sample >= self.transcribe_every_seconds * STREAMING_SAMPLE_RATE
+
+    async def transcribe_pending(self, end_of_stream: bool = False) -> list[StreamingTranscriptionUpdate]:
+        """
+        Transcribe the current window - call whenever `should_transcribe()` is True, and once with
+        `end_of_stream=True` after the client stops sending audio to finalize everything that is left
+        """
+        if len(self._samples) == 0:
+            return []
+        # more audio may arrive while the window is being transcribed - only reason about this window's bounds
+        window_samples = self._samples
+        window_start_seconds = self._window_start_sample / STREAMING_SAMPLE_RATE
+        window_end_seconds = self.live_edge_seconds
+        self._last_transcribed_sample = self._window_start_sample + len(window_samples)
+        window_segments = await self._transcribe_window(window_samples, window_start_seconds=window_start_seconds)
+
+        window_is_full = len(window_samples) >= self.max_window_seconds * STREAMING_SAMPLE_RATE
+        stable_until = window_end_seconds - self.stability_margin_seconds
+        updates = []
+        finalized_until = None
+        for segment in window_segments:
+            if finalized_until is None and updates:
+                is_stable = False  # never finalize past an earlier partial segment
+            else:
+                is_stable = segment.end <= stable_until
+            if end_of_stream or window_is_full or is_stable:
+                updates.append(StreamingTranscriptionUpdate(is_final=True, segment=self._finalize(segment)))
+                finalized_until = segment.end
+            else:
+                updates.append(StreamingTranscriptionUpdate(is_final=False, segment=segment))
+
+        if end_of_stream or window_is_full:
+            self._drop_samples_before(window_end_seconds)
+        elif finalized_until is not None:
+            self._drop_samples_before(finalized_until)
+        return updates
+
+    def _finalize(self, segment: WhisperTranscriptSegment) -> WhisperTranscriptSegment:
+        words = None
+        if segment.words:
+            words = [word.model_copy(update={"index_in_transcript": self._finalized_word_count + word_number})
+                     for word_number, word in enumerate(segment.words)]
+            self._finalized_word_count += len(words)
+        finalized_segment = segment.model_copy(update={"id": len(self._finalized_segments), "words": words})
+        self._finalized_segments.append(finalized_segment)
+        return finalized_segment
+
+    def _drop_samples_before(self, timestamp: float) -> None:
+        drop_count = min(max(int(timestamp * STREAMING_SAMPLE_RATE) - self._window_start_sample, 0),
+                         len(self._samples))
+        self._samples = self._samples[drop_count:]
+        self._window_start_sample += drop_count
+
+    def _get_prompt(self) -> str | None:
+        """
+        Condition each window on the tail of the finalized text, so wording stays consistent across windows
+        """
+        previous_text = "".join(segment.text for segment in self._finalized_segments)[-PROMPT_CONTEXT_CHARACTERS:]
+        prompt = " ".join(part for part in (self.base_prompt, previous_text.strip()) if part)
+        return prompt or None
+
+    async def _transcribe_window(self,
+                                 samples: np.ndarray,
+                                 window_start_seconds: float) -> list[WhisperTranscriptSegment]:
+        if self.local_whisper:
+            window_result = await asyncio.to_thread(self._transcribe_window_with_local_whisper, samples.copy())
+        else:
+            verbose_transcript = await get_or_create_openai_client().make_whisper_transcription_request(
+                audio_file=("window.wav", pcm_samples_to_wav_bytes(samples)),
+                language=self.language,
+                prompt=self._get_prompt())
+            window_result = WhisperTranscriptionResult.from_verbose_transcript(verbose_transcript)
+
+        return [segment.model_copy(update={
+            "start": segment.start + window_start_seconds,
+            "end": segment.end + window_start_seconds,
+            "words": [word.model_copy(update={"start": word.start + window_start_seconds,
+                                              "end": word.end + window_start_seconds})
+                      for word in segment.words] if segment.words else None,
+        }) for segment in window_result.segments]
+
+    def _transcribe_window_with_local_whisper(self, samples: np.ndarray) -> WhisperTranscriptionResult:
+        with get_or_create_whisper_model_pool().use_model(self.model_name) as model:
+            result = model.transcribe(audio=samples.astype(np.float32) / 32768.0,
+                                      word_timestamps=True,
+                                      temperature=0.0,
+                                      language=self.language,
+                                      initial_prompt=self._get_prompt())
+        return WhisperTranscriptionResult(**result)
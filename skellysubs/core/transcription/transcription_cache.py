@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from skellysubs.core.transcription.audio_extraction import open_pcm_audio_pipe, TRANSCRIPTION_SAMPLE_RATE
+from skellysubs.system.files_and_folder_names import get_skellysubs_data_folder_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSCRIPTION_CACHE_MAX_SIZE_BYTES = 512 * 1024 ** 2
+AUDIO_HASH_SAMPLE_RATE = TRANSCRIPTION_SAMPLE_RATE
+AUDIO_HASH_READ_CHUNK_BYTES = 1024 ** 2
+AUDIO_HASH_MEMO_SIZE = 1024
+
+
+def hash_decoded_audio(media_path: str) -> str:
+    """
+    SHA-256 of the decoded audio stream (16 kHz mono s16le, streamed through an ffmpeg pipe).
+
+    Hashing the decoded samples rather than the file bytes means the same recording hits the cache even if it was
+    renamed, re-uploaded, or re-muxed into a different container.
+    """
+    process = open_pcm_audio_pipe(source_path=media_path, sample_rate=AUDIO_HASH_SAMPLE_RATE)
+    audio_hash = hashlib.sha256()
+    try:
+        while chunk := process.stdout.read(AUDIO_HASH_READ_CHUNK_BYTES):
+            audio_hash.update(chunk)
+    finally:
+        process.stdout.close()
+        _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise ValueError(f"ffmpeg could not decode audio from {media_path}: {stderr.decode(errors='replace')[-500:]}")
+    return audio_hash.hexdigest()
+
+
+@lru_cache(maxsize=AUDIO_HASH_MEMO_SIZE)
+def _hash_decoded_audio_memoized(resolved_path: str, file_size: int, mtime_ns: int) -> str:
+    return hash_decoded_audio(resolved_path)
+
+
+def get_decoded_audio_hash(media_path: str) -> str:
+    """
+    `hash_decoded_audio`, memoized by (path, size, mtime) - a file that hasn't changed is only decoded once per process
+    """
+    media_stat = os.stat(media_path)
+    return _hash_decoded_audio_memoized(str(Path(media_path).resolve()), media_stat.st_size, media_stat.st_mtime_ns)
+
+
+def make_transcription_cache_key(audio_hash: str,
+                                 model_name: str,
+                                 language: str | None = None,
+                                 prompt: str | None = None) -> str:
+    key_data = json.dumps({"audio_hash": audio_hash,
+                           "model_name": model_name,
+                           "language": language,
+                           "prompt": prompt}, sort_keys=True)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+
+class TranscriptionCache:
+    """
+    Content-addressed on-disk store of transcription results (one JSON file per key), bounded by total size.
+
+    Recency is tracked with each file's mtime (refreshed on every hit), and the least recently used entries are
+    evicted whenever a write pushes the store over `max_size_bytes`.
+    """
+
+    def __init__(self, cache_folder: str | Path, max_size_bytes: int = DEFAULT_TRANSCRIPTION_CACHE_MAX_SIZE_BYTES):
+        self.cache_folder = Path(cache_folder)
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+
+    def _entry_path(self, cache_key: str) -> Path:
+        return self.cache_folder / f"{cache_key}.json"
+
+    def get(self, cache_key: str) -> dict[str, Any] | None:
+        entry_path = self._entry_path(cache_key)
+        with self._lock:
+            try:
+                data = json.loads(entry_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                return None
+            except json.JSONDecodeError:
+                logger.warning(f"Discarding corrupt transcription cache entry: {entry_path}")
+                entry_path.unlink(missing_ok=True)
+                return None
+            os.utime(entry_path)
+        logger.info(f"Transcription cache hit: {cache_key[:12]}")
+        return data
+
+    def put(self, cache_key: str, data: dict[str, Any]) -> None:
+        entry_path = self._entry_path(cache_key)
+        temporary_path = entry_path.with_suffix(".tmp")
+        with self._lock:
+            temporary_path.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(temporary_path, entry_path)
+            self._evict_least_recently_used()
+
+    def _evict_least_recently_used(self) -> None:
+        entries = [(entry.stat(), entry) for entry in self.cache_folder.glob("*.json")]
+        total_size = sum(entry_stat.st_size for entry_stat, _ in entries)
+        for entry_stat, entry in sorted(entries, key=lambda item: item[0].st_mtime_ns):
+            if total_size <= self.max_size_bytes:
+                break
+            logger.debug(f"Evicting transcription cache entry: {entry.name}")
+            entry.unlink(missing_ok=True)
+            total_size -= entry_stat.st_size
+
+
+_TRANSCRIPTION_CACHE: TranscriptionCache | None = None
+
+
+def get_or_create_transcription_cache() -> TranscriptionCache:
+    global _TRANSCRIPTION_CACHE
+    if _TRANSCRIPTION_CACHE is None:
+        _TRANSCRIPTION_CACHE = TranscriptionCache(
+            cache_folder=Path(get_skellysubs_data_folder_path()) / "transcription_cache")
+    return _TRANSCRIPTION_CACHE
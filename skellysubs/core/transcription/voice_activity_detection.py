@@ -0,0 +1,147 @@
+import logging
+from dataclasses import dataclass
+
+import ffmpeg
+import numpy as np
+
+from skellysubs.core.transcription.audio_extraction import TRANSCRIPTION_SAMPLE_RATE
+from skellysubs.core.transcription.chunked_transcription import get_frame_energies
+from skellysubs.core.transcription.whisper_transcript_result_model import WhisperTranscriptionResult
+
+logger = logging.getLogger(__name__)
+
+VAD_FRAME_SECONDS = 0.03
+VAD_NOISE_FLOOR_PERCENTILE = 10
+VAD_THRESHOLD_ABOVE_NOISE_FLOOR_DB = 12.0
+VAD_MIN_THRESHOLD_DBFS = -50.0
+DEFAULT_MIN_SILENCE_SECONDS = 1.0  # shorter pauses are kept, so whisper still hears natural phrasing
+DEFAULT_MIN_SPEECH_SECONDS = 0.2
+DEFAULT_SPEECH_PADDING_SECONDS = 0.3
+INT16_FULL_SCALE = 32768.0
+
+
+@dataclass(frozen=True)
+class VoiceActivityResult:
+    """
+    The speech spans of a recording (seconds on the original timeline), and how to map timestamps on the
+    speech-only audio back onto the original timeline
+    """
+    speech_spans: tuple[tuple[float, float], ...]
+    original_duration: float
+
+    @property
+    def speech_duration(self) -> float:
+        return sum(end - start for start, end in self.speech_spans)
+
+    @property
+    def skipped_duration(self) -> float:
+        return self.original_duration - self.speech_duration
+
+    def __str__(self) -> str:
+        skipped_percent = 100 * self.skipped_duration / self.original_duration if self.original_duration else 0.0
+        return (f"{len(self.speech_spans)} speech spans, kept {self.speech_duration:.1f}s, "
+                f"skipped {self.skipped_duration:.1f}s of {self.original_duration:.1f}s ({skipped_percent:.0f}%)")
+
+    def to_original_timestamps(self, speech_only_timestamps: np.ndarray) -> np.ndarray:
+        """
+        Map timestamps on the concatenated speech-only audio back to the original recording
+        """
+        if not self.speech_spans:
+            return np.asarray(speech_only_timestamps, dtype=float)
+        span_starts = np.array([start for start, _ in self.speech_spans])
+        span_durations = np.array([end - start for start, end in self.speech_spans])
+        compacted_span_starts = np.concatenate(([0.0], np.cumsum(span_durations)[:-1]))
+        span_indices = np.clip(np.searchsorted(compacted_span_starts, speech_only_timestamps, side="right") - 1,
+                               0, len(span_starts) - 1)
+        return span_starts[span_indices] + (np.asarray(speech_only_timestamps) - compacted_span_starts[span_indices])
+
+
+def detect_speech_spans(samples: np.ndarray,
+                        sample_rate: int = TRANSCRIPTION_SAMPLE_RATE,
+                        min_silence_seconds: float = DEFAULT_MIN_SILENCE_SECONDS,
+                        min_speech_seconds: float = DEFAULT_MIN_SPEECH_SECONDS,
+                        padding_seconds: float = DEFAULT_SPEECH_PADDING_SECONDS) -> VoiceActivityResult:
+    """
+    Energy-based voice activity detection - a frame is speech if it is well above the recording's own noise floor.
+
+    Pauses shorter than `min_silence_seconds` are bridged, blips shorter than `min_speech_seconds` are dropped, and
+    every span is padded so word onsets/endings aren't clipped.
+    """
+    duration = len(samples) / sample_rate
+    frame_energies = get_frame_energies(samples=samples, sample_rate=sample_rate, frame_seconds=VAD_FRAME_SECONDS)
+    if frame_energies.size == 0:
+        return VoiceActivityResult(speech_spans=(), original_duration=duration)
+
+    frame_dbfs = 20 * np.log10(np.maximum(frame_energies, 1.0) / INT16_FULL_SCALE)
+    noise_floor_dbfs = np.percentile(frame_dbfs, VAD_NOISE_FLOOR_PERCENTILE)
+    threshold_dbfs = max(noise_floor_dbfs + VAD_THRESHOLD_ABOVE_NOISE_FLOOR_DB, VAD_MIN_THRESHOLD_DBFS)
+    is_speech = frame_dbfs > threshold_dbfs
+
+    # run boundaries of the speech mask -> [start_frame, end_frame) spans
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    span_start_frames = np.flatnonzero(edges == 1)
+    span_end_frames = np.flatnonzero(edges == -1)
+
+    spans: list[list[float]] = []
+    for start_frame, end_frame in zip(span_start_frames, span_end_frames):
+        start, end = float(start_frame * VAD_FRAME_SECONDS), float(end_frame * VAD_FRAME_SECONDS)
+        if spans and start - spans[-1][1] < min_silence_seconds:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+
+    padded_spans: list[tuple[float, float]] = []
+    for start, end in spans:
+        if end - start < min_speech_seconds:
+            continue
+        start, end = max(start - padding_seconds, 0.0), min(end + padding_seconds, duration)
+        if padded_spans and start <= padded_spans[-1][1]:
+            padded_spans[-1] = (padded_spans[-1][0], end)
+        else:
+            padded_spans.append((start, end))
+    return VoiceActivityResult(speech_spans=tuple(padded_spans), original_duration=duration)
+
+
+def get_speech_only_samples(samples: np.ndarray,
+                            voice_activity: VoiceActivityResult,
+                            sample_rate: int = TRANSCRIPTION_SAMPLE_RATE) -> np.ndarray:
+    if not voice_activity.speech_spans:
+        return samples[:0]
+    return np.concatenate([samples[int(start * sample_rate):int(end * sample_rate)]
+                           for start, end in voice_activity.speech_spans])
+
+
+def write_pcm_samples_to_file(samples: np.ndarray,
+                              audio_path: str,
+                              sample_rate: int = TRANSCRIPTION_SAMPLE_RATE) -> None:
+    """
+    Encode in-memory int16 samples to an audio file (format from the extension) by piping them into ffmpeg
+    """
+    (
+        ffmpeg
+        .input('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+        .output(audio_path, ac=1, ar=sample_rate)
+        .global_args('-loglevel', 'error', '-nostats')
+        .overwrite_output()
+        .run(input=samples.astype(np.int16).tobytes(), capture_stdout=True, capture_stderr=True)
+    )
+
+
+def remap_transcription_timestamps(transcription_result: WhisperTranscriptionResult,
+                                   voice_activity: VoiceActivityResult) -> WhisperTranscriptionResult:
+    """
+    Move every segment/word timestamp from the speech-only timeline back to the original recording's timeline
+    """
+    remapped_segments = []
+    for segment in transcription_result.segments:
+        segment_start, segment_end = voice_activity.to_original_timestamps(np.array([segment.start, segment.end]))
+        remapped_words = None
+        if segment.words:
+            word_times = voice_activity.to_original_timestamps(
+                np.array([[word.start, word.end] for word in segment.words]).ravel()).reshape(-1, 2)
+            remapped_words = [word.model_copy(update={"start": float(start), "end": float(end)})
+                              for word, (start, end) in zip(segment.words, word_times)]
+        remapped_segments.append(segment.model_copy(update={"start": float(segment_start),
+                                                            "end": float(segment_end),
+                                                            "words": remapped_words}))
+    return transcription_result.model_copy(update={"segments": remapped_segments})
@@ -1,9 +1,16 @@
+import asyncio
 import logging
+import tempfile
 from pathlib import Path
 
 import cv2
 
 from skellysubs.ai_clients.openai_client import get_or_create_openai_client
+from skellysubs.core.transcription.audio_extraction import extract_audio_samples
+from skellysubs.core.transcription.chunked_transcription import transcribe_audio_openai_chunked
+from skellysubs.core.transcription.voice_activity_detection import detect_speech_spans, get_speech_only_samples, \
+    write_pcm_samples_to_file, remap_transcription_timestamps
+from skellysubs.core.transcription.whisper_model_pool import get_or_create_whisper_model_pool
 from skellysubs.core.transcription.whisper_transcript_result_model import WhisperTranscriptionResult
 
 logging.basicConfig(level=logging.DEBUG)
@@ -23,15 +30,58 @@ def validate_audio_path(audio_path: str) -> None:
 
 async def transcribe_audio(audio_path: str,
                            local_whisper: bool = False,
-                           model_name: str = "large") -> WhisperTranscriptionResult:
+                           model_name: str = "large",
+                           chunked: bool = False,
+                           skip_silence: bool = False) -> WhisperTranscriptionResult:
+    if skip_silence:
+        return await transcribe_audio_speech_only(audio_path=audio_path,
+                                                  local_whisper=local_whisper,
+                                                  model_name=model_name,
+                                                  chunked=chunked)
     if local_whisper:
-        return transcribe_audio_with_local_whisper(audio_path, model_name)
+        # local whisper is CPU/GPU bound - run it in a worker thread so it doesn't block the event loop
+        return await asyncio.to_thread(transcribe_audio_with_local_whisper, audio_path, model_name)
     else:
-        return await transcribe_audio_openai(audio_path)
+        return await transcribe_audio_openai(audio_path, chunked=chunked)
 
 
-async def transcribe_audio_openai(audio_path: str) -> WhisperTranscriptionResult:
+async def transcribe_audio_speech_only(audio_path: str,
+                                      local_whisper: bool = False,
+                                      model_name: str = "large",
+                                      chunked: bool = False) -> WhisperTranscriptionResult:
+    """
+    Voice-activity-detection pre-pass: drop the non-speech spans, transcribe only the speech, and map the
+    timestamps back onto the original recording's timeline
+    """
     validate_audio_path(audio_path)
+    samples = await asyncio.to_thread(extract_audio_samples, audio_path)
+    voice_activity = await asyncio.to_thread(detect_speech_spans, samples)
+    logger.info(f"Voice activity detection for {audio_path}: {voice_activity}")
+    if not voice_activity.speech_spans:
+        return WhisperTranscriptionResult(text="", segments=[], language="")
+
+    with tempfile.TemporaryDirectory(prefix="skellysubs_vad_") as temporary_folder:
+        speech_only_audio_path = str(Path(temporary_folder) / ("speech_only.wav" if local_whisper
+                                                               else "speech_only.ogg"))
+        await asyncio.to_thread(write_pcm_samples_to_file,
+                                get_speech_only_samples(samples=samples, voice_activity=voice_activity),
+                                speech_only_audio_path)
+        del samples
+        transcription_result = await transcribe_audio(audio_path=speech_only_audio_path,
+                                                      local_whisper=local_whisper,
+                                                      model_name=model_name,
+                                                      chunked=chunked)
+    return remap_transcription_timestamps(transcription_result=transcription_result, voice_activity=voice_activity)
+
+
+async def transcribe_audio_openai(audio_path: str, chunked: bool = False) -> WhisperTranscriptionResult:
+    """
+    If `chunked` is True, long audio is split into overlapping chunks that are transcribed concurrently
+    (see `transcribe_audio_openai_chunked`)
+    """
+    validate_audio_path(audio_path)
+    if chunked:
+        return await transcribe_audio_openai_chunked(audio_path=audio_path, prompt=TRANSCRIPTION_BASE_PROMPT)
     audio_file = open(audio_path, "rb")
     result = await get_or_create_openai_client().make_whisper_transcription_request(audio_file=audio_file,
                                                                                     prompt=TRANSCRIPTION_BASE_PROMPT)
@@ -39,20 +89,19 @@ async def transcribe_audio_openai(audio_path: str) -> WhisperTranscriptionResult
 
 
 def transcribe_audio_with_local_whisper(audio_path: str, model_name: str = "large") -> WhisperTranscriptionResult:
-    import whisper
     import torch
     logger.info(
         f"Transcribing audio: {audio_path} with whisper model: {model_name} - import torch; torch.cuda_is_available(): {torch.cuda.is_available()}")
 
     validate_audio_path(audio_path)
-    model = whisper.load_model(model_name)
-    result = model.transcribe(audio=audio_path,
-                              word_timestamps=True,
-                              temperature=0.0,
-                              no_speech_threshold=0.5,
-                              hallucination_silence_threshold=0.5,
-                              initial_prompt=TRANSCRIPTION_BASE_PROMPT,
-                              )
+    with get_or_create_whisper_model_pool().use_model(model_name) as model:
+        result = model.transcribe(audio=audio_path,
+                                  word_timestamps=True,
+                                  temperature=0.0,
+                                  no_speech_threshold=0.5,
+                                  hallucination_silence_threshold=0.5,
+                                  initial_prompt=TRANSCRIPTION_BASE_PROMPT,
+                                  )
     return WhisperTranscriptionResult(**result)
 
 
@@ -61,24 +110,23 @@ def transcribe_audio_detailed(audio_path: str,
                               ):
     import whisper
 
-    model = whisper.load_model(model_name)
-
     # validate/load audio and pad/trim it to fit 30 seconds
     validate_audio_path(audio_path)
     audio = whisper.load_audio(audio_path)
     audio = whisper.pad_or_trim(audio)
 
-    # make log-Mel spectrogram and move to the same device as the model
-    mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
-    save_spectrogram_image(audio_path, mel)
-    # detect the spoken language
-    _, probs = model.detect_language(mel)
-    print(f"Detected language: {max(probs, key=probs.get)}")
-
-    # decode (transcribe) the audio
-    transcription_result = whisper.decode(model=model,
-                                          mel=mel,
-                                          options=whisper.DecodingOptions())
+    with get_or_create_whisper_model_pool().use_model(model_name) as model:
+        # make log-Mel spectrogram and move to the same device as the model
+        mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+        save_spectrogram_image(audio_path, mel)
+        # detect the spoken language
+        _, probs = model.detect_language(mel)
+        print(f"Detected language: {max(probs, key=probs.get)}")
+
+        # decode (transcribe) the audio
+        transcription_result = whisper.decode(model=model,
+                                              mel=mel,
+                                              options=whisper.DecodingOptions())
 
     # print the recognized text
     print(transcription_result.text)
@@ -0,0 +1,96 @@
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_LOADED_WHISPER_MODELS = 2
+
+WhisperModelKey = tuple[str, str]  # (model_name, device)
+
+
+def get_default_whisper_device() -> str:
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+class WhisperModelPool:
+    """
+    Keeps loaded local whisper models resident, keyed by (model name, device), so `whisper.load_model` (seconds of
+    disk I/O and gigabytes of allocation for "large") happens once per process instead of once per request.
+
+    At most `max_loaded_models` are kept - the least recently used one is dropped when another has to be loaded.
+    A whisper model is not safe to run from several threads at once, so each model is checked out under its own
+    lock with `use_model`.
+    """
+
+    def __init__(self, max_loaded_models: int = DEFAULT_MAX_LOADED_WHISPER_MODELS):
+        self.max_loaded_models = max_loaded_models
+        self._models: OrderedDict[WhisperModelKey, Any] = OrderedDict()
+        self._model_locks: dict[WhisperModelKey, threading.Lock] = {}
+        self._pool_lock = threading.Lock()
+
+    def _get_model_lock(self, model_key: WhisperModelKey) -> threading.Lock:
+        with self._pool_lock:
+            return self._model_locks.setdefault(model_key, threading.Lock())
+
+    def _get_or_load_model(self, model_key: WhisperModelKey):
+        with self._pool_lock:
+            if model_key in self._models:
+                self._models.move_to_end(model_key)
+                return self._models[model_key]
+
+        import whisper
+        model_name, device = model_key
+        logger.info(f"Loading whisper model `{model_name}` on device `{device}`...")
+        model = whisper.load_model(model_name, device=device)
+
+        with self._pool_lock:
+            self._models[model_key] = model
+            while len(self._models) > self.max_loaded_models:
+                evicted_key, _ = self._models.popitem(last=False)
+                logger.info(f"Unloading least recently used whisper model: {evicted_key}")
+                if evicted_key[1].startswith("cuda"):
+                    import torch
+                    torch.cuda.empty_cache()
+        return model
+
+    @contextmanager
+    def use_model(self, model_name: str, device: str | None = None) -> Iterator[Any]:
+        """
+        Check out a loaded model for exclusive use, loading it first if it isn't resident yet
+        """
+        model_key = (model_name, device or get_default_whisper_device())
+        with self._get_model_lock(model_key):
+            yield self._get_or_load_model(model_key)
+
+    def warmup(self, model_name: str, device: str | None = None) -> threading.Thread:
+        """
+        Load a model in a background thread, so the first real request doesn't pay for it
+        """
+        model_key = (model_name, device or get_default_whisper_device())
+
+        def load() -> None:
+            with self._get_model_lock(model_key):
+                self._get_or_load_model(model_key)
+
+        warmup_thread = threading.Thread(target=load, name=f"WhisperWarmup-{model_name}", daemon=True)
+        warmup_thread.start()
+        return warmup_thread
+
+    @property
+    def loaded_models(self) -> list[WhisperModelKey]:
+        with self._pool_lock:
+            return list(self._models.keys())
+
+
+_WHISPER_MODEL_POOL: WhisperModelPool | None = None
+
+
+def get_or_create_whisper_model_pool() -> WhisperModelPool:
+    global _WHISPER_MODEL_POOL
+    if _WHISPER_MODEL_POOL is None:
+        _WHISPER_MODEL_POOL = WhisperModelPool()
+    return _WHISPER_MODEL_POOL
@@ -1,3 +1,4 @@
+import numpy as np
 from openai.types.audio import TranscriptionVerbose
 from pydantic import BaseModel
 
@@ -32,35 +33,49 @@ class WhisperTranscriptionResult(BaseModel):
 
     @classmethod
     def from_verbose_transcript(cls, verbose_transcript: TranscriptionVerbose):
-        segments = []
-        transcript_word_index = -1
-        for segment_index, segment in enumerate(verbose_transcript.segments):
-            words_in_this_segment = []
-            segment_word_index = 0
-            while verbose_transcript.words[0].start >= segment.start and verbose_transcript.words[0].end <= segment.end:
-                word = verbose_transcript.words.pop(0)
-                transcript_word_index += 1
-                segment_word_index += 1
-                words_in_this_segment.append(WhisperWordTimestamp(**word.model_dump(),
-                                                                  index_in_segment=segment_word_index,
-                                                                  index_in_transcript=transcript_word_index))
+        """
+        Assign each word to a segment in one vectorized pass (the input transcript is not modified).
 
-                if not verbose_transcript.words:
-                    break
-            whisper_segment = WhisperTranscriptSegment(
-                id=segment_index,
-                seek=segment.seek,
-                start=segment.start,
-                end=segment.end,
-                text=segment.text,
-                tokens=segment.tokens,
-                temperature=segment.temperature,
-                avg_logprob=segment.avg_logprob,
-                compression_ratio=segment.compression_ratio,
-                no_speech_prob=segment.no_speech_prob,
-                words=words_in_this_segment if words_in_this_segment else None
-            )
-            segments.append(whisper_segment)
+        A word belongs to the last segment that starts at or before the word's midpoint, so words that straddle
+        a segment boundary (or fall in a gap between segments) land deterministically in exactly one segment.
+        """
+        verbose_segments = verbose_transcript.segments or []
+        verbose_words = verbose_transcript.words or []
+
+        words_by_segment: list[list[WhisperWordTimestamp]] = [[] for _ in verbose_segments]
+        if verbose_segments and verbose_words:
+            # running max guards against slightly out-of-order timestamps so `searchsorted` stays valid
+            segment_starts = np.maximum.accumulate(np.array([segment.start for segment in verbose_segments]))
+            word_starts = np.array([word.start for word in verbose_words])
+            word_ends = np.array([word.end for word in verbose_words])
+            word_midpoints = (word_starts + word_ends) / 2
+            word_segment_indices = np.searchsorted(segment_starts, word_midpoints, side="right") - 1
+            word_segment_indices = np.maximum.accumulate(np.clip(word_segment_indices, 0, len(verbose_segments) - 1))
+            first_word_of_segment = np.searchsorted(word_segment_indices, word_segment_indices, side="left")
+            indices_in_segment = np.arange(len(verbose_words)) - first_word_of_segment + 1
+
+            for transcript_word_index, (word, segment_index, index_in_segment) in enumerate(
+                    zip(verbose_words, word_segment_indices.tolist(), indices_in_segment.tolist())):
+                words_by_segment[segment_index].append(
+                    WhisperWordTimestamp.model_construct(start=word.start,
+                                                         end=word.end,
+                                                         word=word.word,
+                                                         index_in_segment=index_in_segment,
+                                                         index_in_transcript=transcript_word_index,
+                                                         probability=None))
+
+        segments = [WhisperTranscriptSegment(id=segment_index,
+                                             seek=segment.seek,
+                                             start=segment.start,
+                                             end=segment.end,
+                                             text=segment.text,
+                                             tokens=segment.tokens,
+                                             temperature=segment.temperature,
+                                             avg_logprob=segment.avg_logprob,
+                                             compression_ratio=segment.compression_ratio,
+                                             no_speech_prob=segment.no_speech_prob,
+                                             words=segment_words if segment_words else None)
+                    for segment_index, (segment, segment_words) in enumerate(zip(verbose_segments, words_by_segment))]
         return cls(
             text=verbose_transcript.text,
             segments=segments,
@@ -1,8 +1,12 @@
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Mapping
 
-import yaml
 from PIL import ImageFont
 
+from skellysubs.core.translation.language_configs.config_registry import get_cached_config
+from skellysubs.core.translation.language_configs.language_configs import DEFAULT_LANGUAGE_CONFIGS_YAML_PATH
 from skellysubs.core.translation.models.translation_typehints import LanguageNameString
 from skellysubs.utilities.frozen_model import FrozenModel
 
@@ -15,6 +19,44 @@ if not DEFAULT_FONT_PATH.exists():
     raise ValueError(f"Default font path `{DEFAULT_FONT_PATH}` does not exist")
 
 DEFAULT_FONT_SIZE_RATIO = 0.018
+TEXT_METRICS_CACHE_SIZE = 2 ** 16
+
+
+@lru_cache(maxsize=None)
+def load_font(font_path: str, font_size: int) -> ImageFont.FreeTypeFont:
+    """
+    Process-wide font cache - parsing a TrueType file is expensive, so each (font file, pixel size) is loaded once
+    """
+    return ImageFont.truetype(font_path, font_size)
+
+
+@lru_cache(maxsize=None)
+def get_validated_font_path(font_file: str) -> str:
+    font_path = Path(FONT_BASE_PATH) / font_file
+    if not font_path.exists():
+        raise ValueError(f"Font definition file not found at: {font_path}")
+    if not font_path.is_file():
+        raise ValueError(f"Font definition path is not a file: {font_path}")
+    if not font_path.suffix.lower() in ['.ttf', '.otf']:
+        raise ValueError(
+            f"Font file `{font_path}` is not a valid font file - suffix must be .ttf or .otf, received: {font_path.suffix}")
+    return str(font_path)
+
+
+@lru_cache(maxsize=TEXT_METRICS_CACHE_SIZE)
+def get_text_bbox(font: ImageFont.FreeTypeFont, text: str) -> tuple[int, int, int, int]:
+    """
+    Cached `font.getbbox(text)` - keyed on font identity, which is stable because fonts come from `load_font`
+    """
+    return font.getbbox(text)
+
+
+@lru_cache(maxsize=TEXT_METRICS_CACHE_SIZE)
+def get_text_length(font: ImageFont.FreeTypeFont, text: str) -> float:
+    """
+    Cached `font.getlength(text)`
+    """
+    return font.getlength(text)
 
 
 def get_default_text_height(image_height: int) -> int:
@@ -22,7 +64,7 @@ def get_default_text_height(image_height: int) -> int:
 
 
 def get_default_font(image_height: int) -> ImageFont:
-    return ImageFont.truetype(str(DEFAULT_FONT_PATH), get_default_text_height(image_height))
+    return load_font(str(DEFAULT_FONT_PATH), get_default_text_height(image_height))
 
 
 class LanguageAnnotationConfig(FrozenModel):
@@ -35,26 +77,14 @@ class LanguageAnnotationConfig(FrozenModel):
         return int(self.font_size_ratio * DEFAULT_FONT_SIZE_RATIO * image_height)
 
     def get_font(self, image_height: int) -> ImageFont:
-        font_path = Path(FONT_BASE_PATH) / self.font_file
-        if not font_path.exists():
-            raise ValueError(f"Font definition file not found at: {font_path}")
-        if not font_path.is_file():
-            raise ValueError(f"Font definition path is not a file: {font_path}")
-        if not font_path.suffix.lower() in ['.ttf', '.otf']:
-            raise ValueError(
-                f"Font file `{font_path}` is not a valid font file - suffix must be .ttf or .otf, received: {font_path.suffix}")
-        return ImageFont.truetype(str(font_path), self.get_font_size(image_height))
-
-
-def get_annotation_configs(yaml_path: str | None = None) -> dict[LanguageNameString, LanguageAnnotationConfig]:
-    if not yaml_path:
-        yaml_path = Path(__file__).parent / 'language_configs.yaml'
-    with open(yaml_path, 'r', encoding="utf-8") as file:
-        config_data = yaml.safe_load(file)
-        language_configs = {name.lower(): LanguageAnnotationConfig(**config) for name, config in
-                            config_data['language_configs'].items()}
-        annotation_configs = {name.lower(): LanguageAnnotationConfig(**config) for name, config in
-                              config_data['annotation_configs'].items()}
+        return load_font(get_validated_font_path(self.font_file), self.get_font_size(image_height))
+
+
+def _build_annotation_configs(config_data: dict) -> dict[LanguageNameString, LanguageAnnotationConfig]:
+    language_configs = {name.lower(): LanguageAnnotationConfig(**config) for name, config in
+                        config_data['language_configs'].items()}
+    annotation_configs = {name.lower(): LanguageAnnotationConfig(**config) for name, config in
+                          config_data['annotation_configs'].items()}
     if not language_configs or not annotation_configs:
         raise ValueError("No language configs found in the yaml file")
     if not language_configs.keys() == annotation_configs.keys():
@@ -62,6 +92,43 @@ def get_annotation_configs(yaml_path: str | None = None) -> dict[LanguageNameStr
     return annotation_configs
 
 
+def get_annotation_configs(yaml_path: str | None = None) -> Mapping[LanguageNameString, LanguageAnnotationConfig]:
+    """
+    Cached - the yaml is only re-parsed when the file changes on disk (see `get_cached_config`)
+    """
+    if not yaml_path:
+        yaml_path = DEFAULT_LANGUAGE_CONFIGS_YAML_PATH
+    return get_cached_config(yaml_path, _build_annotation_configs)
+
+
+@dataclass(frozen=True)
+class LanguageRenderSettings:
+    """
+    Everything needed to draw one language's subtitles at a given frame height, resolved once up front
+    """
+    language_name: LanguageNameString
+    right_to_left: bool
+    font: ImageFont.FreeTypeFont
+    romanization_font: ImageFont.FreeTypeFont
+    color: tuple[int, int, int]
+    text_height: int
+
+
+@lru_cache(maxsize=None)
+def get_config_render_settings(language_name: LanguageNameString,
+                               config: LanguageAnnotationConfig,
+                               image_height: int) -> LanguageRenderSettings:
+    """
+    The render settings for one language's annotation config at a given frame height - cached per (config, height)
+    """
+    return LanguageRenderSettings(language_name=language_name,
+                                  right_to_left="arabic" in language_name.lower(),
+                                  font=config.get_font(image_height=image_height),
+                                  romanization_font=get_default_font(image_height=image_height),
+                                  color=config.color,
+                                  text_height=get_default_text_height(image_height=image_height))
+
+
 if __name__ == "__main__":
     import json
 
@@ -0,0 +1,66 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Hashable, TypeVar
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+BuiltConfig = TypeVar("BuiltConfig")
+
+
+@dataclass(frozen=True)
+class _ParsedYamlFile:
+    file_version: tuple[int, int]  # (mtime_ns, size)
+    data: Any
+
+
+_PARSED_YAML_FILES: dict[str, _ParsedYamlFile] = {}
+_BUILT_CONFIGS: dict[tuple[str, Callable, tuple], Any] = {}
+_REGISTRY_LOCK = threading.RLock()
+
+
+def get_cached_config(yaml_path: str | Path,
+                      build_config: Callable[..., BuiltConfig],
+                      *build_args: Hashable) -> BuiltConfig:
+    """
+    Parse `yaml_path` once and cache the result of `build_config(parsed_yaml, *build_args)`.
+
+    Each call only costs a `stat` of the file - the yaml is re-parsed (and every config built from it is rebuilt)
+    only when the file's mtime or size changes. `build_args` are part of the cache key alongside `build_config`.
+
+    Every caller shares the cached object, so a built dict is returned as a read-only `MappingProxyType` view - copy
+    it before changing it.
+    """
+    resolved_path = str(Path(yaml_path).resolve())
+    file_stat = os.stat(resolved_path)
+    file_version = (file_stat.st_mtime_ns, file_stat.st_size)
+
+    with _REGISTRY_LOCK:
+        parsed_file = _PARSED_YAML_FILES.get(resolved_path)
+        if parsed_file is None or parsed_file.file_version != file_version:
+            if parsed_file is not None:
+                logger.info(f"Config file changed on disk, reloading: {resolved_path}")
+            with open(resolved_path, 'r', encoding="utf-8") as file:
+                parsed_file = _ParsedYamlFile(file_version=file_version, data=yaml.safe_load(file))
+            _PARSED_YAML_FILES[resolved_path] = parsed_file
+            for stale_key in [key for key in _BUILT_CONFIGS if key[0] == resolved_path]:
+                del _BUILT_CONFIGS[stale_key]
+
+        registry_key = (resolved_path, build_config, build_args)
+        if registry_key not in _BUILT_CONFIGS:
+            built_config = build_config(parsed_file.data, *build_args)
+            if isinstance(built_config, dict):
+                built_config = MappingProxyType(built_config)
+            _BUILT_CONFIGS[registry_key] = built_config
+        return _BUILT_CONFIGS[registry_key]
+
+
+def clear_config_cache() -> None:
+    with _REGISTRY_LOCK:
+        _PARSED_YAML_FILES.clear()
+        _BUILT_CONFIGS.clear()
@@ -1,8 +1,7 @@
 from pathlib import Path
-from typing import List
-
-import yaml
+from typing import List, Mapping
 
+from skellysubs.core.translation.language_configs.config_registry import get_cached_config
 from skellysubs.core.translation.models.translation_typehints import LanguageNameString
 from skellysubs.utilities.frozen_model import FrozenModel
 
@@ -25,18 +24,25 @@ class LanguageConfig(FrozenModel):
         return cls(**config)
 
 
-def get_language_configs(yaml_path: str | None = None) -> dict[LanguageNameString, LanguageConfig]:
-    if not yaml_path:
-        yaml_path = Path(__file__).parent / 'language_configs.yaml'
-    with open(yaml_path, 'r', encoding="utf-8") as file:
-        config_data = yaml.safe_load(file)
-        language_configs = {name: LanguageConfig(**config) for name, config in config_data['language_configs'].items()}
+DEFAULT_LANGUAGE_CONFIGS_YAML_PATH = Path(__file__).parent / 'language_configs.yaml'
+
+
+def _build_language_configs(config_data: dict) -> dict[LanguageNameString, LanguageConfig]:
+    language_configs = {name: LanguageConfig(**config) for name, config in config_data['language_configs'].items()}
     if not language_configs:
         raise ValueError("No language configs found in the yaml file")
-
     return language_configs
 
 
+def get_language_configs(yaml_path: str | None = None) -> Mapping[LanguageNameString, LanguageConfig]:
+    """
+    Cached - the yaml is only re-parsed when the file changes on disk (see `get_cached_config`)
+    """
+    if not yaml_path:
+        yaml_path = DEFAULT_LANGUAGE_CONFIGS_YAML_PATH
+    return get_cached_config(yaml_path, _build_language_configs)
+
+
 # def get_language_configs() -> Dict[LanguageNameString, LanguageConfig]:
 #     return load_language_configs()
 
@@ -163,3 +163,13 @@ class TranslatedTranscriptSegment(BaseTranscriptSegment):
         Helper to set the romanized text of the segment
         """
         self.translated_text.romanized_text = value
+
+
+class NumberedTranslatedTranscriptSegment(BaseModel):
+    segment_number: int = Field(description="The section number of the segment, exactly as given in the request")
+    translated_segment: TranslatedTranscriptSegment = Field(description="The translation of that segment")
+
+
+class TranslatedTranscriptSegmentBatch(BaseModel):
+    segments: list[NumberedTranslatedTranscriptSegment] = Field(
+        description="One entry per requested segment, in the same order as the request")
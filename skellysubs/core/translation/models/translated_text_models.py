@@ -0,0 +1,35 @@
+import jieba
+from pydantic import BaseModel, Field
+
+from skellysubs.core.translation.models.translation_typehints import TranslatedTextString, RomanizedTextString, \
+    LanguageNameString, RomanizationMethodString
+from skellysubs.utilities.strip_punctuation_and_whitespace import strip_punctuation_and_whitespace
+
+
+class TranslatedText(BaseModel):
+    """
+    One language's translation of a segment, as used by the word-matched (`old_transcript_models`) subtitle renderer
+    """
+    translated_text: TranslatedTextString = Field(
+        description="The translated text in the target language, using the target language's script, characters, and/or alphabet")
+    translated_language_name: LanguageNameString = Field(description="The name of the target language")
+    romanization_method: RomanizationMethodString = Field(
+        description="The method used to romanize the translated text, if applicable")
+    romanized_text: RomanizedTextString = Field(
+        description="The romanized version of the translated text, if applicable")
+
+    def get_word_list(self) -> tuple[list[str], list[str] | None]:
+        if "chinese" in self.translated_language_name.lower():
+            return self._split_chinese(), self.romanized_text.split()
+        return self.translated_text.split(), self.romanized_text.split()
+
+    def _split_chinese(self) -> list[str]:
+        # the jieba docs refer to 'cut_all=False' as 'Accurate Mode'
+        split_characters = [strip_punctuation_and_whitespace(character)
+                            for character in jieba.cut(self.translated_text, cut_all=False)]
+        return [character for character in split_characters if character != ""]
+
+
+class TranslationsCollection(BaseModel):
+    translations: dict[LanguageNameString, TranslatedText] = Field(
+        description="The translation of the segment into each target language, keyed by language name")
@@ -0,0 +1,68 @@
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Type
+
+from pydantic import BaseModel, Field, create_model
+
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+
+logger = logging.getLogger(__name__)
+
+# a multi-language response may use at most this fraction of the model's output limit (token estimates are rough)
+MULTI_LANGUAGE_OUTPUT_BUDGET_FRACTION = 0.5
+
+MULTI_LANGUAGE_INSTRUCTIONS = """
+This request covers SEVERAL target languages: {target_language_names}.
+Provide a separate, complete translation into EACH of them, under that language's key in the JSON schema.
+"""
+
+
+def get_language_field_name(language_name: LanguageNameString) -> str:
+    """
+    A valid schema field name for a language, e.g. "CHINESE (Mandarin)" -> "chinese_mandarin"
+    """
+    field_name = re.sub(r"\W+", "_", language_name).strip("_").lower()
+    return field_name if field_name and not field_name[0].isdigit() else f"language_{field_name}"
+
+
+@lru_cache(maxsize=64)
+def create_language_keyed_model(model_name: str,
+                                value_model: Type[BaseModel],
+                                language_names: tuple[LanguageNameString, ...]) -> Type[BaseModel]:
+    """
+    A response schema with one required `value_model` field per language (cached, since it's rebuilt per request)
+    """
+    return create_model(model_name,
+                        **{get_language_field_name(language_name): (value_model,
+                                                                     Field(description=f"The {language_name} version"))
+                           for language_name in language_names})
+
+
+def get_language_values(language_keyed_result: BaseModel,
+                        language_names: list[LanguageNameString]) -> dict[LanguageNameString, BaseModel]:
+    return {language_name: getattr(language_keyed_result, get_language_field_name(language_name))
+            for language_name in language_names}
+
+
+def split_languages_by_output_budget(language_names: list[LanguageNameString],
+                                     output_tokens_per_language: int,
+                                     max_output_tokens: int) -> list[list[LanguageNameString]]:
+    """
+    Group languages so each request's (estimated) output stays within the output budget - every group gets at least
+    one language, even if that one alone is over budget
+    """
+    if not language_names:
+        return []
+    output_budget = max_output_tokens * MULTI_LANGUAGE_OUTPUT_BUDGET_FRACTION
+    max_languages_per_request = max(int(output_budget // max(output_tokens_per_language, 1)), 1)
+    # spread languages evenly over the fewest requests, e.g. 5 languages at 4 max per request -> 3 + 2, not 4 + 1
+    request_count = math.ceil(len(language_names) / max_languages_per_request)
+    languages_per_request = math.ceil(len(language_names) / request_count)
+    language_groups = [language_names[group_start:group_start + languages_per_request]
+                       for group_start in range(0, len(language_names), languages_per_request)]
+    if len(language_groups) > 1:
+        logger.debug(f"Splitting {len(language_names)} languages into {len(language_groups)} requests "
+                     f"(~{output_tokens_per_language} output tokens per language, budget {output_budget:.0f})")
+    return language_groups
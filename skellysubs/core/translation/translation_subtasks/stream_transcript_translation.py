@@ -0,0 +1,159 @@
+import asyncio
+import enum
+import logging
+import time
+from typing import AsyncIterator
+
+from openai.types.audio import TranscriptionVerbose
+from pydantic import BaseModel
+
+from skellysubs.core.subtitles.subtitle_generator import SubtitleGenerator
+from skellysubs.core.subtitles.subtitle_types import SubtitleVariant
+from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
+from skellysubs.core.translation.models.text_models import TranslatedTextModel
+from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.translation.translation_subtasks.translate_full_text import text_translation
+from skellysubs.core.translation.translation_subtasks.translate_transcript_segments import \
+    format_segment_requests, translate_segment_request
+from skellysubs.core.translation.translation_subtasks.translation_prompt_layout import TranslationPrompt
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationStreamEventType(enum.Enum):
+    full_text_translated = "full_text_translated"
+    segment_translated = "segment_translated"
+    segment_failed = "segment_failed"
+    language_complete = "language_complete"
+    language_failed = "language_failed"
+    complete = "complete"
+
+
+class TranslationStreamEvent(BaseModel):
+    """
+    One step of a streamed transcript translation - sent to the client as soon as it happens
+    """
+    event_type: TranslationStreamEventType
+    elapsed_seconds: float
+    language: LanguageNameString | None = None
+    segment_index: int | None = None
+    completed_segments: int | None = None
+    total_segments: int | None = None
+    full_text_translation: TranslatedTextModel | None = None
+    translated_segment: TranslatedTranscriptSegment | None = None
+    # subtitle format (e.g. "srt") -> variant -> the cue for this one segment
+    subtitle_cues: dict[str, dict[SubtitleVariant, str]] | None = None
+    error: str | None = None
+
+
+async def stream_transcript_translation(transcript: TranscriptionVerbose,
+                                        target_languages: dict[LanguageNameString, LanguageConfig],
+                                        context_window_segments: int | None = None,
+                                        batch_segments: bool = False,
+                                        ) -> AsyncIterator[TranslationStreamEvent]:
+    """
+    Pipelined version of `translate_transcript_to_languages` - each language runs its own full-text -> segments
+    pipeline, so a language's segments start as soon as *its* full text is done (not the slowest language's), and every
+    segment is yielded (with its subtitle cues) the moment it's translated, in completion order.
+
+    A failed segment or language is reported as an event instead of aborting the other languages. Closing the generator
+    early (e.g. the client disconnected) cancels the outstanding requests.
+    """
+    for segment in transcript.segments:
+        if len(segment.text) == 0:
+            segment.text = "..."
+
+    start_time = time.perf_counter()
+    events: asyncio.Queue[TranslationStreamEvent | None] = asyncio.Queue()
+    subtitle_generator = SubtitleGenerator()
+    total_segments = len(transcript.segments)
+
+    def emit(event_type: TranslationStreamEventType, **kwargs) -> None:
+        events.put_nowait(TranslationStreamEvent(event_type=event_type,
+                                                 elapsed_seconds=round(time.perf_counter() - start_time, 3),
+                                                 total_segments=total_segments,
+                                                 **kwargs))
+
+    async def translate_language(language: LanguageNameString, language_config: LanguageConfig) -> None:
+        _, full_text_translations = await text_translation(text=transcript.text,
+                                                           original_language=transcript.language,
+                                                           target_languages={language: language_config},
+                                                           context_window_segments=context_window_segments)
+        if language not in full_text_translations:
+            raise ValueError(f"Full-text translation failed for {language}")
+        emit(TranslationStreamEventType.full_text_translated,
+             language=language,
+             full_text_translation=full_text_translations[language])
+
+        segment_prompts, request_prompts = format_segment_requests(
+            target_language=language_config,
+            original_language=transcript.language,
+            original_full_text=transcript.text,
+            translated_full_text=full_text_translations[language],
+            segments=transcript.segments,
+            context_window_segments=context_window_segments,
+            batch_segments=batch_segments)
+
+        completed_segments = 0
+        failed_segments = 0
+
+        async def run_request(segment_batch: range, request_prompt: TranslationPrompt) -> None:
+            nonlocal completed_segments, failed_segments
+            try:
+                translated_segments = await translate_segment_request(segment_batch=segment_batch,
+                                                                      request_prompt=request_prompt,
+                                                                      segment_prompts=segment_prompts,
+                                                                      batch_segments=batch_segments)
+            except Exception as e:
+                logger.error(f"Streamed {language} translation of segments {list(segment_batch)} failed: {e}")
+                failed_segments += len(segment_batch)
+                for index in segment_batch:
+                    emit(TranslationStreamEventType.segment_failed, language=language, segment_index=index,
+                         error=str(e))
+                return
+            for index, translated_segment in zip(segment_batch, translated_segments):
+                completed_segments += 1
+                emit(TranslationStreamEventType.segment_translated,
+                     language=language,
+                     segment_index=index,
+                     completed_segments=completed_segments,
+                     translated_segment=translated_segment,
+                     subtitle_cues=subtitle_generator.generate_segment_cues(segment_number=index + 1,
+                                                                            segment=translated_segment,
+                                                                            language_config=language_config))
+
+        await asyncio.gather(*[run_request(segment_batch, request_prompt)
+                               for segment_batch, request_prompt in request_prompts])
+        emit(TranslationStreamEventType.language_complete,
+             language=language,
+             completed_segments=completed_segments,
+             error=f"{failed_segments} segments failed" if failed_segments else None)
+
+    async def run_language(language: LanguageNameString, language_config: LanguageConfig) -> None:
+        try:
+            await translate_language(language=language, language_config=language_config)
+        except Exception as e:
+            logger.exception(f"Streamed translation to {language} failed: {e}")
+            emit(TranslationStreamEventType.language_failed, language=language, error=str(e))
+
+    async def run_all_languages() -> None:
+        try:
+            await asyncio.gather(*[run_language(language, language_config)
+                                   for language, language_config in target_languages.items()])
+        finally:
+            events.put_nowait(None)
+
+    logger.info(f"Streaming translation of {total_segments} segments into {list(target_languages.keys())}")
+    pipeline_task = asyncio.create_task(run_all_languages())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        yield TranslationStreamEvent(event_type=TranslationStreamEventType.complete,
+                                     elapsed_seconds=round(time.perf_counter() - start_time, 3),
+                                     total_segments=total_segments)
+        logger.info(f"Streamed translation finished in {time.perf_counter() - start_time:.2f}s")
+    finally:
+        if not pipeline_task.done():
+            logger.info("Streamed translation closed early - cancelling outstanding requests")
+            pipeline_task.cancel()
@@ -2,10 +2,15 @@ import asyncio
 import logging
 
 from skellysubs.ai_clients.ai_client_strategy import get_ai_client
+from skellysubs.ai_clients.token_estimation import estimate_token_count
 from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
 from skellysubs.core.translation.models.text_models import TranslatedTextModel
 from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment
 from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.translation.translation_subtasks.multi_language_translation import MULTI_LANGUAGE_INSTRUCTIONS, \
+    create_language_keyed_model, get_language_values, split_languages_by_output_budget
+from skellysubs.core.translation.translation_subtasks.translation_prompt_layout import TranslationPrompt, \
+    format_context_window, log_prompt_token_usage
 
 logger = logging.getLogger(__name__)
 
@@ -18,24 +23,35 @@ logger = logging.getLogger(__name__)
 # END TARGET LANGUAGE INFO
 
 
+# translated + romanized + original text of each section come back in the response
+FULL_TEXT_OUTPUT_TOKENS_PER_INPUT_TOKEN = 3
+FULL_TEXT_OUTPUT_OVERHEAD_TOKENS = 100
+
+# Shared by every section request of a language - the section to translate goes in the user input
 FULL_TEXT_TRANSLATION_SYSTEM_PROMPT = """
 Return your answer in the format specified by the provided JSON schema.
 
 You are an expert translator. 
 
-You will be some text in  {original_language} and asked to translate it into this language. :  
-
-BEGIN TARGET LANGUAGE CONFIG:
-{target_language_config}
-END TARGET LANGUAGE CONFIG
-
+You will be some text in  {original_language} and asked to translate it into a target language.
 
 -------
 You will be provided with a transcript of the original language, along with a single section from the full text. 
 Your task is to translate the separated section of text into the target language and provide the romanization method specified (if applicable).
+{full_text_context}
+-------
 
+Here is the configuration of the language(s) you will be translating into:
 
+{target_language_configs}
+"""
 
+TARGET_LANGUAGE_CONFIG_TEMPLATE = """BEGIN TARGET LANGUAGE CONFIG ({language_name}):
+{target_language_config}
+END TARGET LANGUAGE CONFIG
+"""
+
+FULL_TEXT_CONTEXT = """
 -------
 Here is the full text in the original language: 
 FULL ORIGINAL LANGUAGE TEXT:
@@ -44,10 +60,10 @@ FULL ORIGINAL LANGUAGE TEXT:
 {original_text}
 '''
 FULL END OF ORIGINAL LANGUAGE TEXT
+"""
 
---------
-
-And here is the section you should translate:
+FULL_TEXT_TRANSLATION_USER_INPUT = """
+{context_window}Here is the section you should translate:
 SECTION OF ORIGINAL TEXT TO TRANSLATE (Section# {segment_number} of {total_segments}):
 '''
 {current_segment}
@@ -55,9 +71,6 @@ SECTION OF ORIGINAL TEXT TO TRANSLATE (Section# {segment_number} of {total_segme
 END OF SECTION OF ORIGINAL TEXT TO TRANSLATE
 
 Remember your task is to translate ONLY the PROVIDED SECTION of text provided into the target language and provide the romanization method specified (if applicable).
--------
-
-Return your answer in the format specified by the provided JSON schema.
 """
 
 
@@ -65,41 +78,110 @@ async def format_full_text_translation_system_prompt(
         text: str,
         original_language: str,
         target_languages: dict[LanguageNameString, LanguageConfig],
-        max_length=100) -> dict[str, list[str]]:
+        max_length=100,
+        context_window_segments: int | None = None) -> dict[str, list[TranslationPrompt]]:
+    """
+    If `context_window_segments` is set, each request only sees that many neighboring sections on either side instead
+    of the full text
+    """
     full_text_translation_prompts_by_language = {}
     text_segments = split_text_into_segments(text=text, max_word_length=max_length)
     total_segments = len(text_segments)
+    full_text_context = ""
+    if context_window_segments is None:
+        full_text_context = FULL_TEXT_CONTEXT.format(original_text=text)
 
     for language, config in target_languages.items():
 
         # wikipedia_link_info = json.dumps({link: await get_wikipedia_texts(config.background.wikipedia_links) for link in
         #                                   config.background.wikipedia_links}, indent=2)
 
+        system_prompt = FULL_TEXT_TRANSLATION_SYSTEM_PROMPT.format(
+            original_language=original_language,
+            full_text_context=full_text_context,
+            target_language_configs=format_target_language_configs([config]),
+        )
         language_prompts = []
         for segment_number, segment in enumerate(text_segments):
-            prompt = FULL_TEXT_TRANSLATION_SYSTEM_PROMPT.format(
-                original_language=original_language,
-                target_language_config=config.model_dump_json(indent=2),
-                original_text=text,
-                current_segment=segment,
-                segment_number=segment_number + 1,
-                total_segments=total_segments
-            )
-            language_prompts.append(prompt)
+            context_window = ""
+            if context_window_segments is not None:
+                context_window = format_context_window(sections=text_segments,
+                                                       index=segment_number,
+                                                       window_size=context_window_segments)
+            language_prompts.append(TranslationPrompt.create(
+                system_prompt=system_prompt,
+                user_input=FULL_TEXT_TRANSLATION_USER_INPUT.format(
+                    context_window=context_window,
+                    current_segment=segment,
+                    segment_number=segment_number + 1,
+                    total_segments=total_segments
+                )))
 
         full_text_translation_prompts_by_language[language] = language_prompts
 
-    logger.debug(
-        "==================================\n\n"
-        f"Formatted system prompts: \n\n"
-        f" FULL TEXT/SEGMENT LEVEL SYSTEM PROMPT: \n"
-        f"{full_text_translation_prompts_by_language.keys()}\n\n"
-        "==================================\n\n"
-    )
+    log_prompt_token_usage(prompts_by_language=full_text_translation_prompts_by_language,
+                           label="Full-text translation")
 
     return full_text_translation_prompts_by_language
 
 
+def format_target_language_configs(language_configs: list[LanguageConfig]) -> str:
+    return "\n".join(TARGET_LANGUAGE_CONFIG_TEMPLATE.format(language_name=config.language_name,
+                                                            target_language_config=config.model_dump_json(indent=2))
+                     for config in language_configs)
+
+
+async def format_multi_language_full_text_prompts(
+        text: str,
+        original_language: str,
+        target_languages: dict[LanguageNameString, LanguageConfig],
+        max_output_tokens: int,
+        max_length=100,
+        context_window_segments: int | None = None) -> dict[tuple[LanguageNameString, ...], list[TranslationPrompt]]:
+    """
+    Like `format_full_text_translation_system_prompt`, but each request asks for several languages at once - as many
+    as fit in the output budget - so the original text is only sent once per group of languages
+    """
+    text_segments = split_text_into_segments(text=text, max_word_length=max_length)
+    full_text_context = ""
+    if context_window_segments is None:
+        full_text_context = FULL_TEXT_CONTEXT.format(original_text=text)
+    output_tokens_per_language = max((estimate_token_count(segment) * FULL_TEXT_OUTPUT_TOKENS_PER_INPUT_TOKEN
+                                      + FULL_TEXT_OUTPUT_OVERHEAD_TOKENS for segment in text_segments), default=0)
+
+    prompts_by_language_group = {}
+    for language_group in split_languages_by_output_budget(language_names=list(target_languages.keys()),
+                                                           output_tokens_per_language=output_tokens_per_language,
+                                                           max_output_tokens=max_output_tokens):
+        system_prompt = FULL_TEXT_TRANSLATION_SYSTEM_PROMPT.format(
+            original_language=original_language,
+            full_text_context=full_text_context,
+            target_language_configs=format_target_language_configs(
+                [target_languages[language] for language in language_group]),
+        )
+        group_prompts = []
+        for segment_number, segment in enumerate(text_segments):
+            context_window = ""
+            if context_window_segments is not None:
+                context_window = format_context_window(sections=text_segments,
+                                                       index=segment_number,
+                                                       window_size=context_window_segments)
+            group_prompts.append(TranslationPrompt.create(
+                system_prompt=system_prompt,
+                user_input=FULL_TEXT_TRANSLATION_USER_INPUT.format(
+                    context_window=context_window,
+                    current_segment=segment,
+                    segment_number=segment_number + 1,
+                    total_segments=len(text_segments)
+                ) + MULTI_LANGUAGE_INSTRUCTIONS.format(target_language_names=", ".join(language_group))))
+        prompts_by_language_group[tuple(language_group)] = group_prompts
+
+    log_prompt_token_usage(prompts_by_language={", ".join(language_group): prompts
+                                                for language_group, prompts in prompts_by_language_group.items()},
+                           label="Multi-language full-text translation")
+    return prompts_by_language_group
+
+
 def split_text_into_segments(text, max_word_length=150):
     words = text.split()
     segments = []
@@ -118,30 +200,51 @@ def split_text_into_segments(text, max_word_length=150):
 
 
 async def text_translation(text: str, original_language: str,
-                           target_languages: dict[LanguageNameString, LanguageConfig]) -> tuple[
+                           target_languages: dict[LanguageNameString, LanguageConfig],
+                           context_window_segments: int | None = None,
+                           multi_language: bool = False) -> tuple[
     dict[LanguageNameString, list[str]], dict[LanguageNameString, TranslatedTextModel]]:
+    """
+    If `multi_language` is True, each request translates a section into several target languages at once
+    """
     # Full-text translation
-    system_prompts_by_language = await format_full_text_translation_system_prompt(
-        text=text,
-        target_languages=target_languages,
-        original_language=original_language
-    )
+    if multi_language:
+        system_prompts_by_language_group = await format_multi_language_full_text_prompts(
+            text=text,
+            target_languages=target_languages,
+            original_language=original_language,
+            max_output_tokens=get_ai_client().config.max_output_tokens,
+            context_window_segments=context_window_segments,
+        )
+    else:
+        system_prompts_by_language_group = {(language, ): prompts for language, prompts in
+                                            (await format_full_text_translation_system_prompt(
+                                                text=text,
+                                                target_languages=target_languages,
+                                                original_language=original_language,
+                                                context_window_segments=context_window_segments,
+                                            )).items()}
 
     # Create a list to hold all tasks
     all_translation_tasks = []
     language_addresses = []
 
-    for language, system_prompts in system_prompts_by_language.items():
-
+    for language_group, system_prompts in system_prompts_by_language_group.items():
+        prompt_model = TranslatedTextModel
+        if multi_language:
+            prompt_model = create_language_keyed_model(model_name="MultiLanguageTranslatedTextModel",
+                                                       value_model=TranslatedTextModel,
+                                                       language_names=language_group)
         for prompt in system_prompts:
             task = asyncio.create_task(
                 get_ai_client().make_json_mode_request(
-                    system_prompt=prompt,
-                    prompt_model=TranslatedTextModel,
+                    system_prompt=prompt.system_prompt,
+                    user_input=prompt.user_input,
+                    prompt_model=prompt_model,
                 )
             )
             all_translation_tasks.append(task)
-            language_addresses.append(language)
+            language_addresses.append(language_group)
 
     # Run all tasks concurrently
     logger.info(f"Running {len(all_translation_tasks)} full-text translation tasks concurrently")
@@ -151,10 +254,16 @@ async def text_translation(text: str, original_language: str,
     # Organize results by language
     translations = {}
     results_by_language: dict[LanguageNameString, list[TranslatedTextModel]] = {}
-    for language, translated_segment in zip(language_addresses, results):
-        if language not in results_by_language:
-            results_by_language[language] = []
-        results_by_language[language].append(translated_segment)
+    for language_group, result in zip(language_addresses, results):
+        if multi_language and not isinstance(result, Exception):
+            translated_segments_by_language = get_language_values(language_keyed_result=result,
+                                                                  language_names=list(language_group))
+        else:
+            translated_segments_by_language = {language: result for language in language_group}
+        for language, translated_segment in translated_segments_by_language.items():
+            if language not in results_by_language:
+                results_by_language[language] = []
+            results_by_language[language].append(translated_segment)
 
     for language, translated_segments in results_by_language.items():
         # Reassemble the translated segments into the full text
@@ -169,4 +278,6 @@ async def text_translation(text: str, original_language: str,
             romanized_text=romanized_full_text
         )
 
-    return system_prompts_by_language, translations
+    return ({language: [str(prompt) for prompt in prompts]
+             for language_group, prompts in system_prompts_by_language_group.items() for language in language_group},
+            translations)
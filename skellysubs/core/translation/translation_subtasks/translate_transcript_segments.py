@@ -1,25 +1,34 @@
 import asyncio
 import logging
+from functools import lru_cache
+from typing import Type
 
 from openai.types.audio import TranscriptionVerbose
 from openai.types.audio.transcription_segment import TranscriptionSegment
+from pydantic import BaseModel, Field, create_model
 
 from skellysubs.ai_clients.ai_client_strategy import get_ai_client
+from skellysubs.ai_clients.token_estimation import estimate_token_count
 from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
 from skellysubs.core.translation.models.text_models import TranslatedTextModel
-from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment
+from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment, \
+    TranslatedTranscriptSegmentBatch
 from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.translation.translation_subtasks.multi_language_translation import MULTI_LANGUAGE_INSTRUCTIONS, \
+    create_language_keyed_model, get_language_values, split_languages_by_output_budget
+from skellysubs.core.translation.translation_subtasks.translation_prompt_layout import TranslationPrompt, \
+    format_context_window, log_prompt_token_usage
 
 logger = logging.getLogger(__name__)
 
+# The system prompt is identical for every segment of a language (and starts with the same text for every language),
+# so the provider can cache it - everything that changes per segment goes in the user input
 SEGMENT_LEVEL_TRANSCRIPT_TRANSLATION_SYSTEM_PROMPT = """
 
 You are an expert translator. 
 
-You will be given the transcription of an audio recording in {original_language} and asked to translate a section of it into {target_language_name}.: 
-
-{target_language_config}
-
+You will be given the transcription of an audio recording in {original_language} and asked to translate a section of it 
+into a target language.
 
 Your task is to provide a translation for a  single timestamped segment from the list of segments  that make up the full transcript. Your 
 job is to translate the provided segment into the target language and provide the romanization method specified (if applicable). 
@@ -28,6 +37,17 @@ job is to translate the provided segment into the target language and provide th
 Remember, this is an audio transcription, so the text may contain errors. Please do your best to provide an accurate 
 translation of the transcription and attempt to match the speaker's meaning and intention as closely as possible.
 
+If the target languages matches the original language, just return the original language transcript.
+
+Your answer must match the form of the JSON schema provided. 
+{full_transcript_context}
+Here is the target language you will be translating into ({target_language_name}):
+
+{target_language_config}
+{full_translation_context}
+"""
+
+FULL_TRANSCRIPT_CONTEXT = """
 Here is the full transcript for context:
 -------
 FULL TRANSCRIPTION TEXT START: 
@@ -35,18 +55,21 @@ FULL TRANSCRIPTION TEXT START:
 {full_transcription_text_in_original_language}
 
 FULL TRANSCRIPTION TEXT END
+-------
+"""
 
-And here is the full transcript translated into the target language:
+FULL_TRANSLATION_CONTEXT = """
+And here is the full transcript translated into {target_language_name}:
 
 FULL TRANSCRIPTION TEXT TRANSLATED INTO TARGET LANGUAGE START:
 
 {full_transcription_text_in_target_language}
 
 FULL TRANSCRIPTION TEXT TRANSLATED INTO TARGET LANGUAGE END
+"""
 
-----
-
-Here is the segment you should translate:
+SEGMENT_LEVEL_TRANSCRIPT_TRANSLATION_USER_INPUT = """
+{context_window}Here is the segment you should translate:
 
 SECTION OF ORIGINAL TEXT TO TRANSLATE (Section# {segment_number} of {total_segments}):
 
@@ -59,52 +82,432 @@ total_transcript_audio_duration: {duration}
 END OF SECTION OF ORIGINAL TEXT TO TRANSLATE
 -------
 
-REMEMBER! Your task is to translate the text from the `SECTION OF ORIGINAL TEXT TO TRANSLATE` into the target language and provide the romanization method specified (if applicable).
+REMEMBER! Your task is to translate the text from the `SECTION OF ORIGINAL TEXT TO TRANSLATE` into {target_language_name} and provide the romanization method specified (if applicable).
+"""
+
 
-If the target languages matches the original language, just return the original language transcript.
+SEGMENT_BATCH_TRANSLATION_USER_INPUT = """
+{context_window}Here are {segment_count} consecutive segments you should translate (Sections# {first_segment_number} to {last_segment_number} of {total_segments}):
 
-Your answer must match the form of the JSON schema provided. 
+{numbered_segments}
+total_transcript_audio_duration: {duration}
+
+END OF SECTIONS OF ORIGINAL TEXT TO TRANSLATE
+-------
+
+REMEMBER! Translate EACH of these sections separately into {target_language_name} and provide the romanization method specified (if applicable).
+Return exactly one entry per section, in the same order, with `segment_number` set to that section's number. Do not merge, split, or skip sections.
+"""
 
+NUMBERED_SEGMENT_TEMPLATE = """SECTION# {segment_number} (starting_timestamp: {start_timestamp}, ending_timestamp: {end_timestamp}):
+{segment_text}
 """
 
+# Batch sizing - a batch may use at most this fraction of the context window / output limit, which leaves headroom
+# for the rough token estimates
+SEGMENT_BATCH_BUDGET_FRACTION = 0.5
+# each segment comes back as a whole `TranslatedTranscriptSegment` (original, translated and romanized text, timestamps)
+SEGMENT_BATCH_OUTPUT_TOKENS_PER_INPUT_TOKEN = 4
+SEGMENT_BATCH_TOKENS_PER_SEGMENT_OVERHEAD = 150
+DEFAULT_MAX_SEGMENTS_PER_BATCH = 25
+
+
+def format_segment_system_prompt(original_full_text: str,
+                                 translated_full_text: TranslatedTextModel,
+                                 target_language: LanguageConfig,
+                                 original_language: LanguageNameString,
+                                 context_window_segments: int | None = None) -> str:
+    return format_multi_language_segment_system_prompt(
+        original_full_text=original_full_text,
+        translated_full_texts={target_language.language_name: translated_full_text},
+        target_languages={target_language.language_name: target_language},
+        original_language=original_language,
+        context_window_segments=context_window_segments)
+
+
+def format_multi_language_segment_system_prompt(original_full_text: str,
+                                                translated_full_texts: dict[LanguageNameString, TranslatedTextModel],
+                                                target_languages: dict[LanguageNameString, LanguageConfig],
+                                                original_language: LanguageNameString,
+                                                context_window_segments: int | None = None) -> str:
+    full_transcript_context = ""
+    full_translation_context = ""
+    if context_window_segments is None:
+        full_transcript_context = FULL_TRANSCRIPT_CONTEXT.format(
+            full_transcription_text_in_original_language=original_full_text)
+        for language, target_language in target_languages.items():
+            translated_full_text = translated_full_texts[language]
+            translated_text_str = translated_full_text.translated_text
+            if translated_full_text.romanized_text:
+                translated_text_str += f"ROMANIZED:\n\n{translated_full_text.romanized_text}"
+            full_translation_context += FULL_TRANSLATION_CONTEXT.format(
+                target_language_name=target_language.language_name,
+                full_transcription_text_in_target_language=translated_text_str)
+    return SEGMENT_LEVEL_TRANSCRIPT_TRANSLATION_SYSTEM_PROMPT.format(
+        original_language=original_language,
+        target_language_name=", ".join(target_language.language_name for target_language in target_languages.values()),
+        target_language_config="\n\n".join(target_language.model_dump_json(indent=2)
+                                            for target_language in target_languages.values()),
+        full_transcript_context=full_transcript_context,
+        full_translation_context=full_translation_context,
+    )
+
 
 def format_segment_prompts(
         original_full_text: str,
         translated_full_text: TranslatedTextModel,
         segments: list[TranscriptionSegment],
         target_language: LanguageConfig,
-        original_language: LanguageNameString) -> list[str]:
+        original_language: LanguageNameString,
+        context_window_segments: int | None = None) -> list[TranslationPrompt]:
+    """
+    If `context_window_segments` is set, each request only sees that many neighboring segments on either side instead
+    of the full transcript and its full translation
+    """
+    system_prompt = format_segment_system_prompt(original_full_text=original_full_text,
+                                                 translated_full_text=translated_full_text,
+                                                 target_language=target_language,
+                                                 original_language=original_language,
+                                                 context_window_segments=context_window_segments)
+
+    segment_texts = [segment.text for segment in segments]
     segment_level_prompts = []
-    translated_text_str = translated_full_text.translated_text
-    if translated_full_text.romanized_text:
-        translated_text_str += f"ROMANIZED:\n\n{translated_full_text.romanized_text}"
     for segment_number, segment in enumerate(segments):
-        segment_level_prompts.append(
-            SEGMENT_LEVEL_TRANSCRIPT_TRANSLATION_SYSTEM_PROMPT.format(
-                original_language=original_language,
+        context_window = ""
+        if context_window_segments is not None:
+            context_window = format_context_window(sections=segment_texts,
+                                                   index=segment_number,
+                                                   window_size=context_window_segments)
+        segment_level_prompts.append(TranslationPrompt.create(
+            system_prompt=system_prompt,
+            user_input=SEGMENT_LEVEL_TRANSCRIPT_TRANSLATION_USER_INPUT.format(
+                context_window=context_window,
                 target_language_name=target_language.language_name,
-                target_language_config=target_language.model_dump_json(indent=2),
-                full_transcription_text_in_original_language=translated_text_str,
-                full_transcription_text_in_target_language=translated_full_text.translated_text,
-                segment_number=segment_number,
+                segment_number=segment_number + 1,
                 total_segments=len(segments),
                 current_segment_in_original_language=segment.text,
                 start_timestamp=segment.start,
                 end_timestamp=segment.end,
                 duration=segments[-1].end,
-            ))
+            )))
 
     return segment_level_prompts
 
 
+def estimate_segment_output_tokens(segment_tokens: int) -> int:
+    return segment_tokens * SEGMENT_BATCH_OUTPUT_TOKENS_PER_INPUT_TOKEN + SEGMENT_BATCH_TOKENS_PER_SEGMENT_OVERHEAD
+
+
+def plan_segment_batches(segment_token_counts: list[int],
+                         system_prompt_tokens: int,
+                         max_context_length: int,
+                         max_output_tokens: int,
+                         max_segments_per_batch: int = DEFAULT_MAX_SEGMENTS_PER_BATCH,
+                         languages_per_request: int = 1) -> list[range]:
+    """
+    Greedily pack consecutive segments into batches that stay within the input (context window minus the shared
+    system prompt) and output token budgets
+    """
+    input_budget = max_context_length * SEGMENT_BATCH_BUDGET_FRACTION - system_prompt_tokens
+    output_budget = max_output_tokens * SEGMENT_BATCH_BUDGET_FRACTION
+    batches = []
+    batch_start = 0
+    batch_input_tokens = batch_output_tokens = 0
+    for index, segment_tokens in enumerate(segment_token_counts):
+        segment_output_tokens = estimate_segment_output_tokens(segment_tokens) * languages_per_request
+        if index > batch_start and (index - batch_start >= max_segments_per_batch
+                                    or batch_input_tokens + segment_tokens > input_budget
+                                    or batch_output_tokens + segment_output_tokens > output_budget):
+            batches.append(range(batch_start, index))
+            batch_start = index
+            batch_input_tokens = batch_output_tokens = 0
+        batch_input_tokens += segment_tokens
+        batch_output_tokens += segment_output_tokens
+    if batch_start < len(segment_token_counts):
+        batches.append(range(batch_start, len(segment_token_counts)))
+    return batches
+
+
+def format_segment_batch_prompts(
+        original_full_text: str,
+        translated_full_text: TranslatedTextModel,
+        segments: list[TranscriptionSegment],
+        target_language: LanguageConfig,
+        original_language: LanguageNameString,
+        max_context_length: int,
+        max_output_tokens: int,
+        context_window_segments: int | None = None) -> list[tuple[range, TranslationPrompt]]:
+    """
+    Like `format_segment_prompts`, but each request covers a batch of consecutive segments (sized to the token budget)
+    """
+    system_prompt = format_segment_system_prompt(original_full_text=original_full_text,
+                                                 translated_full_text=translated_full_text,
+                                                 target_language=target_language,
+                                                 original_language=original_language,
+                                                 context_window_segments=context_window_segments)
+    numbered_segments = [NUMBERED_SEGMENT_TEMPLATE.format(segment_number=segment_number + 1,
+                                                          start_timestamp=segment.start,
+                                                          end_timestamp=segment.end,
+                                                          segment_text=segment.text)
+                         for segment_number, segment in enumerate(segments)]
+    segment_batches = plan_segment_batches(
+        segment_token_counts=[estimate_token_count(numbered_segment) for numbered_segment in numbered_segments],
+        system_prompt_tokens=estimate_token_count(system_prompt),
+        max_context_length=max_context_length,
+        max_output_tokens=max_output_tokens)
+
+    segment_texts = [segment.text for segment in segments]
+    batch_prompts = []
+    for segment_batch in segment_batches:
+        context_window = ""
+        if context_window_segments is not None:
+            context_window = format_context_window(sections=segment_texts,
+                                                   index=segment_batch.start,
+                                                   last_index=segment_batch.stop - 1,
+                                                   window_size=context_window_segments)
+        batch_prompts.append((segment_batch, TranslationPrompt.create(
+            system_prompt=system_prompt,
+            user_input=SEGMENT_BATCH_TRANSLATION_USER_INPUT.format(
+                context_window=context_window,
+                segment_count=len(segment_batch),
+                first_segment_number=segment_batch.start + 1,
+                last_segment_number=segment_batch.stop,
+                total_segments=len(segments),
+                numbered_segments="\n".join(numbered_segments[segment_batch.start:segment_batch.stop]),
+                duration=segments[-1].end,
+                target_language_name=target_language.language_name,
+            ))))
+    return batch_prompts
+
+
+def validate_segment_batch(segment_batch_result: TranslatedTranscriptSegmentBatch,
+                           segment_batch: range) -> str | None:
+    """
+    Why a batched response can't be used, or None if it can
+    """
+    expected_segment_numbers = [index + 1 for index in segment_batch]
+    returned_segment_numbers = [segment.segment_number for segment in segment_batch_result.segments]
+    if returned_segment_numbers != expected_segment_numbers:
+        return f"expected segments {expected_segment_numbers}, got {returned_segment_numbers}"
+    return None
+
+
+async def translate_segment_batch(segment_batch: range,
+                                  batch_prompt: TranslationPrompt,
+                                  segment_prompts: list[TranslationPrompt]) -> list[TranslatedTranscriptSegment]:
+    """
+    Translate a batch of segments in one request, falling back to one request per segment if the response doesn't
+    line up with the requested segments
+    """
+    try:
+        segment_batch_result = await get_ai_client().make_json_mode_request(
+            system_prompt=batch_prompt.system_prompt,
+            user_input=batch_prompt.user_input,
+            prompt_model=TranslatedTranscriptSegmentBatch,
+        )
+        batch_problem = validate_segment_batch(segment_batch_result=segment_batch_result, segment_batch=segment_batch)
+    except Exception as e:
+        batch_problem = f"{e.__class__.__name__}: {e}"
+    if batch_problem is None:
+        return [segment.translated_segment for segment in segment_batch_result.segments]
+
+    logger.warning(f"Batched translation of segments {segment_batch.start + 1}-{segment_batch.stop} failed "
+                   f"({batch_problem}) - falling back to per-segment requests")
+    return list(await asyncio.gather(*[get_ai_client().make_json_mode_request(
+        system_prompt=segment_prompts[index].system_prompt,
+        user_input=segment_prompts[index].user_input,
+        prompt_model=TranslatedTranscriptSegment,
+    ) for index in segment_batch]))
+
+
+def format_segment_requests(original_full_text: str,
+                            translated_full_text: TranslatedTextModel,
+                            segments: list[TranscriptionSegment],
+                            target_language: LanguageConfig,
+                            original_language: LanguageNameString,
+                            context_window_segments: int | None = None,
+                            batch_segments: bool = False,
+                            ) -> tuple[list[TranslationPrompt], list[tuple[range, TranslationPrompt]]]:
+    """
+    The per-segment prompts for one language, plus the requests to actually send for it - one per segment, or one per
+    batch of consecutive segments if `batch_segments` (the per-segment prompts are then the fallback for a bad batch)
+    """
+    segment_prompts = format_segment_prompts(target_language=target_language,
+                                             original_language=original_language,
+                                             original_full_text=original_full_text,
+                                             translated_full_text=translated_full_text,
+                                             segments=segments,
+                                             context_window_segments=context_window_segments)
+    if not batch_segments:
+        return segment_prompts, [(range(index, index + 1), segment_prompt)
+                                 for index, segment_prompt in enumerate(segment_prompts)]
+    client_config = get_ai_client().config
+    return segment_prompts, format_segment_batch_prompts(target_language=target_language,
+                                                         original_language=original_language,
+                                                         original_full_text=original_full_text,
+                                                         translated_full_text=translated_full_text,
+                                                         segments=segments,
+                                                         max_context_length=client_config.max_context_length,
+                                                         max_output_tokens=client_config.max_output_tokens,
+                                                         context_window_segments=context_window_segments)
+
+
+async def translate_segment_request(segment_batch: range,
+                                    request_prompt: TranslationPrompt,
+                                    segment_prompts: list[TranslationPrompt],
+                                    batch_segments: bool = False) -> list[TranslatedTranscriptSegment]:
+    """
+    Send one of the requests from `format_segment_requests` - returns the translations of the segments in
+    `segment_batch`, in order
+    """
+    if batch_segments:
+        translated_segments = await translate_segment_batch(segment_batch=segment_batch,
+                                                            batch_prompt=request_prompt,
+                                                            segment_prompts=segment_prompts)
+    else:
+        translated_segments = [await get_ai_client().make_json_mode_request(
+            system_prompt=request_prompt.system_prompt,
+            user_input=request_prompt.user_input,
+            prompt_model=TranslatedTranscriptSegment)]
+    if not all(isinstance(segment, TranslatedTranscriptSegment) for segment in translated_segments):
+        raise TypeError(
+            f"Expected TranslatedTranscriptSegment, got {[type(segment) for segment in translated_segments]}")
+    return translated_segments
+
+
+@lru_cache(maxsize=64)
+def create_multi_language_segment_batch_model(language_names: tuple[LanguageNameString, ...]) -> Type[BaseModel]:
+    translations_model = create_language_keyed_model(model_name="MultiLanguageTranslatedTranscriptSegment",
+                                                     value_model=TranslatedTranscriptSegment,
+                                                     language_names=language_names)
+    numbered_segment_model = create_model(
+        "NumberedMultiLanguageTranslatedTranscriptSegment",
+        segment_number=(int, Field(description="The section number of the segment, exactly as given in the request")),
+        translations=(translations_model, Field(description="The translation of that segment into each language")))
+    return create_model(
+        "MultiLanguageTranslatedTranscriptSegmentBatch",
+        segments=(list[numbered_segment_model],
+                  Field(description="One entry per requested segment, in the same order as the request")))
+
+
+def format_multi_language_segment_batch_prompts(
+        original_full_text: str,
+        full_text_translations: dict[LanguageNameString, TranslatedTextModel],
+        segments: list[TranscriptionSegment],
+        target_languages: dict[LanguageNameString, LanguageConfig],
+        original_language: LanguageNameString,
+        max_context_length: int,
+        max_output_tokens: int,
+        batch_segments: bool = False,
+        context_window_segments: int | None = None,
+) -> list[tuple[tuple[LanguageNameString, ...], range, TranslationPrompt]]:
+    """
+    Requests that each translate one segment (or a batch of segments, if `batch_segments`) into a group of languages at
+    once - languages are grouped so the response fits the output budget even for the longest segment
+    """
+    numbered_segments = [NUMBERED_SEGMENT_TEMPLATE.format(segment_number=segment_number + 1,
+                                                          start_timestamp=segment.start,
+                                                          end_timestamp=segment.end,
+                                                          segment_text=segment.text)
+                         for segment_number, segment in enumerate(segments)]
+    segment_token_counts = [estimate_token_count(numbered_segment) for numbered_segment in numbered_segments]
+    language_groups = split_languages_by_output_budget(
+        language_names=list(full_text_translations.keys()),
+        output_tokens_per_language=estimate_segment_output_tokens(max(segment_token_counts, default=0)),
+        max_output_tokens=max_output_tokens)
+
+    segment_texts = [segment.text for segment in segments]
+    batch_prompts = []
+    for language_group in language_groups:
+        system_prompt = format_multi_language_segment_system_prompt(
+            original_full_text=original_full_text,
+            translated_full_texts=full_text_translations,
+            target_languages={language: target_languages[language] for language in language_group},
+            original_language=original_language,
+            context_window_segments=context_window_segments)
+        segment_batches = [range(index, index + 1) for index in range(len(segments))]
+        if batch_segments:
+            segment_batches = plan_segment_batches(segment_token_counts=segment_token_counts,
+                                                   system_prompt_tokens=estimate_token_count(system_prompt),
+                                                   max_context_length=max_context_length,
+                                                   max_output_tokens=max_output_tokens,
+                                                   languages_per_request=len(language_group))
+        for segment_batch in segment_batches:
+            context_window = ""
+            if context_window_segments is not None:
+                context_window = format_context_window(sections=segment_texts,
+                                                       index=segment_batch.start,
+                                                       last_index=segment_batch.stop - 1,
+                                                       window_size=context_window_segments)
+            user_input = SEGMENT_BATCH_TRANSLATION_USER_INPUT.format(
+                context_window=context_window,
+                segment_count=len(segment_batch),
+                first_segment_number=segment_batch.start + 1,
+                last_segment_number=segment_batch.stop,
+                total_segments=len(segments),
+                numbered_segments="\n".join(numbered_segments[segment_batch.start:segment_batch.stop]),
+                duration=segments[-1].end,
+                target_language_name=", ".join(language_group),
+            ) + MULTI_LANGUAGE_INSTRUCTIONS.format(target_language_names=", ".join(language_group))
+            batch_prompts.append((tuple(language_group),
+                                  segment_batch,
+                                  TranslationPrompt.create(system_prompt=system_prompt, user_input=user_input)))
+    return batch_prompts
+
+
+async def translate_multi_language_segment_batch(
+        language_group: tuple[LanguageNameString, ...],
+        segment_batch: range,
+        batch_prompt: TranslationPrompt,
+        segment_prompts_by_language: dict[LanguageNameString, list[TranslationPrompt]],
+) -> dict[LanguageNameString, list[TranslatedTranscriptSegment]]:
+    """
+    Translate segments into several languages in one request, falling back to one request per segment per language
+    if the response doesn't line up with the requested segments
+    """
+    try:
+        segment_batch_result = await get_ai_client().make_json_mode_request(
+            system_prompt=batch_prompt.system_prompt,
+            user_input=batch_prompt.user_input,
+            prompt_model=create_multi_language_segment_batch_model(language_group),
+        )
+        batch_problem = validate_segment_batch(segment_batch_result=segment_batch_result, segment_batch=segment_batch)
+    except Exception as e:
+        batch_problem = f"{e.__class__.__name__}: {e}"
+    if batch_problem is None:
+        translations_by_segment = [get_language_values(language_keyed_result=segment.translations,
+                                                       language_names=list(language_group))
+                                   for segment in segment_batch_result.segments]
+        return {language: [translations[language] for translations in translations_by_segment]
+                for language in language_group}
+
+    logger.warning(f"Multi-language translation of segments {segment_batch.start + 1}-{segment_batch.stop} into "
+                   f"{language_group} failed ({batch_problem}) - falling back to per-language, per-segment requests")
+    fallback_results = await asyncio.gather(*[get_ai_client().make_json_mode_request(
+        system_prompt=segment_prompts_by_language[language][index].system_prompt,
+        user_input=segment_prompts_by_language[language][index].user_input,
+        prompt_model=TranslatedTranscriptSegment,
+    ) for language in language_group for index in segment_batch])
+    return {language: list(fallback_results[language_number * len(segment_batch):
+                                            (language_number + 1) * len(segment_batch)])
+            for language_number, language in enumerate(language_group)}
+
+
 async def transcript_translation(original_transcript: TranscriptionVerbose,
                                  full_text_translations: dict[LanguageNameString, TranslatedTextModel],
                                  target_languages: dict[LanguageNameString, LanguageConfig],
+                                 context_window_segments: int | None = None,
+                                 batch_segments: bool = False,
                                  ) -> tuple[
     dict[LanguageNameString, list[str]], dict[LanguageNameString, list[TranslatedTranscriptSegment]]]:
+    """
+    Segment-level translation where each request covers a group of target languages at once (and, if
+    `batch_segments` is True, a batch of consecutive segments). One language at a time goes through
+    `format_segment_requests` / `translate_segment_request` instead
+    """
     tasks = []
     addresses = []
-    segment_prompts_by_language: dict[LanguageNameString, list[str]] = {}
+    segment_prompts_by_language: dict[LanguageNameString, list[TranslationPrompt]] = {}
     for language, translation in full_text_translations.items():
         segment_prompts_by_language[language] = format_segment_prompts(
             target_language=target_languages[language],
@@ -112,13 +515,31 @@ async def transcript_translation(original_transcript: TranscriptionVerbose,
             original_full_text=original_transcript.text,
             translated_full_text=translation,
             segments=original_transcript.segments,
+            context_window_segments=context_window_segments,
         )
-        for index, segment_system_prompt in enumerate(segment_prompts_by_language[language]):
-            addresses.append({'language': language, 'index': index})
-            tasks.append(asyncio.create_task(get_ai_client().make_json_mode_request(
-                system_prompt=segment_system_prompt,
-                prompt_model=TranslatedTranscriptSegment,
-            )))
+    # the prompts that were actually sent, for logging/returning (per-segment prompts are also the fallback requests)
+    sent_prompts_by_language_group: dict[tuple[LanguageNameString, ...], list[TranslationPrompt]] = {}
+    client_config = get_ai_client().config
+    for language_group, segment_batch, batch_prompt in format_multi_language_segment_batch_prompts(
+            original_full_text=original_transcript.text,
+            full_text_translations=full_text_translations,
+            segments=original_transcript.segments,
+            target_languages=target_languages,
+            original_language=original_transcript.language,
+            max_context_length=client_config.max_context_length,
+            max_output_tokens=client_config.max_output_tokens,
+            batch_segments=batch_segments,
+            context_window_segments=context_window_segments):
+        sent_prompts_by_language_group.setdefault(language_group, []).append(batch_prompt)
+        addresses.append({'languages': language_group, 'index': segment_batch.start})
+        tasks.append(asyncio.create_task(translate_multi_language_segment_batch(
+            language_group=language_group,
+            segment_batch=segment_batch,
+            batch_prompt=batch_prompt,
+            segment_prompts_by_language=segment_prompts_by_language)))
+    log_prompt_token_usage(prompts_by_language={", ".join(language_group): prompts for language_group, prompts
+                                                in sent_prompts_by_language_group.items()},
+                           label="Segment-level translation")
 
     logger.info(f"Running {len(tasks)} segment-level translation tasks concurrently")
     results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -126,26 +547,23 @@ async def transcript_translation(original_transcript: TranscriptionVerbose,
 
     translated_segments_by_language = {}
     for result, address in zip(results, addresses):
-        target_language = address['language']
         index = address['index']
 
         if isinstance(result, Exception):
             logger.error(f"Error in task {address}: {str(result)}")
-            raise ValueError(f"Segment translation failed for {target_language} segment {index}") from result
-
-        if not isinstance(result, TranslatedTranscriptSegment):
-            logger.error(f"Invalid response type for {address}: {type(result)}")
-            raise TypeError(f"Expected TranslatedTranscriptSegment, got {type(result)}")
+            raise ValueError(f"Segment translation failed for {address['languages']} segment {index}") from result
 
-        if target_language not in translated_segments_by_language:
-            translated_segments_by_language[target_language] = []
+        for target_language, result_segments in result.items():
+            if not all(isinstance(segment, TranslatedTranscriptSegment) for segment in result_segments):
+                logger.error(f"Invalid response type for {address}: {[type(segment) for segment in result_segments]}")
+                raise TypeError(
+                    f"Expected TranslatedTranscriptSegment, got {[type(segment) for segment in result_segments]}")
 
-        try:
-            translated_segments_by_language[target_language].append(result)
-            if len(translated_segments_by_language[target_language]) != index + 1:
+            translated_segments_by_language.setdefault(target_language, []).extend(result_segments)
+            if len(translated_segments_by_language[target_language]) != index + len(result_segments):
+                logger.error(f"Error processing {address}: index mismatch in {target_language} at index {index}")
                 raise ValueError(f"Index mismatch in {target_language} at index {index}")
-        except Exception as e:
-            logger.error(f"Error processing {address}: {str(e)}")
-            raise
 
-    return segment_prompts_by_language, translated_segments_by_language
+    return ({language: [str(prompt) for prompt in prompts]
+             for language_group, prompts in sent_prompts_by_language_group.items() for language in language_group},
+            translated_segments_by_language)
@@ -0,0 +1,179 @@
+import logging
+from typing import Any
+
+from openai.types.audio import TranscriptionVerbose
+
+from skellysubs.core.translation.language_configs.language_configs import LanguageConfig
+from skellysubs.core.translation.models.transcript_models import TranslatedTranscript
+from skellysubs.core.translation.models.transcript_segment_models import TranslatedTranscriptSegment
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.translation.translation_subtasks.translate_full_text import text_translation
+from skellysubs.core.translation.translation_subtasks.translate_transcript_segments import \
+    transcript_translation, format_segment_requests, translate_segment_request
+from skellysubs.core.translation.translation_subtasks.translation_prompt_layout import log_prompt_token_usage
+from skellysubs.core.translation.translation_task_graph import TranslationTaskGraph, DEFAULT_MAX_CONCURRENT_NODES
+
+logger = logging.getLogger(__name__)
+
+
+async def translate_transcript_to_languages(transcript: TranscriptionVerbose,
+                                            target_languages: dict[LanguageNameString, LanguageConfig],
+                                            context_window_segments: int | None = None,
+                                            batch_segments: bool = False,
+                                            multi_language: bool = False,
+                                            max_concurrent_nodes: int = DEFAULT_MAX_CONCURRENT_NODES,
+                                            ) -> tuple[dict[LanguageNameString, TranslatedTranscript],
+                                                       dict[LanguageNameString, list[str]]]:
+    """
+    Full-text translation followed by segment-level translation, for every target language.
+
+    `context_window_segments` limits each request's context to that many neighboring sections instead of the whole text,
+    `batch_segments` packs consecutive segments into shared requests, and `multi_language` asks for several target
+    languages per request.
+
+    Each language moves on to its segments as soon as its own full text is done (see `TranslationTaskGraph`), except in
+    `multi_language` mode, where languages share requests and so go through each stage together.
+
+    Returns the translated transcripts and the segment-level prompts, both keyed by language
+    """
+    for segment in transcript.segments:
+        if len(segment.text) == 0:
+            segment.text = "..."
+
+    if multi_language:
+        translated_transcripts, segment_prompts_by_language = await _translate_languages_stage_by_stage(
+            transcript=transcript,
+            target_languages=target_languages,
+            context_window_segments=context_window_segments,
+            batch_segments=batch_segments)
+    else:
+        translated_transcripts, segment_prompts_by_language = await _translate_languages_independently(
+            transcript=transcript,
+            target_languages=target_languages,
+            context_window_segments=context_window_segments,
+            batch_segments=batch_segments,
+            max_concurrent_nodes=max_concurrent_nodes)
+    return translated_transcripts, segment_prompts_by_language
+
+
+async def _translate_languages_independently(transcript: TranscriptionVerbose,
+                                             target_languages: dict[LanguageNameString, LanguageConfig],
+                                             context_window_segments: int | None,
+                                             batch_segments: bool,
+                                             max_concurrent_nodes: int,
+                                             ) -> tuple[dict[LanguageNameString, TranslatedTranscript],
+                                                        dict[LanguageNameString, list[str]]]:
+    """
+    One task graph for all languages: `<language>/full_text` -> `<language>/segment_plan` -> one
+    `<language>/segments/<first>-<last>` node per request -> `<language>/transcript`
+    """
+    task_graph = TranslationTaskGraph(max_concurrent_nodes=max_concurrent_nodes)
+
+    def add_language_nodes(language: LanguageNameString, language_config: LanguageConfig) -> None:
+        full_text_node = f"{language}/full_text"
+        segment_plan_node = f"{language}/segment_plan"
+        transcript_node = f"{language}/transcript"
+
+        async def translate_full_text(_: dict[str, Any]):
+            _, full_text_translations = await text_translation(text=transcript.text,
+                                                               original_language=transcript.language,
+                                                               target_languages={language: language_config},
+                                                               context_window_segments=context_window_segments)
+            if language not in full_text_translations:
+                raise ValueError(f"Full-text translation failed for {language}")
+            return full_text_translations[language]
+
+        async def plan_segment_requests(inputs: dict[str, Any]) -> list[str]:
+            """
+            The segment requests depend on the translated full text, so their nodes are only added once it's known
+            """
+            segment_prompts, request_prompts = format_segment_requests(target_language=language_config,
+                                                                       original_language=transcript.language,
+                                                                       original_full_text=transcript.text,
+                                                                       translated_full_text=inputs[full_text_node],
+                                                                       segments=transcript.segments,
+                                                                       context_window_segments=context_window_segments,
+                                                                       batch_segments=batch_segments)
+            log_prompt_token_usage(prompts_by_language={language: [prompt for _, prompt in request_prompts]},
+                                   label="Segment-level translation")
+
+            segment_nodes = []
+            for segment_batch, request_prompt in request_prompts:
+                segment_nodes.append(task_graph.add_node(
+                    name=f"{language}/segments/{segment_batch.start + 1}-{segment_batch.stop}",
+                    run=make_segment_translator(segment_batch=segment_batch,
+                                                request_prompt=request_prompt,
+                                                segment_prompts=segment_prompts),
+                    dependencies=[segment_plan_node]).name)
+            task_graph.add_node(name=transcript_node,
+                                run=assemble_transcript,
+                                dependencies=[full_text_node, *segment_nodes])
+            return [str(prompt) for _, prompt in request_prompts]
+
+        def make_segment_translator(segment_batch: range, request_prompt, segment_prompts):
+            async def translate_segments(_: dict[str, Any]) -> list[TranslatedTranscriptSegment]:
+                try:
+                    return await translate_segment_request(segment_batch=segment_batch,
+                                                           request_prompt=request_prompt,
+                                                           segment_prompts=segment_prompts,
+                                                           batch_segments=batch_segments)
+                except Exception as e:
+                    raise ValueError(f"Segment translation failed for {language} segment {segment_batch.start}") from e
+
+            return translate_segments
+
+        async def assemble_transcript(inputs: dict[str, Any]) -> TranslatedTranscript:
+            # segment node names were added in segment order, and dicts keep insertion order
+            translated_segments = [segment for name, segments in inputs.items() if name != full_text_node
+                                   for segment in segments]
+            if len(translated_segments) != len(transcript.segments):
+                raise ValueError(f"Expected {len(transcript.segments)} {language} segments, "
+                                 f"got {len(translated_segments)}")
+            return TranslatedTranscript(original_language=transcript.language,
+                                        original_full_text=transcript.text,
+                                        translated_language_config=language_config,
+                                        translated_full_text=inputs[full_text_node],
+                                        translated_segments=translated_segments)
+
+        task_graph.add_node(name=full_text_node, run=translate_full_text)
+        task_graph.add_node(name=segment_plan_node, run=plan_segment_requests, dependencies=[full_text_node])
+
+    for language, language_config in target_languages.items():
+        add_language_nodes(language=language, language_config=language_config)
+
+    results = await task_graph.run()
+    return ({language: results[f"{language}/transcript"] for language in target_languages},
+            {language: results[f"{language}/segment_plan"] for language in target_languages})
+
+
+async def _translate_languages_stage_by_stage(transcript: TranscriptionVerbose,
+                                              target_languages: dict[LanguageNameString, LanguageConfig],
+                                              context_window_segments: int | None,
+                                              batch_segments: bool,
+                                              ) -> tuple[dict[LanguageNameString, TranslatedTranscript],
+                                                         dict[LanguageNameString, list[str]]]:
+    full_text_prompts, full_text_translations = await text_translation(text=transcript.text,
+                                                                       target_languages=target_languages,
+                                                                       original_language=transcript.language,
+                                                                       context_window_segments=context_window_segments,
+                                                                       multi_language=True)
+
+    segment_prompts_by_language, translated_segments_by_language = await transcript_translation(
+        original_transcript=transcript,
+        full_text_translations=full_text_translations,
+        target_languages=target_languages,
+        context_window_segments=context_window_segments,
+        batch_segments=batch_segments,
+    )
+
+    translated_transcripts = {}
+    for language, language_config in target_languages.items():
+        translated_transcripts[language] = TranslatedTranscript(original_language=transcript.language,
+                                                                original_full_text=transcript.text,
+                                                                translated_language_config=language_config,
+                                                                translated_full_text=full_text_translations[
+                                                                    language],
+                                                                translated_segments=translated_segments_by_language[
+                                                                    language]
+                                                                )
+    return translated_transcripts, segment_prompts_by_language
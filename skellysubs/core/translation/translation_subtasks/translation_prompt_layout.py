@@ -0,0 +1,75 @@
+import logging
+from dataclasses import dataclass
+
+from skellysubs.ai_clients.token_estimation import estimate_token_count
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_WINDOW_TEMPLATE = """
+Here are the neighboring sections of the text, for context only (do NOT translate these):
+
+NEIGHBORING SECTIONS START:
+{neighboring_sections}
+NEIGHBORING SECTIONS END
+
+"""
+
+
+@dataclass(frozen=True)
+class TranslationPrompt:
+    """
+    A request split into a `system_prompt` that is byte-identical for every request sharing the same context (so the
+    provider's prompt cache can reuse it) and a `user_input` holding only what changes from request to request
+    """
+    system_prompt: str
+    user_input: str
+    system_prompt_tokens: int
+    user_input_tokens: int
+
+    @classmethod
+    def create(cls, system_prompt: str, user_input: str) -> "TranslationPrompt":
+        return cls(system_prompt=system_prompt,
+                   user_input=user_input,
+                   system_prompt_tokens=estimate_token_count(system_prompt),
+                   user_input_tokens=estimate_token_count(user_input))
+
+    @property
+    def total_tokens(self) -> int:
+        return self.system_prompt_tokens + self.user_input_tokens
+
+    def __str__(self) -> str:
+        return f"{self.system_prompt}\n\n{self.user_input}"
+
+
+def format_context_window(sections: list[str], index: int, window_size: int, last_index: int | None = None) -> str:
+    """
+    The `window_size` sections on either side of `sections[index]` (or of `sections[index:last_index + 1]`), labelled
+    with their section numbers
+    """
+    last_index = index if last_index is None else last_index
+    window_start, window_end = max(index - window_size, 0), min(last_index + window_size + 1, len(sections))
+    neighboring_sections = "\n".join(f"[Section# {neighbor_index + 1}] {sections[neighbor_index]}"
+                                     for neighbor_index in range(window_start, window_end)
+                                     if not index <= neighbor_index <= last_index)
+    if not neighboring_sections:
+        return ""
+    return CONTEXT_WINDOW_TEMPLATE.format(neighboring_sections=neighboring_sections)
+
+
+def log_prompt_token_usage(prompts_by_language: dict[LanguageNameString, list[TranslationPrompt]],
+                           label: str) -> None:
+    prompts = [prompt for language_prompts in prompts_by_language.values() for prompt in language_prompts]
+    if not prompts:
+        return
+    total_tokens = sum(prompt.total_tokens for prompt in prompts)
+    # every repeat of an already-sent system prompt is a prefix the provider can serve from its prompt cache
+    unique_system_prompts = {prompt.system_prompt: prompt.system_prompt_tokens for prompt in prompts}
+    repeated_prefix_tokens = (sum(prompt.system_prompt_tokens for prompt in prompts)
+                              - sum(unique_system_prompts.values()))
+    logger.info(f"{label}: {len(prompts)} requests, ~{total_tokens} input tokens "
+                f"(~{total_tokens // len(prompts)} per request), ~{repeated_prefix_tokens} of them in repeated "
+                f"system prompt prefixes ({len(unique_system_prompts)} distinct)")
+    for prompt_number, prompt in enumerate(prompts):
+        logger.trace(f"{label} request #{prompt_number}: {prompt.system_prompt_tokens} system + "
+                     f"{prompt.user_input_tokens} user input tokens")
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_NODES = 64
+
+NodeRunner = Callable[[dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class TranslationTaskNode:
+    """
+    One unit of work in a `TranslationTaskGraph`, e.g. one language's full-text translation or one segment batch
+    """
+    name: str
+    run: NodeRunner
+    dependencies: tuple[str, ...] = ()
+    result: Any = None
+    error: Exception | None = None
+    ready_at: float | None = None  # all dependencies finished
+    started_at: float | None = None  # got a concurrency slot
+    finished_at: float | None = None
+
+    @property
+    def wait_seconds(self) -> float | None:
+        if self.ready_at is None or self.started_at is None:
+            return None
+        return self.started_at - self.ready_at
+
+    @property
+    def run_seconds(self) -> float | None:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class TranslationTaskGraph:
+    """
+    Runs each node as soon as its own dependencies have finished, instead of stage-wide barriers - at most
+    `max_concurrent_nodes` at a time.
+
+    A node's `run` is called with its dependencies' results keyed by name, and may add more nodes while the graph is
+    running (e.g. one per segment batch, once a language's full text is known). Dependencies must be added before the
+    nodes that use them, so the graph can't have cycles.
+
+    If a node fails, every other node is cancelled and `run` raises that node's error.
+    """
+
+    def __init__(self, max_concurrent_nodes: int = DEFAULT_MAX_CONCURRENT_NODES):
+        self.max_concurrent_nodes = max_concurrent_nodes
+        self.nodes: dict[str, TranslationTaskNode] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+        self._started_at: float | None = None
+        self._finished_at: float | None = None
+
+    def __str__(self) -> str:
+        finished_nodes = [node for node in self.nodes.values() if node.finished_at is not None]
+        wall_seconds = (self._finished_at or time.perf_counter()) - self._started_at if self._started_at else 0.0
+        return (f"Translation task graph - {len(finished_nodes)}/{len(self.nodes)} nodes finished in "
+                f"{wall_seconds:.2f}s (critical path {self.critical_path_seconds():.2f}s, "
+                f"{sum(node.run_seconds for node in finished_nodes):.2f}s of node time, "
+                f"{sum(node.wait_seconds or 0.0 for node in finished_nodes):.2f}s waiting for a slot)")
+
+    def add_node(self,
+                 name: str,
+                 run: NodeRunner,
+                 dependencies: tuple[str, ...] | list[str] = ()) -> TranslationTaskNode:
+        if name in self.nodes:
+            raise ValueError(f"Duplicate task graph node: {name}")
+        unknown_dependencies = [dependency for dependency in dependencies if dependency not in self.nodes]
+        if unknown_dependencies:
+            raise ValueError(f"Task graph node {name} depends on unknown nodes: {unknown_dependencies}")
+        node = TranslationTaskNode(name=name, run=run, dependencies=tuple(dependencies))
+        self.nodes[name] = node
+        if self._semaphore is not None:
+            self._launch(node)
+        return node
+
+    async def run(self) -> dict[str, Any]:
+        """
+        Run every node (including ones added along the way) and return their results keyed by name
+        """
+        if self._semaphore is not None:
+            raise RuntimeError("Task graph is already running")
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_nodes)
+        self._started_at = time.perf_counter()
+        for node in list(self.nodes.values()):
+            self._launch(node)
+        try:
+            # loop, since running nodes can add new ones
+            while pending_tasks := [task for task in self._tasks.values() if not task.done()]:
+                done_tasks, _ = await asyncio.wait(pending_tasks, return_when=asyncio.FIRST_EXCEPTION)
+                failed_nodes = [node for node in self.nodes.values() if node.error is not None]
+                if failed_nodes:
+                    failed_node = min(failed_nodes, key=lambda node: node.finished_at)
+                    logger.error(f"Task graph node {failed_node.name} failed - cancelling the remaining nodes")
+                    raise failed_node.error
+                if any(task.cancelled() for task in done_tasks):
+                    raise asyncio.CancelledError("Task graph node cancelled")
+        finally:
+            self.cancel()
+            # let cancelled nodes finish unwinding (and retrieve their exceptions)
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._finished_at = time.perf_counter()
+            self._semaphore = None
+            logger.info(self)
+        self.log_slowest_nodes()
+        return {name: node.result for name, node in self.nodes.items()}
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
+    def critical_path_seconds(self) -> float:
+        """
+        The longest chain of (finished) node run times - the wall time the graph would take with unlimited concurrency
+        """
+        path_seconds: dict[str, float] = {}
+        # nodes were added after their dependencies, so insertion order is a topological order
+        for name, node in self.nodes.items():
+            path_seconds[name] = (node.run_seconds or 0.0) + max((path_seconds[dependency]
+                                                                  for dependency in node.dependencies), default=0.0)
+        return max(path_seconds.values(), default=0.0)
+
+    def log_slowest_nodes(self, count: int = 5) -> None:
+        finished_nodes = sorted((node for node in self.nodes.values() if node.run_seconds is not None),
+                                key=lambda node: node.run_seconds, reverse=True)
+        for node in finished_nodes[:count]:
+            logger.debug(f"Task graph node {node.name}: ran {node.run_seconds:.2f}s "
+                         f"(waited {node.wait_seconds:.2f}s for a slot)")
+
+    def _launch(self, node: TranslationTaskNode) -> None:
+        self._tasks[node.name] = asyncio.create_task(self._run_node(node), name=f"translation_task_graph:{node.name}")
+
+    async def _run_node(self, node: TranslationTaskNode) -> Any:
+        if node.dependencies:
+            # a failed dependency fails this node too - but `run` reports (and cancels on) the original error
+            await asyncio.gather(*[self._tasks[dependency] for dependency in node.dependencies])
+        node.ready_at = time.perf_counter()
+        async with self._semaphore:
+            node.started_at = time.perf_counter()
+            try:
+                node.result = await node.run({dependency: self.nodes[dependency].result
+                                              for dependency in node.dependencies})
+            except Exception as e:
+                node.error = e
+                raise
+            finally:
+                node.finished_at = time.perf_counter()
+            logger.trace(f"Task graph node {node.name} finished in {node.run_seconds:.2f}s")
+        return node.result
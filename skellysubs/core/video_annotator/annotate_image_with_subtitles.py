@@ -0,0 +1,83 @@
+from PIL import ImageDraw
+
+from skellysubs.core.translation.language_configs.annotation_configs import LanguageAnnotationConfig, \
+    get_config_render_settings
+from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.video_annotator.shaped_text_cache import shape_segment_text
+from skellysubs.core.video_annotator.subtitle_layout import SubtitleLayout, layout_subtitle_text
+
+
+def draw_subtitle_layout(image_annotator: ImageDraw,
+                         layout: SubtitleLayout,
+                         config: LanguageAnnotationConfig,
+                         highlighted_word_index: int) -> None:
+    """
+    Pure draw step - every position was already computed by the layout engine
+    """
+    for word in layout.words:
+        if word.word_index == highlighted_word_index:
+            image_annotator.text((word.x, word.y),
+                                 text=word.text,
+                                 fill=config.color,
+                                 font=word.font,
+                                 stroke_width=14,
+                                 stroke_fill=(0, 255, 0),
+                                 align="left"
+                                 )
+            image_annotator.text((word.x, word.y),
+                                 text=word.text,
+                                 fill=config.color,
+                                 font=word.font,
+                                 stroke_width=10,
+                                 stroke_fill=(0, 0, 255),
+                                 align="left"
+                                 )
+
+        # Standard text annotate the word happens each loop)
+        image_annotator.text((word.x, word.y),
+                             text=word.text,
+                             fill=config.color,
+                             font=word.font,
+                             stroke_width=6,
+                             stroke_fill=(11, 11, 11),
+                             align="left"
+                             )
+        image_annotator.text((word.x, word.y),
+                             text=word.text,
+                             fill=config.color,
+                             font=word.font,
+                             stroke_width=1,
+                             stroke_fill=config.color,
+                             align="left"
+                             )
+
+
+def annotate_image_with_subtitles(language_name: LanguageNameString,
+                                  config: LanguageAnnotationConfig,
+                                  image_annotator: ImageDraw,
+                                  current_segment: TranslatedTranscriptSegmentWithMatchedWords,
+                                  highlighted_word_index: int,
+                                  multiline_y_start: int,
+                                  video_width: int,
+                                  video_height: int,
+                                  layout: SubtitleLayout | None = None,
+                                  ) -> int:
+    """
+    Pass a precomputed `layout` (e.g. cached per segment by the overlay compositor) to skip shaping and layout
+    """
+    if layout is None:
+        render_settings = get_config_render_settings(language_name=language_name,
+                                                     config=config,
+                                                     image_height=video_height)
+        layout = layout_subtitle_text(render_settings=render_settings,
+                                      shaped_text=shape_segment_text(current_segment=current_segment,
+                                                                     language_name=language_name,
+                                                                     right_to_left=render_settings.right_to_left),
+                                      multiline_y_start=multiline_y_start,
+                                      video_width=video_width)
+    draw_subtitle_layout(image_annotator=image_annotator,
+                         layout=layout,
+                         config=config,
+                         highlighted_word_index=highlighted_word_index)
+    return layout.next_multiline_y_start
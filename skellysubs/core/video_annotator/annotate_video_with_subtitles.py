@@ -1,35 +1,54 @@
 import logging
 from pathlib import Path
+from typing import Mapping
 
 import cv2
-from PIL import Image, ImageDraw
-from arabic_reshaper import arabic_reshaper
-from bidi.algorithm import get_display
 from tqdm import tqdm
 
-from skellysubs.core.translation.language_configs.annotation_configs import get_annotation_configs, \
-    LanguageAnnotationConfig, get_default_text_height, get_default_font
+from skellysubs.core.translation.language_configs.annotation_configs import LanguageAnnotationConfig
 from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords
-from skellysubs.core.translation.models.translated_transcript_model import \
-    OldTranslatedTranscription
 from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.video_annotator.frame_pipeline import FramePipeline
+from skellysubs.core.video_annotator.parallel_annotate_video import annotate_video_with_subtitles_in_parallel
+from skellysubs.core.video_annotator.subtitle_frame_annotator import SubtitleFrameAnnotator
 from skellysubs.core.video_annotator.video_reader_writer_methods import \
     create_video_reader_and_writer, write_frame_to_video_file, finish_video_and_attach_audio_from_original
 
 logger = logging.getLogger(__name__)
 
-SUBTITLES_TOP_BUFFER_RATIO = 0.4
-SUBTITLES_BOTTOM_BUFFER_RATIO = 0.2
-SUBTITLES_SIDE_BUFFER_RATIO = 0.05
-NEWLINE_RATIO = 1.25
-
 
 def annotate_video_with_subtitles(video_path: str,
-                                  translated_transcript: OldTranslatedTranscription,
+                                  segments: list[TranslatedTranscriptSegmentWithMatchedWords],
                                   subtitled_video_path: str,
                                   show_while_annotating: bool = True,
-                                  transpose_for_vertical_video: bool = True
+                                  transpose_for_vertical_video: bool = False,
+                                  stream_to_ffmpeg: bool = True,
+                                  pipelined: bool = False,
+                                  use_sprite_atlas: bool = False,
+                                  annotation_configs: Mapping[LanguageNameString, LanguageAnnotationConfig] | None = None,
+                                  parallel: bool = False,
+                                  number_of_workers: int | None = None,
                                   ) -> None:
+    """
+    If `pipelined` is True, decoding, annotating, and encoding run concurrently in separate threads
+    (see `FramePipeline`) - the live preview window is not available in that mode.
+    If `use_sprite_atlas` is True, subtitle overlays are assembled from cached word sprites (see `WordSpriteAtlas`).
+    `annotation_configs` picks the languages to draw (defaults to the language configs yaml).
+    If `parallel` is True, keyframe-aligned chunks of the video are annotated in `number_of_workers` processes (see
+    `annotate_video_with_subtitles_in_parallel`) - always streamed to ffmpeg, with no live preview.
+    """
+    if parallel:
+        if show_while_annotating or pipelined:
+            logger.warning("`show_while_annotating` and `pipelined` are not supported in parallel mode - ignoring them")
+        annotate_video_with_subtitles_in_parallel(video_path=video_path,
+                                                  segments=segments,
+                                                  subtitled_video_path=subtitled_video_path,
+                                                  transpose_for_vertical_video=transpose_for_vertical_video,
+                                                  number_of_workers=number_of_workers,
+                                                  use_sprite_atlas=use_sprite_atlas,
+                                                  annotation_configs=annotation_configs)
+        return
+
     (no_audio_video_path,
      video_height,
      video_reader,
@@ -37,11 +56,25 @@ def annotate_video_with_subtitles(video_path: str,
      video_writer) = create_video_reader_and_writer(
         og_video_path=video_path,
         subtitled_video_output_path=subtitled_video_path,
-        transpose_for_vertical_video=transpose_for_vertical_video
+        transpose_for_vertical_video=transpose_for_vertical_video,
+        stream_to_ffmpeg=stream_to_ffmpeg
     )
 
     video_number_of_frames = int(video_reader.get(cv2.CAP_PROP_FRAME_COUNT))
+    frame_annotator = SubtitleFrameAnnotator(segments=segments,
+                                             video_width=video_width,
+                                             video_height=video_height,
+                                             use_sprite_atlas=use_sprite_atlas,
+                                             annotation_configs=annotation_configs)
     try:
+        if pipelined:
+            if show_while_annotating:
+                logger.warning("`show_while_annotating` is not supported in pipelined mode - not showing preview")
+            FramePipeline(video_reader=video_reader,
+                          video_writer=video_writer,
+                          annotate_frame=frame_annotator.annotate_frame).run(number_of_frames=video_number_of_frames)
+            return
+
         # Go through each frame of the video and annotate it with the translated words based on their timestamps
         for frame_number in tqdm(range(video_number_of_frames),
                                  desc="Annotating video with subtitles",
@@ -54,37 +87,15 @@ def annotate_video_with_subtitles(video_path: str,
             # image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE    )
             if not read_success or not video_reader.isOpened():
                 break
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
             frame_number += 1
 
             frame_timestamp = video_reader.get(
                 cv2.CAP_PROP_POS_MSEC) / 1000  # seconds - internally based on frame# times  *presumed* frame duration based on specified framerate
-            pil_image = Image.fromarray(image)
-            image_annotator = ImageDraw.Draw(pil_image)
-
-            current_segment_and_matched_word = translated_transcript.get_matched_segment_and_word_at_timestamp(
-                frame_timestamp)
 
-            current_segment = current_segment_and_matched_word.current_segment
-            multiline_y_start = int(video_height * SUBTITLES_TOP_BUFFER_RATIO)
-            for language_name, config in get_annotation_configs().items():
-                if "english" in language_name.lower():
-                    highlighted_word_index = current_segment_and_matched_word.current_word_index
-                else:
-                    highlighted_word_index = current_segment_and_matched_word.get_matched_word_index_by_language(
-                        language_name)
-
-                multiline_y_start = annotate_image_with_subtitles(language_name=language_name,
-                                                                  config=config,
-                                                                  image_annotator=image_annotator,
-                                                                  multiline_y_start=multiline_y_start,
-                                                                  current_segment=current_segment,
-                                                                  highlighted_word_index=highlighted_word_index,
-                                                                  video_width=video_width,
-                                                                  video_height=video_height)
+            image = frame_annotator.annotate_frame(image=image, frame_timestamp=frame_timestamp)
 
-            image = write_frame_to_video_file(pil_image=pil_image,
-                                              video_writer=video_writer)
+            write_frame_to_video_file(image=image,
+                                      video_writer=video_writer)
 
             if show_while_annotating:
                 max_length = 720
@@ -100,106 +111,12 @@ def annotate_video_with_subtitles(video_path: str,
         logger.exception(f"Error while annotating video: {e}")
         raise
     finally:
+        logger.info(f"Rendered {frame_annotator.compositor.render_count} subtitle overlays "
+                    f"for {frame_annotator.compositor.composite_count} frames")
         video_reader.release()
         video_writer.release()
-        finish_video_and_attach_audio_from_original(original_video_path=video_path,
-                                                    no_audio_video_path=no_audio_video_path,
-                                                    subtitled_video_path=subtitled_video_path)
+        if no_audio_video_path is not None:
+            finish_video_and_attach_audio_from_original(original_video_path=video_path,
+                                                        no_audio_video_path=no_audio_video_path,
+                                                        subtitled_video_path=subtitled_video_path)
         cv2.destroyAllWindows()
-
-
-def annotate_image_with_subtitles(language_name: LanguageNameString,
-                                  config: LanguageAnnotationConfig,
-                                  image_annotator: ImageDraw,
-                                  current_segment: TranslatedTranscriptSegmentWithMatchedWords,
-                                  highlighted_word_index: int,
-                                  multiline_y_start: int,
-                                  video_width: int,
-                                  video_height: int,
-                                  ) -> int:
-    right_to_left: bool = "arabic" in language_name.lower()
-    current_y = multiline_y_start
-    text_height = get_default_text_height(image_height=video_height)
-    horizontal_buffer = int(video_width * SUBTITLES_SIDE_BUFFER_RATIO)
-    if right_to_left:
-        current_x = video_width - horizontal_buffer * 4
-    else:
-        current_x = horizontal_buffer
-
-    translated_words_list, romanized_words_list = current_segment.get_word_list_by_language(language_name)
-
-    if "arabic" in language_name.lower():
-        translated_words_list = [get_display(arabic_reshaper.reshape(word)) for word in translated_words_list]
-
-    language_font = config.get_font(image_height=video_height)
-    for word_type, words_list in zip(('translated', 'romanized'), [translated_words_list, romanized_words_list]):
-        if not words_list:
-            continue
-
-        for word_index, word in enumerate(words_list):
-
-            _, _, text_width, text_height = language_font.getbbox(word + " ")
-
-            # initialize stuff romanization run
-            if word_index == 0 and word_type == 'romanized':
-                language_font = get_default_font(image_height=video_height)
-                right_to_left = False
-                current_x = horizontal_buffer
-                current_y += int(text_height * NEWLINE_RATIO)
-            if word_index == highlighted_word_index:
-                image_annotator.text((current_x if not right_to_left else current_x - text_width,
-                                      current_y),
-                                     text=word,
-                                     fill=config.color,
-                                     font=language_font,
-                                     stroke_width=14,
-                                     stroke_fill=(0, 255, 0),
-                                     align="left"
-                                     )
-                image_annotator.text((current_x if not right_to_left else current_x - text_width,
-                                      current_y),
-                                     text=word,
-                                     fill=config.color,
-                                     font=language_font,
-                                     stroke_width=10,
-                                     stroke_fill=(0, 0, 255),
-                                     align="left"
-                                     )
-
-            # Standard text annotate the word happens each loop)
-            image_annotator.text((current_x if not right_to_left else current_x - text_width,
-                                  current_y),
-                                 text=word,
-                                 fill=config.color,
-                                 font=language_font,
-                                 stroke_width=6,
-                                 stroke_fill=(11, 11, 11),
-                                 align="left"
-                                 )
-            image_annotator.text((current_x if not right_to_left else current_x - text_width,
-                                  current_y),
-                                 text=word,
-                                 fill=config.color,
-                                 font=language_font,
-                                 stroke_width=1,
-                                 stroke_fill=config.color,
-                                 align="left"
-                                 )
-
-            # increment x cursor position
-            if right_to_left:
-                current_x -= text_width
-            else:
-                current_x += text_width
-            # Check if should bump to next line
-            if right_to_left:
-                if current_x - text_width < horizontal_buffer:
-                    current_y += text_height
-                    current_x = video_width - horizontal_buffer * 4
-
-            else:
-                if current_x + text_width > video_width - horizontal_buffer * 4:
-                    current_y += text_height
-                    current_x = horizontal_buffer
-
-    return current_y + text_height * NEWLINE_RATIO * 1.5
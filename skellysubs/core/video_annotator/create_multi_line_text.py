@@ -1,30 +1,41 @@
+from functools import lru_cache
+
 import jieba
 from PIL import ImageFont
 
+from skellysubs.core.translation.language_configs.annotation_configs import get_text_length
+from skellysubs.core.video_annotator.subtitle_layout import break_words_into_lines
+
+CHINESE_SEGMENTATION_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CHINESE_SEGMENTATION_CACHE_SIZE)
+def segment_chinese_text(text: str) -> tuple[str, ...]:
+    """
+    Cached jieba word segmentation - the same segment text is laid out over and over while it is on screen
+    """
+    return tuple(jieba.cut(text))
+
 
 def create_multiline_text_chinese(text: str, font: ImageFont, screen_width: int, buffer: int) -> str:
     """
     Break a long string of Chinese text into multiple lines of text that fit within the screen width.
     Uses jieba for segmentation.
     """
-    words = list(jieba.cut(text))
-    lines = []
-    current_line = ""
-    for word in words:
-        if font.getlength(current_line + word) + 2 * buffer < screen_width:
-            current_line += word
-        else:
-            lines.append(current_line)
-            current_line = word
-    lines.append(current_line)
-    return '\n'.join(lines)
+    words = segment_chinese_text(text)
+    lines = break_words_into_lines(words=words,
+                                   word_widths=[get_text_length(font, word) for word in words],
+                                   separator_width=0,
+                                   max_line_width=screen_width - 2 * buffer)
+    return '\n'.join(''.join(line) for line in lines)
 
 
 def create_multiline_text(text: str, font: ImageFont, screen_width: int, buffer: int) -> str:
     """
     Break a long string into multiple lines of text that fit within the screen width by inserting `\n` characters
     at appropriate locations. to ensure the text will fit within the screen width with `buffer` pixels of padding on each side.
-    will use `font.getlength('word1 + ' + 'word2' ...) method to determine when to break lines.
+    Each word is measured once with `font.getlength` and line widths are accumulated, so this is linear in the
+    number of words.
 
     :param text: The text to break into multiple lines
     :param font: The font to use for the text
@@ -32,13 +43,8 @@ def create_multiline_text(text: str, font: ImageFont, screen_width: int, buffer:
     :param buffer: The number of pixels of padding to leave on each side of the text
     """
     words = text.split()
-    lines = []
-    current_line = ""
-    for word in words:
-        if font.getlength(current_line + ' ' + word) + 2 * buffer < screen_width:
-            current_line += ' ' + word
-        else:
-            lines.append(current_line)
-            current_line = word
-    lines.append(current_line)
-    return '\n'.join(lines)
+    lines = break_words_into_lines(words=words,
+                                   word_widths=[get_text_length(font, word) for word in words],
+                                   separator_width=get_text_length(font, ' '),
+                                   max_line_width=screen_width - 2 * buffer)
+    return '\n'.join(' '.join(line) for line in lines)
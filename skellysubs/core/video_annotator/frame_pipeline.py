@@ -0,0 +1,154 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+from skellysubs.core.video_annotator.video_reader_writer_methods import FfmpegPipeVideoWriter, \
+    write_frame_to_video_file
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUED_FRAMES = 32
+QUEUE_POLL_INTERVAL_SECONDS = 0.1
+
+_END_OF_STREAM = None
+
+
+@dataclass
+class PipelineStageStats:
+    name: str
+    frames_processed: int = 0
+    busy_seconds: float = 0.0
+    waiting_seconds: float = 0.0  # time spent blocked on an empty input queue or a full output queue
+
+    @property
+    def frames_per_second(self) -> float:
+        if self.busy_seconds == 0:
+            return 0.0
+        return self.frames_processed / self.busy_seconds
+
+    def __str__(self) -> str:
+        return (f"{self.name}: {self.frames_processed} frames, {self.frames_per_second:.1f} fps while busy, "
+                f"busy {self.busy_seconds:.1f}s, waiting {self.waiting_seconds:.1f}s")
+
+
+class FramePipeline:
+    """
+    Three-stage decode -> annotate -> encode pipeline, with one thread per stage connected by bounded queues.
+
+    The bounded queues provide backpressure (a fast decoder blocks instead of buffering the whole video in memory).
+    cv2 and ffmpeg release the GIL while decoding/encoding, so the stages genuinely overlap on multi-core machines.
+    """
+
+    def __init__(self,
+                 video_reader: cv2.VideoCapture,
+                 video_writer: cv2.VideoWriter | FfmpegPipeVideoWriter,
+                 annotate_frame: Callable[[np.ndarray, float], np.ndarray],
+                 max_queued_frames: int = DEFAULT_MAX_QUEUED_FRAMES):
+        self.video_reader = video_reader
+        self.video_writer = video_writer
+        self.annotate_frame = annotate_frame
+        self._decoded_frames: queue.Queue = queue.Queue(maxsize=max_queued_frames)
+        self._annotated_frames: queue.Queue = queue.Queue(maxsize=max_queued_frames)
+        self._stop_event = threading.Event()
+        self._errors: list[BaseException] = []
+        self.stats = {name: PipelineStageStats(name=name) for name in ("decode", "annotate", "encode")}
+
+    def run(self, number_of_frames: int) -> dict[str, PipelineStageStats]:
+        threads = [
+            threading.Thread(target=self._run_stage, args=(self._decode_stage, number_of_frames),
+                             name="FramePipeline-decode", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._annotate_stage,),
+                             name="FramePipeline-annotate", daemon=True),
+            threading.Thread(target=self._run_stage, args=(self._encode_stage, number_of_frames),
+                             name="FramePipeline-encode", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for stage_stats in self.stats.values():
+            logger.info(f"Frame pipeline stage - {stage_stats}")
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
+
+    def _run_stage(self, stage: Callable, *args) -> None:
+        try:
+            stage(*args)
+        except BaseException as e:
+            logger.exception(f"Error in frame pipeline stage `{threading.current_thread().name}`: {e}")
+            self._errors.append(e)
+            self._stop_event.set()
+
+    def _put(self, target_queue: queue.Queue, item, stage_stats: PipelineStageStats) -> bool:
+        wait_start = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    target_queue.put(item, timeout=QUEUE_POLL_INTERVAL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stage_stats.waiting_seconds += time.perf_counter() - wait_start
+
+    def _get(self, source_queue: queue.Queue, stage_stats: PipelineStageStats):
+        wait_start = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    return source_queue.get(timeout=QUEUE_POLL_INTERVAL_SECONDS)
+                except queue.Empty:
+                    continue
+            return _END_OF_STREAM
+        finally:
+            stage_stats.waiting_seconds += time.perf_counter() - wait_start
+
+    def _decode_stage(self, number_of_frames: int) -> None:
+        stage_stats = self.stats["decode"]
+        try:
+            for _ in range(number_of_frames):
+                busy_start = time.perf_counter()
+                read_success, image = self.video_reader.read()
+                if not read_success:
+                    break
+                frame_timestamp = self.video_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                stage_stats.busy_seconds += time.perf_counter() - busy_start
+                stage_stats.frames_processed += 1
+                if not self._put(self._decoded_frames, (frame_timestamp, image), stage_stats):
+                    return
+        finally:
+            self._put(self._decoded_frames, _END_OF_STREAM, stage_stats)
+
+    def _annotate_stage(self) -> None:
+        stage_stats = self.stats["annotate"]
+        try:
+            while (item := self._get(self._decoded_frames, stage_stats)) is not _END_OF_STREAM:
+                frame_timestamp, image = item
+                busy_start = time.perf_counter()
+                image = self.annotate_frame(image, frame_timestamp)
+                stage_stats.busy_seconds += time.perf_counter() - busy_start
+                stage_stats.frames_processed += 1
+                if not self._put(self._annotated_frames, image, stage_stats):
+                    return
+        finally:
+            self._put(self._annotated_frames, _END_OF_STREAM, stage_stats)
+
+    def _encode_stage(self, number_of_frames: int) -> None:
+        stage_stats = self.stats["encode"]
+        with tqdm(desc="Annotating video with subtitles (pipelined)", total=number_of_frames) as progress_bar:
+            while (image := self._get(self._annotated_frames, stage_stats)) is not _END_OF_STREAM:
+                busy_start = time.perf_counter()
+                write_frame_to_video_file(image=image, video_writer=self.video_writer)
+                stage_stats.busy_seconds += time.perf_counter() - busy_start
+                stage_stats.frames_processed += 1
+                progress_bar.update(1)
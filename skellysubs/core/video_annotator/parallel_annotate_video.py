@@ -0,0 +1,161 @@
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Mapping
+
+import cv2
+
+from skellysubs.core.translation.language_configs.annotation_configs import LanguageAnnotationConfig
+from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.video_annotator.subtitle_frame_annotator import SubtitleFrameAnnotator
+from skellysubs.core.video_annotator.video_reader_writer_methods import FfmpegPipeVideoWriter, \
+    get_output_video_resolution_and_framerate, get_keyframe_timestamps, concatenate_video_chunks_and_attach_audio, \
+    write_frame_to_video_file
+
+logger = logging.getLogger(__name__)
+
+MINIMUM_FRAMES_PER_CHUNK = 300
+
+
+def get_keyframe_aligned_chunk_boundaries(number_of_frames: int,
+                                          keyframe_frame_numbers: list[int],
+                                          number_of_chunks: int) -> list[tuple[int, int]]:
+    """
+    Split `[0, number_of_frames)` into roughly equal `(start_frame, end_frame)` ranges whose start frames all land on
+    keyframes, so each worker can seek straight to its range without decoding from the start of the video
+    """
+    number_of_chunks = max(1, min(number_of_chunks, number_of_frames // MINIMUM_FRAMES_PER_CHUNK))
+    keyframes = sorted({frame for frame in keyframe_frame_numbers if 0 < frame < number_of_frames})
+
+    boundaries = [0]
+    for chunk_number in range(1, number_of_chunks):
+        target_frame = chunk_number * number_of_frames // number_of_chunks
+        if not keyframes:
+            break
+        nearest_keyframe = min(keyframes, key=lambda keyframe: abs(keyframe - target_frame))
+        if nearest_keyframe > boundaries[-1]:
+            boundaries.append(nearest_keyframe)
+    boundaries.append(number_of_frames)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def annotate_video_chunk(video_path: str,
+                         segments: list[TranslatedTranscriptSegmentWithMatchedWords],
+                         chunk_video_path: str,
+                         start_frame: int,
+                         end_frame: int,
+                         video_width: int,
+                         video_height: int,
+                         video_framerate: float,
+                         use_sprite_atlas: bool = False,
+                         annotation_configs: dict[LanguageNameString, LanguageAnnotationConfig] | None = None) -> int:
+    """
+    Annotate frames `[start_frame, end_frame)` of the video into a silent chunk file (runs in a worker process)
+
+    Frame timestamps come from `CAP_PROP_POS_MSEC`, like the serial path, so both show the same subtitles on the same
+    frames (including on variable-framerate sources)
+    """
+    video_reader = cv2.VideoCapture(video_path)
+    video_reader.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    if int(video_reader.get(cv2.CAP_PROP_POS_FRAMES)) != start_frame:
+        # inexact seek - rewind and step forward frame by frame so the chunk starts on exactly `start_frame`
+        logger.warning(f"Seek to frame {start_frame} of {video_path} landed on frame "
+                       f"{int(video_reader.get(cv2.CAP_PROP_POS_FRAMES))} - stepping to it from the start instead")
+        video_reader.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        for _ in range(start_frame):
+            if not video_reader.grab():
+                break
+    video_writer = FfmpegPipeVideoWriter(output_path=chunk_video_path,
+                                         frame_width=video_width,
+                                         frame_height=video_height,
+                                         framerate=video_framerate)
+    frame_annotator = SubtitleFrameAnnotator(segments=segments,
+                                             video_width=video_width,
+                                             video_height=video_height,
+                                             use_sprite_atlas=use_sprite_atlas,
+                                             annotation_configs=annotation_configs)
+    frames_written = 0
+    try:
+        for _ in range(start_frame, end_frame):
+            read_success, image = video_reader.read()
+            if not read_success:
+                break
+            frame_timestamp = video_reader.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            image = frame_annotator.annotate_frame(image=image, frame_timestamp=frame_timestamp)
+            write_frame_to_video_file(image=image, video_writer=video_writer)
+            frames_written += 1
+    finally:
+        video_reader.release()
+        video_writer.release()
+    logger.debug(f"Annotated frames {start_frame}-{end_frame} into {chunk_video_path} "
+                 f"({frame_annotator.compositor.render_count} overlays rendered)")
+    return frames_written
+
+
+def annotate_video_with_subtitles_in_parallel(video_path: str,
+                                              segments: list[TranslatedTranscriptSegmentWithMatchedWords],
+                                              subtitled_video_path: str,
+                                              transpose_for_vertical_video: bool = False,
+                                              number_of_workers: int | None = None,
+                                              use_sprite_atlas: bool = False,
+                                              annotation_configs: Mapping[LanguageNameString,
+                                                                          LanguageAnnotationConfig] | None = None,
+                                              ) -> None:
+    """
+    Multi-process version of `annotate_video_with_subtitles`.
+
+    The video is split into keyframe-aligned frame ranges, each range is annotated and encoded by its own worker
+    process, and the encoded chunks are joined with ffmpeg's concat demuxer (no re-encode) while the original audio
+    is muxed in.
+    """
+    if not Path(video_path).exists() or not Path(video_path).is_file():
+        raise FileNotFoundError(f"File not found: {video_path}")
+    if not subtitled_video_path.endswith('.mp4'):
+        raise ValueError(f"Output path must end with .mp4: {subtitled_video_path}")
+    if number_of_workers is None:
+        number_of_workers = os.cpu_count() or 1
+
+    video_width, video_height, video_framerate = get_output_video_resolution_and_framerate(
+        og_video_path=video_path,
+        transpose_for_vertical_video=transpose_for_vertical_video)
+    video_reader = cv2.VideoCapture(video_path)
+    number_of_frames = int(video_reader.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_reader.release()
+
+    keyframe_frame_numbers = [round(timestamp * video_framerate) for timestamp in get_keyframe_timestamps(video_path)]
+    chunk_boundaries = get_keyframe_aligned_chunk_boundaries(number_of_frames=number_of_frames,
+                                                             keyframe_frame_numbers=keyframe_frame_numbers,
+                                                             number_of_chunks=number_of_workers)
+    logger.info(f"Annotating {number_of_frames} frames in {len(chunk_boundaries)} chunks "
+                f"across {number_of_workers} worker processes")
+
+    chunks_folder = Path(subtitled_video_path).parent / f"{Path(subtitled_video_path).stem}_chunks"
+    chunks_folder.mkdir(parents=True, exist_ok=True)
+    chunk_video_paths = [str(chunks_folder / f"chunk_{chunk_number:04d}.mp4")
+                         for chunk_number in range(len(chunk_boundaries))]
+    try:
+        with ProcessPoolExecutor(max_workers=min(number_of_workers, len(chunk_boundaries))) as executor:
+            futures = [executor.submit(annotate_video_chunk,
+                                       video_path=video_path,
+                                       segments=segments,
+                                       chunk_video_path=chunk_video_path,
+                                       start_frame=start_frame,
+                                       end_frame=end_frame,
+                                       video_width=video_width,
+                                       video_height=video_height,
+                                       video_framerate=video_framerate,
+                                       use_sprite_atlas=use_sprite_atlas,
+                                       # a plain dict, since the cached read-only configs can't be pickled
+                                       annotation_configs=dict(annotation_configs) if annotation_configs else None)
+                       for chunk_video_path, (start_frame, end_frame) in zip(chunk_video_paths, chunk_boundaries)]
+            frames_written = sum(future.result() for future in futures)
+        logger.info(f"Annotated {frames_written} of {number_of_frames} frames - concatenating chunks...")
+
+        concatenate_video_chunks_and_attach_audio(chunk_video_paths=chunk_video_paths,
+                                                  original_video_path=video_path,
+                                                  subtitled_video_path=subtitled_video_path)
+    finally:
+        shutil.rmtree(chunks_folder, ignore_errors=True)
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+from arabic_reshaper import arabic_reshaper
+from bidi.algorithm import get_display
+
+from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+
+DEFAULT_MAX_CACHED_SHAPED_SEGMENTS = 64
+
+
+@dataclass(frozen=True)
+class ShapedSegmentText:
+    """
+    The display-ready words of one segment in one language - right-to-left scripts are already reshaped and
+    reordered with the bidi algorithm. The words are the translation's own word list, so no segmentation happens here
+    """
+    translated_words: tuple[str, ...]
+    romanized_words: tuple[str, ...]
+
+
+def shape_segment_text(current_segment: TranslatedTranscriptSegmentWithMatchedWords,
+                       language_name: LanguageNameString,
+                       right_to_left: bool) -> ShapedSegmentText:
+    translated_words_list, romanized_words_list = current_segment.get_word_list_by_language(language_name)
+    if right_to_left:
+        translated_words_list = [get_display(arabic_reshaper.reshape(word)) for word in translated_words_list]
+    return ShapedSegmentText(translated_words=tuple(translated_words_list),
+                             romanized_words=tuple(romanized_words_list or ()))
+
+
+class ShapedTextCache:
+    """
+    Shapes each (segment, language) once, when the segment first becomes active, and re-uses the result for every
+    frame/highlight state in that segment - so bidi reshaping scales with word count, not frame count.
+    (Line breaking is cached separately, per segment, in `SubtitleOverlayCompositor.get_segment_layouts`)
+    """
+
+    def __init__(self, max_cached_segments: int = DEFAULT_MAX_CACHED_SHAPED_SEGMENTS):
+        self.max_cached_segments = max_cached_segments
+        self._shaped_text: OrderedDict[tuple[Hashable, LanguageNameString], ShapedSegmentText] = OrderedDict()
+
+    def get_shaped_text(self,
+                        segment_key: Hashable,
+                        current_segment: TranslatedTranscriptSegmentWithMatchedWords,
+                        language_name: LanguageNameString,
+                        right_to_left: bool) -> ShapedSegmentText:
+        cache_key = (segment_key, language_name)
+        if cache_key in self._shaped_text:
+            self._shaped_text.move_to_end(cache_key)
+            return self._shaped_text[cache_key]
+
+        shaped_text = shape_segment_text(current_segment=current_segment,
+                                         language_name=language_name,
+                                         right_to_left=right_to_left)
+        self._shaped_text[cache_key] = shaped_text
+        if len(self._shaped_text) > self.max_cached_segments:
+            self._shaped_text.popitem(last=False)
+        return shaped_text
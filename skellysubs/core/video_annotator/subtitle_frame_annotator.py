@@ -0,0 +1,55 @@
+from typing import Mapping
+
+import numpy as np
+
+from skellysubs.core.translation.language_configs.annotation_configs import get_annotation_configs, \
+    LanguageAnnotationConfig
+from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.video_annotator.subtitle_overlay_compositor import SubtitleOverlayCompositor
+from skellysubs.core.video_annotator.transcript_timeline_index import TranscriptTimelineIndex
+
+
+class SubtitleFrameAnnotator:
+    """
+    Annotates individual BGR frames with the subtitles that are active at the frame's timestamp.
+
+    Holds everything that should be built once per video (timeline index, overlay cache) so that the serial,
+    pipelined, and multi-process annotation loops all share the same per-frame logic.
+    """
+
+    def __init__(self,
+                 segments: list[TranslatedTranscriptSegmentWithMatchedWords],
+                 video_width: int,
+                 video_height: int,
+                 use_sprite_atlas: bool = False,
+                 annotation_configs: Mapping[LanguageNameString, LanguageAnnotationConfig] | None = None):
+        """
+        `annotation_configs` picks the languages (and their fonts/colors) to draw - defaults to the language configs yaml
+        """
+        self.segments = segments
+        if annotation_configs is None:
+            annotation_configs = get_annotation_configs()
+        self.compositor = SubtitleOverlayCompositor(annotation_configs=annotation_configs,
+                                                    video_width=video_width,
+                                                    video_height=video_height,
+                                                    use_sprite_atlas=use_sprite_atlas)
+        self.timeline_index = TranscriptTimelineIndex.from_segments(segments=segments,
+                                                                    language_names=self.compositor.language_names)
+
+    def annotate_frame(self, image: np.ndarray, frame_timestamp: float) -> np.ndarray:
+        timeline_lookup = self.timeline_index.lookup_sequential(frame_timestamp)
+        current_segment = self.segments[timeline_lookup.segment_index]
+        highlighted_word_index_by_language = {}
+        for language_name in self.compositor.language_names:
+            if "english" in language_name.lower():
+                highlighted_word_index_by_language[language_name] = timeline_lookup.word_index
+            else:
+                highlighted_word_index_by_language[language_name] = \
+                    timeline_lookup.matched_word_index_by_language[language_name]
+
+        # Only re-renders the subtitle text when the highlighted words change, otherwise just blends the cached overlay
+        return self.compositor.composite(image=image,
+                                         segment_key=timeline_lookup.segment_index,
+                                         current_segment=current_segment,
+                                         highlighted_word_index_by_language=highlighted_word_index_by_language)
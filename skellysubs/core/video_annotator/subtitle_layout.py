@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import Literal, Sequence
+
+import numpy as np
+from PIL import ImageFont
+
+from skellysubs.core.translation.language_configs.annotation_configs import get_text_bbox, LanguageRenderSettings
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.video_annotator.shaped_text_cache import ShapedSegmentText
+
+SUBTITLES_TOP_BUFFER_RATIO = 0.4
+SUBTITLES_BOTTOM_BUFFER_RATIO = 0.2
+SUBTITLES_SIDE_BUFFER_RATIO = 0.05
+NEWLINE_RATIO = 1.25
+
+WordType = Literal['translated', 'romanized']
+
+
+@dataclass(frozen=True)
+class PositionedWord:
+    """
+    A single word run with its final top-left draw position
+    """
+    text: str
+    x: int
+    y: int
+    word_index: int
+    word_type: WordType
+    font: ImageFont.FreeTypeFont
+
+
+@dataclass(frozen=True)
+class SubtitleLayout:
+    """
+    The positioned words of one language of one segment, plus the y position the next language should start at
+    """
+    language_name: LanguageNameString
+    words: tuple[PositionedWord, ...]
+    next_multiline_y_start: float
+
+
+def break_words_into_lines(words: Sequence[str],
+                           word_widths: Sequence[float],
+                           separator_width: float,
+                           max_line_width: float) -> list[list[str]]:
+    """
+    Greedy line breaking in linear time - each word is measured once and the line width is tracked as a running
+    sum, instead of re-measuring the whole (growing) line for every word
+    """
+    lines: list[list[str]] = []
+    current_line: list[str] = []
+    current_width = 0.0
+    for word, word_width in zip(words, word_widths):
+        candidate_width = current_width + (separator_width if current_line else 0) + word_width
+        if current_line and candidate_width >= max_line_width:
+            lines.append(current_line)
+            current_line = [word]
+            current_width = word_width
+        else:
+            current_line.append(word)
+            current_width = candidate_width
+    lines.append(current_line)
+    return lines
+
+
+def layout_subtitle_text(render_settings: LanguageRenderSettings,
+                         shaped_text: ShapedSegmentText,
+                         multiline_y_start: float,
+                         video_width: int) -> SubtitleLayout:
+    """
+    Compute where every translated/romanized word of a segment goes on a `video_width` wide frame (the frame height
+    is already baked into `render_settings`).
+
+    Word widths are measured once each (through the cached text metrics) and the x cursor of each line is
+    the cumulative sum of those widths, so layout is linear in the number of words. The result does not depend
+    on which word is highlighted, so it only needs to be computed once per segment.
+    """
+    horizontal_buffer = int(video_width * SUBTITLES_SIDE_BUFFER_RATIO)
+    right_edge = video_width - horizontal_buffer * 4
+    current_y = multiline_y_start
+    text_height = render_settings.text_height
+
+    positioned_words: list[PositionedWord] = []
+    for word_type, words_list in zip(('translated', 'romanized'),
+                                     (shaped_text.translated_words, shaped_text.romanized_words)):
+        if not words_list:
+            continue
+        if word_type == 'romanized':
+            font = render_settings.romanization_font
+            right_to_left = False
+        else:
+            font = render_settings.font
+            right_to_left = render_settings.right_to_left
+
+        # the first romanized word is measured with the translated-text font (it sets the gap below the translation)
+        first_word_bbox = get_text_bbox(render_settings.font if word_type == 'romanized' else font,
+                                        words_list[0] + " ")
+        word_bboxes = [first_word_bbox] + [get_text_bbox(font, word + " ") for word in words_list[1:]]
+        word_widths = np.array([bbox[2] for bbox in word_bboxes])
+
+        if word_type == 'romanized':
+            current_y += int(first_word_bbox[3] * NEWLINE_RATIO)
+
+        line_start_index = 0
+        line_offsets = np.concatenate(([0], np.cumsum(word_widths)))
+        for word_index, word in enumerate(words_list):
+            text_width = int(word_widths[word_index])
+            text_height = word_bboxes[word_index][3]
+            offset = int(line_offsets[word_index] - line_offsets[line_start_index])
+            if right_to_left:
+                current_x = right_edge - offset
+                draw_x = current_x - text_width
+                next_x = current_x - text_width
+                wraps = next_x - text_width < horizontal_buffer
+            else:
+                current_x = horizontal_buffer + offset
+                draw_x = current_x
+                next_x = current_x + text_width
+                wraps = next_x + text_width > right_edge
+            positioned_words.append(PositionedWord(text=word,
+                                                   x=draw_x,
+                                                   y=int(current_y),
+                                                   word_index=word_index,
+                                                   word_type=word_type,
+                                                   font=font))
+            if wraps:
+                current_y += text_height
+                line_start_index = word_index + 1
+
+    return SubtitleLayout(language_name=render_settings.language_name,
+                          words=tuple(positioned_words),
+                          next_multiline_y_start=current_y + text_height * NEWLINE_RATIO * 1.5)
+
+
+def layout_segment_subtitles(shaped_text_by_language: dict[LanguageNameString, ShapedSegmentText],
+                             render_settings_by_language: dict[LanguageNameString, LanguageRenderSettings],
+                             video_width: int,
+                             video_height: int) -> tuple[SubtitleLayout, ...]:
+    """
+    Stack the layouts of every language of a segment, top to bottom, starting at the subtitles top buffer
+    """
+    layouts = []
+    multiline_y_start = int(video_height * SUBTITLES_TOP_BUFFER_RATIO)
+    for language_name, shaped_text in shaped_text_by_language.items():
+        layout = layout_subtitle_text(render_settings=render_settings_by_language[language_name],
+                                      shaped_text=shaped_text,
+                                      multiline_y_start=multiline_y_start,
+                                      video_width=video_width)
+        layouts.append(layout)
+        multiline_y_start = layout.next_multiline_y_start
+    return tuple(layouts)
+
@@ -0,0 +1,210 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Mapping
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from skellysubs.core.translation.language_configs.annotation_configs import LanguageAnnotationConfig, \
+    get_config_render_settings
+from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+from skellysubs.core.video_annotator.annotate_image_with_subtitles import draw_subtitle_layout
+from skellysubs.core.video_annotator.shaped_text_cache import ShapedTextCache
+from skellysubs.core.video_annotator.subtitle_layout import SubtitleLayout, layout_segment_subtitles
+from skellysubs.core.video_annotator.word_sprite_atlas import WordSpriteAtlas
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CACHED_OVERLAYS = 32
+DEFAULT_MAX_CACHED_LAYOUTS = 16
+
+
+@dataclass(frozen=True)
+class SubtitleOverlay:
+    """
+    A rendered subtitle state, cropped to the bounding box of the drawn text.
+
+    The colors are stored pre-multiplied by alpha (and already in BGR order) so that blending onto a raw cv2 frame
+    is a single vectorized multiply-add over the cropped region.
+    """
+    x: int
+    y: int
+    premultiplied_bgr: np.ndarray  # float32, shape (height, width, 3)
+    inverse_alpha: np.ndarray  # float32, shape (height, width, 1)
+
+    @classmethod
+    def from_rgba_image(cls, rgba_image: Image.Image) -> "SubtitleOverlay | None":
+        bounding_box = rgba_image.getbbox()
+        if bounding_box is None:
+            return None
+        left, top, _, _ = bounding_box
+        rgba = np.asarray(rgba_image.crop(bounding_box), dtype=np.float32)
+        alpha = rgba[:, :, 3:4] / 255.0
+        premultiplied_bgr = rgba[:, :, 2::-1] * alpha
+        return cls(x=left,
+                   y=top,
+                   premultiplied_bgr=np.ascontiguousarray(premultiplied_bgr),
+                   inverse_alpha=1.0 - alpha)
+
+    @classmethod
+    def from_premultiplied_canvas(cls,
+                                  premultiplied_bgr: np.ndarray,
+                                  inverse_alpha: np.ndarray) -> "SubtitleOverlay | None":
+        drawn_rows, drawn_columns = np.nonzero(inverse_alpha[:, :, 0] < 1.0)
+        if drawn_rows.size == 0:
+            return None
+        top, bottom = drawn_rows.min(), drawn_rows.max() + 1
+        left, right = drawn_columns.min(), drawn_columns.max() + 1
+        return cls(x=int(left),
+                   y=int(top),
+                   premultiplied_bgr=np.ascontiguousarray(premultiplied_bgr[top:bottom, left:right]),
+                   inverse_alpha=np.ascontiguousarray(inverse_alpha[top:bottom, left:right]))
+
+    def blend_onto(self, image: np.ndarray) -> np.ndarray:
+        """
+        Alpha-blend this overlay onto a BGR image (in place)
+        """
+        height, width = self.inverse_alpha.shape[:2]
+        region = image[self.y:self.y + height, self.x:self.x + width]
+        blended = region * self.inverse_alpha + self.premultiplied_bgr
+        np.copyto(region, blended, casting="unsafe")
+        return image
+
+
+class SubtitleOverlayCompositor:
+    """
+    Renders each subtitle state (segment + highlighted word per language) once into a cached overlay, and
+    alpha-blends that overlay onto raw BGR frames.
+
+    The subtitle state only changes a few times per second, so almost every frame is a cache hit and costs a single
+    blend instead of re-drawing every word of every language.
+
+    With `use_sprite_atlas`, cache misses are also cheap - overlays are assembled from pre-rasterized word sprites
+    (see `WordSpriteAtlas`) instead of drawing stroked text with PIL.
+    """
+
+    def __init__(self,
+                 annotation_configs: Mapping[LanguageNameString, LanguageAnnotationConfig],
+                 video_width: int,
+                 video_height: int,
+                 max_cached_overlays: int = DEFAULT_MAX_CACHED_OVERLAYS,
+                 use_sprite_atlas: bool = False):
+        self.annotation_configs = annotation_configs
+        self.video_width = video_width
+        self.video_height = video_height
+        self.render_settings_by_language = {
+            language_name: get_config_render_settings(language_name=language_name,
+                                                      config=config,
+                                                      image_height=video_height)
+            for language_name, config in annotation_configs.items()}
+        self.max_cached_overlays = max_cached_overlays
+        self._overlays: OrderedDict[Hashable, SubtitleOverlay | None] = OrderedDict()
+        self._shaped_text_cache = ShapedTextCache()
+        self._layouts: OrderedDict[Hashable, tuple[SubtitleLayout, ...]] = OrderedDict()
+        self.sprite_atlas = WordSpriteAtlas() if use_sprite_atlas else None
+        self.render_count = 0
+        self.composite_count = 0
+
+    @property
+    def language_names(self) -> list[LanguageNameString]:
+        return list(self.annotation_configs.keys())
+
+    def composite(self,
+                  image: np.ndarray,
+                  segment_key: Hashable,
+                  current_segment: TranslatedTranscriptSegmentWithMatchedWords,
+                  highlighted_word_index_by_language: dict[LanguageNameString, int]) -> np.ndarray:
+        """
+        Blend the subtitles for the given state onto a BGR image (in place), rendering the overlay only if this
+        state has not been seen recently
+        """
+        overlay = self.get_overlay(segment_key=segment_key,
+                                   current_segment=current_segment,
+                                   highlighted_word_index_by_language=highlighted_word_index_by_language)
+        self.composite_count += 1
+        if overlay is not None:
+            overlay.blend_onto(image)
+        return image
+
+    def get_overlay(self,
+                    segment_key: Hashable,
+                    current_segment: TranslatedTranscriptSegmentWithMatchedWords,
+                    highlighted_word_index_by_language: dict[LanguageNameString, int]) -> SubtitleOverlay | None:
+        state_key = (segment_key, tuple(highlighted_word_index_by_language.items()))
+        if state_key in self._overlays:
+            self._overlays.move_to_end(state_key)
+            return self._overlays[state_key]
+
+        overlay = self._render_overlay(segment_key=segment_key,
+                                       current_segment=current_segment,
+                                       highlighted_word_index_by_language=highlighted_word_index_by_language)
+        self._overlays[state_key] = overlay
+        if len(self._overlays) > self.max_cached_overlays:
+            self._overlays.popitem(last=False)
+        return overlay
+
+    def get_segment_layouts(self,
+                            segment_key: Hashable,
+                            current_segment: TranslatedTranscriptSegmentWithMatchedWords) -> tuple[SubtitleLayout, ...]:
+        """
+        The layout of every language of a segment - computed once per segment, shared by all its highlight states
+        """
+        if segment_key in self._layouts:
+            self._layouts.move_to_end(segment_key)
+            return self._layouts[segment_key]
+
+        shaped_text_by_language = {
+            language_name: self._shaped_text_cache.get_shaped_text(
+                segment_key=segment_key,
+                current_segment=current_segment,
+                language_name=language_name,
+                right_to_left=self.render_settings_by_language[language_name].right_to_left)
+            for language_name in self.annotation_configs.keys()}
+        layouts = layout_segment_subtitles(shaped_text_by_language=shaped_text_by_language,
+                                           render_settings_by_language=self.render_settings_by_language,
+                                           video_width=self.video_width,
+                                           video_height=self.video_height)
+        self._layouts[segment_key] = layouts
+        if len(self._layouts) > DEFAULT_MAX_CACHED_LAYOUTS:
+            self._layouts.popitem(last=False)
+        return layouts
+
+    def _render_overlay(self,
+                        segment_key: Hashable,
+                        current_segment: TranslatedTranscriptSegmentWithMatchedWords,
+                        highlighted_word_index_by_language: dict[LanguageNameString, int]) -> SubtitleOverlay | None:
+        self.render_count += 1
+        logger.trace(f"Rendering subtitle overlay #{self.render_count} "
+                     f"(segment start: {current_segment.start}, highlighted: {highlighted_word_index_by_language})")
+        layouts = self.get_segment_layouts(segment_key=segment_key, current_segment=current_segment)
+        if self.sprite_atlas is not None:
+            return self._composite_overlay_from_sprites(layouts=layouts,
+                                                        highlighted_word_index_by_language=
+                                                        highlighted_word_index_by_language)
+
+        canvas = Image.new("RGBA", (self.video_width, self.video_height), (0, 0, 0, 0))
+        image_annotator = ImageDraw.Draw(canvas)
+        for layout in layouts:
+            draw_subtitle_layout(image_annotator=image_annotator,
+                                 layout=layout,
+                                 config=self.annotation_configs[layout.language_name],
+                                 highlighted_word_index=highlighted_word_index_by_language[layout.language_name])
+        return SubtitleOverlay.from_rgba_image(canvas)
+
+    def _composite_overlay_from_sprites(self,
+                                        layouts: tuple[SubtitleLayout, ...],
+                                        highlighted_word_index_by_language: dict[LanguageNameString, int]
+                                        ) -> SubtitleOverlay | None:
+        premultiplied_bgr = np.zeros((self.video_height, self.video_width, 3), dtype=np.float32)
+        inverse_alpha = np.ones((self.video_height, self.video_width, 1), dtype=np.float32)
+        for layout in layouts:
+            self.sprite_atlas.composite_layout(premultiplied_bgr=premultiplied_bgr,
+                                               inverse_alpha=inverse_alpha,
+                                               layout=layout,
+                                               color=self.annotation_configs[layout.language_name].color,
+                                               highlighted_word_index=
+                                               highlighted_word_index_by_language[layout.language_name])
+        return SubtitleOverlay.from_premultiplied_canvas(premultiplied_bgr=premultiplied_bgr,
+                                                         inverse_alpha=inverse_alpha)
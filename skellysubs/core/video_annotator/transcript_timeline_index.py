@@ -0,0 +1,190 @@
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords
+from skellysubs.core.translation.models.translation_typehints import LanguageNameString
+
+logger = logging.getLogger(__name__)
+
+NO_WORD_INDEX = -1
+
+
+@dataclass(frozen=True)
+class TimelineLookup:
+    """
+    The active segment/word at a single timestamp
+    """
+    segment_index: int
+    word_index: int  # index of the spoken word within the segment, or NO_WORD_INDEX if the segment has no words
+    matched_word_index_by_language: dict[LanguageNameString, int]
+
+
+@dataclass(frozen=True)
+class TimelineLookupArrays:
+    """
+    The active segment/word for a batch of timestamps, one entry per timestamp
+    """
+    segment_indices: np.ndarray
+    word_indices: np.ndarray
+    matched_word_indices_by_language: dict[LanguageNameString, np.ndarray]
+
+
+class TranscriptTimelineIndex:
+    """
+    Array-backed index for finding the active segment and word (and the matched translated word in each language)
+    at a given timestamp.
+
+    A timestamp belongs to the last segment (and the last word within that segment) that started at or before it,
+    clamped to the first segment/word for timestamps before the first one starts.
+
+    Lookups are O(log n) via `np.searchsorted`. `lookup_sequential` keeps a cursor so that monotonically increasing
+    queries (i.e. one per video frame) are amortized O(1), and `lookup_many` resolves every frame timestamp at once.
+    """
+
+    def __init__(self,
+                 segment_starts: np.ndarray,
+                 segment_ends: np.ndarray,
+                 word_starts: np.ndarray,
+                 word_ends: np.ndarray,
+                 segment_word_offsets: np.ndarray,
+                 matched_word_indices_by_language: dict[LanguageNameString, np.ndarray]):
+        if len(segment_starts) == 0:
+            raise ValueError("Cannot build a timeline index without any segments")
+        self.segment_starts = segment_starts
+        self.segment_ends = segment_ends
+        self.word_starts = word_starts
+        self.word_ends = word_ends
+        self.segment_word_offsets = segment_word_offsets
+        self.matched_word_indices_by_language = matched_word_indices_by_language
+
+        # searchsorted needs sorted keys - a running max keeps "last thing that started before t" well-defined
+        # even if the transcript has slightly out-of-order timestamps
+        self._sorted_segment_starts = np.maximum.accumulate(segment_starts)
+        self._sorted_word_starts = np.maximum.accumulate(word_starts) if len(word_starts) else word_starts
+
+        self._cursor_segment_index = 0
+        self._cursor_word_index = NO_WORD_INDEX  # global (transcript-level) word index
+
+    @classmethod
+    def from_segments(cls,
+                      segments: list[TranslatedTranscriptSegmentWithMatchedWords],
+                      language_names: list[LanguageNameString]) -> "TranscriptTimelineIndex":
+        segment_starts = np.array([segment.start for segment in segments], dtype=np.float64)
+        segment_ends = np.array([segment.end for segment in segments], dtype=np.float64)
+        segment_word_offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+        segment_word_offsets[1:] = np.cumsum([len(segment.words) for segment in segments])
+
+        word_starts = np.array([word.start for segment in segments for word in segment.words], dtype=np.float64)
+        word_ends = np.array([word.end for segment in segments for word in segment.words], dtype=np.float64)
+
+        matched_word_indices_by_language = {}
+        for language_name in language_names:
+            matched_word_indices = np.full(len(word_starts), NO_WORD_INDEX, dtype=np.int64)
+            for segment_index, segment in enumerate(segments):
+                matched_segment = (segment.matched_translated_segment_by_language or {}).get(language_name)
+                if matched_segment is None:
+                    continue
+                offset = segment_word_offsets[segment_index]
+                for matched_word in matched_segment.matched_translated_words:
+                    if 0 <= matched_word.original_word_index < len(segment.words):
+                        matched_word_indices[offset + matched_word.original_word_index] = \
+                            matched_word.translated_word_index
+            matched_word_indices_by_language[language_name] = matched_word_indices
+
+        logger.debug(f"Built transcript timeline index with {len(segments)} segments, {len(word_starts)} words, "
+                     f"and {len(language_names)} languages")
+        return cls(segment_starts=segment_starts,
+                   segment_ends=segment_ends,
+                   word_starts=word_starts,
+                   word_ends=word_ends,
+                   segment_word_offsets=segment_word_offsets,
+                   matched_word_indices_by_language=matched_word_indices_by_language)
+
+    @property
+    def number_of_segments(self) -> int:
+        return len(self.segment_starts)
+
+    def lookup(self, timestamp: float) -> TimelineLookup:
+        segment_index = self._find_segment_index(timestamp)
+        return self._build_lookup(segment_index=segment_index,
+                                  global_word_index=self._find_word_index(timestamp, segment_index))
+
+    def lookup_sequential(self, timestamp: float) -> TimelineLookup:
+        """
+        Same result as `lookup`, but walks forward from the previous query - use this when querying one frame at a
+        time. Falls back to a binary search if the timestamp jumps backwards.
+        """
+        segment_index = self._cursor_segment_index
+        if timestamp < self._sorted_segment_starts[segment_index] and segment_index > 0:
+            segment_index = self._find_segment_index(timestamp)
+        else:
+            while (segment_index + 1 < self.number_of_segments
+                   and self._sorted_segment_starts[segment_index + 1] <= timestamp):
+                segment_index += 1
+
+        first_word, end_word = self.segment_word_offsets[segment_index], self.segment_word_offsets[segment_index + 1]
+        if first_word == end_word:
+            global_word_index = NO_WORD_INDEX
+        elif (segment_index != self._cursor_segment_index
+              or self._cursor_word_index == NO_WORD_INDEX
+              or timestamp < self._sorted_word_starts[self._cursor_word_index]):
+            global_word_index = self._find_word_index(timestamp, segment_index)
+        else:
+            global_word_index = self._cursor_word_index
+            while global_word_index + 1 < end_word and self._sorted_word_starts[global_word_index + 1] <= timestamp:
+                global_word_index += 1
+
+        self._cursor_segment_index = segment_index
+        self._cursor_word_index = global_word_index
+        return self._build_lookup(segment_index=segment_index, global_word_index=global_word_index)
+
+    def lookup_many(self, timestamps: np.ndarray) -> TimelineLookupArrays:
+        """
+        Vectorized lookup for a whole array of timestamps (e.g. every frame of a video)
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        segment_indices = np.clip(np.searchsorted(self._sorted_segment_starts, timestamps, side="right") - 1,
+                                  0, self.number_of_segments - 1)
+        first_words = self.segment_word_offsets[segment_indices]
+        end_words = self.segment_word_offsets[segment_indices + 1]
+        has_words = end_words > first_words
+
+        global_word_indices = np.searchsorted(self._sorted_word_starts, timestamps, side="right") - 1
+        global_word_indices = np.clip(global_word_indices, first_words, np.maximum(end_words - 1, first_words))
+        global_word_indices = np.where(has_words, global_word_indices, NO_WORD_INDEX)
+
+        word_indices = np.where(has_words, global_word_indices - first_words, NO_WORD_INDEX)
+        matched_word_indices_by_language = {
+            language_name: np.where(has_words, matched_indices[np.maximum(global_word_indices, 0)], NO_WORD_INDEX)
+            if len(matched_indices) else np.full(len(timestamps), NO_WORD_INDEX, dtype=np.int64)
+            for language_name, matched_indices in self.matched_word_indices_by_language.items()}
+        return TimelineLookupArrays(segment_indices=segment_indices,
+                                    word_indices=word_indices,
+                                    matched_word_indices_by_language=matched_word_indices_by_language)
+
+    def _find_segment_index(self, timestamp: float) -> int:
+        segment_index = int(np.searchsorted(self._sorted_segment_starts, timestamp, side="right")) - 1
+        return min(max(segment_index, 0), self.number_of_segments - 1)
+
+    def _find_word_index(self, timestamp: float, segment_index: int) -> int:
+        first_word, end_word = self.segment_word_offsets[segment_index], self.segment_word_offsets[segment_index + 1]
+        if first_word == end_word:
+            return NO_WORD_INDEX
+        word_index = int(np.searchsorted(self._sorted_word_starts[first_word:end_word], timestamp, side="right")) - 1
+        return int(first_word) + max(word_index, 0)
+
+    def _build_lookup(self, segment_index: int, global_word_index: int) -> TimelineLookup:
+        if global_word_index == NO_WORD_INDEX:
+            return TimelineLookup(segment_index=segment_index,
+                                  word_index=NO_WORD_INDEX,
+                                  matched_word_index_by_language={language_name: NO_WORD_INDEX
+                                                                  for language_name in
+                                                                  self.matched_word_indices_by_language})
+        return TimelineLookup(segment_index=segment_index,
+                              word_index=global_word_index - int(self.segment_word_offsets[segment_index]),
+                              matched_word_index_by_language={
+                                  language_name: int(matched_indices[global_word_index])
+                                  for language_name, matched_indices in
+                                  self.matched_word_indices_by_language.items()})
@@ -1,12 +1,81 @@
+import logging
 import os
+import subprocess
+import tempfile
 from pathlib import Path
 
 import cv2
 import ffmpeg
 import numpy as np
-from PIL.Image import Image
 
-from skellysubs.core.transcription.get_or_compute_video_transcription import scrape_and_save_audio_from_video
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_PIPE_VIDEO_CODEC = "libx264"
+FFMPEG_PIPE_CRF = 23
+FFMPEG_PIPE_PRESET = "fast"
+
+
+class FfmpegPipeVideoWriter:
+    """
+    Stand-in for `cv2.VideoWriter` that pipes raw BGR frames straight into a single ffmpeg process.
+
+    ffmpeg encodes the video once and muxes in the audio stream of `audio_source_path` with `-c:a copy`, so there is
+    no intermediate `_no_audio.mp4`, no second re-encode pass, and no audio extraction step.
+    """
+
+    def __init__(self,
+                 output_path: str,
+                 frame_width: int,
+                 frame_height: int,
+                 framerate: float,
+                 audio_source_path: str | None = None):
+        self.output_path = output_path
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+
+        video_input = ffmpeg.input("pipe:",
+                                   format="rawvideo",
+                                   pix_fmt="bgr24",
+                                   s=f"{frame_width}x{frame_height}",
+                                   framerate=framerate)
+        streams = [video_input.video]
+        output_kwargs = dict(vcodec=FFMPEG_PIPE_VIDEO_CODEC,
+                             crf=FFMPEG_PIPE_CRF,
+                             preset=FFMPEG_PIPE_PRESET,
+                             pix_fmt="yuv420p")
+        if audio_source_path is not None:
+            # `a?` - don't fail if the original video has no audio track
+            streams.append(ffmpeg.input(audio_source_path)["a?"])
+            output_kwargs.update(acodec="copy", shortest=None)
+
+        ffmpeg_output = (ffmpeg.output(*streams, output_path, **output_kwargs)
+                         .overwrite_output()
+                         .global_args("-loglevel", "error"))
+        logger.info(f"Starting ffmpeg pipe writer - {' '.join(ffmpeg_output.compile())}")
+        # stderr goes to a file rather than a pipe, so a chatty ffmpeg can't fill the pipe and stall the writer
+        self._stderr_file = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(ffmpeg_output.compile(), stdin=subprocess.PIPE, stderr=self._stderr_file)
+
+    def isOpened(self) -> bool:
+        return self._process.poll() is None and not self._process.stdin.closed
+
+    def write(self, image: np.ndarray) -> None:
+        if image.shape[:2] != (self.frame_height, self.frame_width):
+            raise ValueError(f"Frame shape {image.shape[:2]} does not match writer resolution "
+                             f"{(self.frame_height, self.frame_width)}")
+        self._process.stdin.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+
+    def release(self) -> None:
+        if not self._process.stdin.closed:
+            self._process.stdin.close()
+        return_code = self._process.wait()
+        self._stderr_file.seek(0)
+        stderr = self._stderr_file.read().decode(errors="replace")
+        self._stderr_file.close()
+        if return_code != 0:
+            raise RuntimeError(f"ffmpeg pipe writer exited with code {return_code} while writing "
+                               f"{self.output_path}: {stderr[-500:]}")
 
 
 def get_video_properties(video_path):
@@ -24,26 +93,94 @@ def get_video_properties(video_path):
         raise RuntimeError(f"Failed to get video properties: {e}")
 
 
+def get_output_video_resolution_and_framerate(og_video_path: str,
+                                              transpose_for_vertical_video: bool = False) -> tuple[int, int, float]:
+    """
+    Returns the (width, height, framerate) that the annotated output video should be written with.
+
+    `transpose_for_vertical_video` swaps width and height - only use it if the frames are rotated by 90 degrees
+    before being written, otherwise the writer will reject them
+    """
+    video_width, video_height, video_framerate = get_video_properties(og_video_path)
+
+    if transpose_for_vertical_video:
+        video_width, video_height = video_height, video_width
+    return video_width, video_height, video_framerate
+
+
+def get_keyframe_timestamps(video_path: str) -> list[float]:
+    """
+    Timestamps (in seconds) of the keyframes in the first video stream - only keyframes are decoded, so this is fast
+    """
+    try:
+        probe = ffmpeg.probe(video_path,
+                             select_streams="v:0",
+                             skip_frame="nokey",
+                             show_entries="frame=best_effort_timestamp_time")
+    except ffmpeg.Error as e:
+        logger.error(f"ffprobe error output: {e.stderr.decode('utf8')}")
+        raise RuntimeError(f"Failed to get keyframe timestamps: {e}")
+    return sorted(float(frame["best_effort_timestamp_time"]) for frame in probe.get("frames", [])
+                  if "best_effort_timestamp_time" in frame)
+
+
+def concatenate_video_chunks_and_attach_audio(chunk_video_paths: list[str],
+                                              original_video_path: str,
+                                              subtitled_video_path: str) -> None:
+    """
+    Losslessly join encoded chunks with ffmpeg's concat demuxer, muxing in the original audio stream at the same time
+    """
+    concat_list_path = Path(subtitled_video_path).with_suffix(".concat.txt")
+    concat_list_path.write_text("\n".join(f"file '{Path(chunk_path).resolve().as_posix()}'"
+                                          for chunk_path in chunk_video_paths),
+                                encoding="utf-8")
+    try:
+        ffmpeg_output = (ffmpeg.output(ffmpeg.input(str(concat_list_path), format="concat", safe=0).video,
+                                       ffmpeg.input(original_video_path)["a?"],
+                                       subtitled_video_path,
+                                       vcodec="copy",
+                                       acodec="copy",
+                                       shortest=None)
+                         .overwrite_output()
+                         .global_args("-loglevel", "error"))
+        logger.info(f"Concatenating {len(chunk_video_paths)} video chunks - {' '.join(ffmpeg_output.compile())}")
+        ffmpeg_output.run()
+    finally:
+        concat_list_path.unlink(missing_ok=True)
+
+
 def create_video_reader_and_writer(og_video_path: str,
                                    subtitled_video_output_path: str,
                                    transpose_for_vertical_video: bool = False,
-                                   ) -> tuple[str, int, cv2.VideoCapture, int, cv2.VideoWriter]:
+                                   stream_to_ffmpeg: bool = False,
+                                   ) -> tuple[str | None, int, cv2.VideoCapture, int,
+                                              cv2.VideoWriter | FfmpegPipeVideoWriter]:
+    """
+    If `stream_to_ffmpeg` is True, frames are piped directly into ffmpeg (which also copies over the original audio),
+    and the returned `no_audio_video_path` is None because there is no intermediate file to finish.
+    """
     # Load the video
     if not Path(og_video_path).exists() or not Path(og_video_path).is_file():
         raise FileNotFoundError(f"File not found: {og_video_path}")
     video_reader = cv2.VideoCapture(og_video_path)
 
-    video_height, video_width, video_framerate = get_video_properties(
-        og_video_path)
-
-    if transpose_for_vertical_video:
-        video_height, video_width = video_width, video_height
+    video_width, video_height, video_framerate = get_output_video_resolution_and_framerate(
+        og_video_path=og_video_path,
+        transpose_for_vertical_video=transpose_for_vertical_video)
 
     video_resolution = (video_width, video_height)
 
     Path(subtitled_video_output_path).parent.mkdir(parents=True, exist_ok=True)
     if not subtitled_video_output_path.endswith('.mp4'):
         raise ValueError(f"Output path must end with .mp4: {subtitled_video_output_path}")
+    if stream_to_ffmpeg:
+        video_writer = FfmpegPipeVideoWriter(output_path=subtitled_video_output_path,
+                                             frame_width=video_width,
+                                             frame_height=video_height,
+                                             framerate=video_framerate,
+                                             audio_source_path=og_video_path)
+        return None, video_height, video_reader, video_width, video_writer
+
     no_audio_video_path = subtitled_video_output_path.replace('.mp4', '_no_audio.mp4')
     video_writer = cv2.VideoWriter(no_audio_video_path, cv2.VideoWriter_fourcc(*'x264'), video_framerate,
                                    video_resolution)
@@ -52,10 +189,9 @@ def create_video_reader_and_writer(og_video_path: str,
     return no_audio_video_path, video_height, video_reader, video_width, video_writer
 
 
-def write_frame_to_video_file(pil_image: Image,
-                              video_writer: cv2.VideoWriter) -> np.ndarray:
-    # Convert the annotated image back to a cv2 image and write it to the video
-    image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+def write_frame_to_video_file(image: np.ndarray,
+                              video_writer: cv2.VideoWriter | FfmpegPipeVideoWriter) -> np.ndarray:
+    # `image` is expected to be a BGR cv2 image, i.e. the frame as read from the video reader
     if not video_writer.isOpened():
         raise ValueError(f"Video writer is not open before writing frame!")
     video_writer.write(image)
@@ -64,27 +200,29 @@ def write_frame_to_video_file(pil_image: Image,
     return image
 
 
-import logging
-
-logger = logging.getLogger(__name__)
-
-
 def finish_video_and_attach_audio_from_original(original_video_path: str,
                                                 no_audio_video_path: str,
                                                 subtitled_video_path: str) -> None:
-    # Save the audio from the original video to a wav file (if it doesn't already exist)
-    original_audio_path = original_video_path.replace('.mp4', '.mp3')
-    if not Path(original_audio_path).exists():
-        scrape_and_save_audio_from_video(original_video_path, original_audio_path)
-
-    # Compress and combine the audio from the original video with the annotated video
-    command = (
-        f"ffmpeg -y -i {no_audio_video_path} -i {original_audio_path} "
-        f"-c:v libx264 -crf 23 -preset fast -c:a aac -strict experimental "
-        f"{subtitled_video_path}"
-    )
-    logger.info(f"Combining and compressing video and audio with ffmpeg command - {command}")
-    os.system(command)
+    # Compress the annotated video and mux in the audio track straight from the original video (no separate
+    # audio extraction step)
+    logger.info(f"Combining and compressing {no_audio_video_path} with the audio from {original_video_path}...")
+    try:
+        (
+            ffmpeg
+            .output(ffmpeg.input(no_audio_video_path).video,
+                    ffmpeg.input(original_video_path)["a?"],
+                    subtitled_video_path,
+                    vcodec=FFMPEG_PIPE_VIDEO_CODEC,
+                    crf=FFMPEG_PIPE_CRF,
+                    preset=FFMPEG_PIPE_PRESET,
+                    acodec="aac",
+                    shortest=None)
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        logger.error(f"ffmpeg failed to combine video and audio: {e.stderr.decode(errors='replace')[-500:]}")
+        raise
 
     # Delete the no-audio temporary video file
     try:
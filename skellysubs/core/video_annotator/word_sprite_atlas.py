@@ -0,0 +1,139 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from skellysubs.core.video_annotator.subtitle_layout import SubtitleLayout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CACHED_SPRITES = 4096
+
+HIGHLIGHT_STROKES: tuple[tuple[int, tuple[int, int, int]], ...] = ((14, (0, 255, 0)), (10, (0, 0, 255)))
+OUTLINE_STROKE: tuple[int, tuple[int, int, int]] = (6, (11, 11, 11))
+FILL_STROKE_WIDTH = 1
+MAX_STROKE_WIDTH = max(stroke_width for stroke_width, _ in HIGHLIGHT_STROKES)
+
+
+@dataclass(frozen=True)
+class WordSprite:
+    """
+    One pre-rasterized, stroked word, stored pre-multiplied by alpha in BGR order.
+
+    `offset_x`/`offset_y` are relative to the word's draw position (strokes extend up and to the left of it).
+    """
+    offset_x: int
+    offset_y: int
+    premultiplied_bgr: np.ndarray  # float32, shape (height, width, 3)
+    inverse_alpha: np.ndarray  # float32, shape (height, width, 1)
+
+
+def rasterize_word_sprite(text: str,
+                          font: ImageFont.FreeTypeFont,
+                          color: tuple[int, int, int],
+                          highlighted: bool) -> WordSprite | None:
+    """
+    Draw a word with the same stroke passes as `draw_subtitle_layout` onto a small transparent canvas
+    """
+    padding = MAX_STROKE_WIDTH
+    left, top, right, bottom = font.getbbox(text)
+    canvas = Image.new("RGBA", (right - min(left, 0) + 2 * padding, bottom - min(top, 0) + 2 * padding), (0, 0, 0, 0))
+    origin = (padding - min(left, 0), padding - min(top, 0))
+    image_annotator = ImageDraw.Draw(canvas)
+    strokes = list(HIGHLIGHT_STROKES) if highlighted else []
+    strokes += [OUTLINE_STROKE, (FILL_STROKE_WIDTH, color)]
+    for stroke_width, stroke_fill in strokes:
+        image_annotator.text(origin,
+                             text=text,
+                             fill=color,
+                             font=font,
+                             stroke_width=stroke_width,
+                             stroke_fill=stroke_fill,
+                             align="left")
+
+    bounding_box = canvas.getbbox()
+    if bounding_box is None:
+        return None
+    rgba = np.asarray(canvas.crop(bounding_box), dtype=np.float32)
+    alpha = rgba[:, :, 3:4] / 255.0
+    return WordSprite(offset_x=bounding_box[0] - origin[0],
+                      offset_y=bounding_box[1] - origin[1],
+                      premultiplied_bgr=np.ascontiguousarray(rgba[:, :, 2::-1] * alpha),
+                      inverse_alpha=1.0 - alpha)
+
+
+class WordSpriteAtlas:
+    """
+    LRU atlas of rasterized word sprites, keyed by (word, font, color, highlighted).
+
+    Stroked text is the most expensive thing PIL draws, and transcripts re-use the same vocabulary heavily, so each
+    unique word state is only rasterized once and afterwards composited with NumPy slicing.
+    """
+
+    def __init__(self, max_cached_sprites: int = DEFAULT_MAX_CACHED_SPRITES):
+        self.max_cached_sprites = max_cached_sprites
+        self._sprites: OrderedDict[tuple, WordSprite | None] = OrderedDict()
+        self.rasterize_count = 0
+
+    def get_sprite(self,
+                   text: str,
+                   font: ImageFont.FreeTypeFont,
+                   color: tuple[int, int, int],
+                   highlighted: bool) -> WordSprite | None:
+        sprite_key = (text, font, tuple(color), highlighted)
+        if sprite_key in self._sprites:
+            self._sprites.move_to_end(sprite_key)
+            return self._sprites[sprite_key]
+
+        self.rasterize_count += 1
+        sprite = rasterize_word_sprite(text=text, font=font, color=color, highlighted=highlighted)
+        self._sprites[sprite_key] = sprite
+        if len(self._sprites) > self.max_cached_sprites:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def composite_layout(self,
+                         premultiplied_bgr: np.ndarray,
+                         inverse_alpha: np.ndarray,
+                         layout: SubtitleLayout,
+                         color: tuple[int, int, int],
+                         highlighted_word_index: int) -> None:
+        """
+        Composite every word of `layout` (in place, "over" operator in pre-multiplied space) onto a canvas
+        """
+        for word in layout.words:
+            sprite = self.get_sprite(text=word.text,
+                                     font=word.font,
+                                     color=color,
+                                     highlighted=word.word_index == highlighted_word_index)
+            if sprite is not None:
+                blit_sprite(premultiplied_bgr=premultiplied_bgr,
+                            inverse_alpha=inverse_alpha,
+                            sprite=sprite,
+                            x=word.x + sprite.offset_x,
+                            y=word.y + sprite.offset_y)
+
+
+def blit_sprite(premultiplied_bgr: np.ndarray,
+                inverse_alpha: np.ndarray,
+                sprite: WordSprite,
+                x: int,
+                y: int) -> None:
+    """
+    Composite a sprite over a pre-multiplied canvas at (x, y), clipped to the canvas bounds
+    """
+    canvas_height, canvas_width = inverse_alpha.shape[:2]
+    sprite_height, sprite_width = sprite.inverse_alpha.shape[:2]
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + sprite_width, canvas_width), min(y + sprite_height, canvas_height)
+    if left >= right or top >= bottom:
+        return
+    sprite_region = (slice(top - y, bottom - y), slice(left - x, right - x))
+    sprite_inverse_alpha = sprite.inverse_alpha[sprite_region]
+    canvas_bgr = premultiplied_bgr[top:bottom, left:right]
+    canvas_inverse_alpha = inverse_alpha[top:bottom, left:right]
+    canvas_bgr *= sprite_inverse_alpha
+    canvas_bgr += sprite.premultiplied_bgr[sprite_region]
+    canvas_inverse_alpha *= sprite_inverse_alpha
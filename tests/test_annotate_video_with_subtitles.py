@@ -0,0 +1,114 @@
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from skellysubs.core.translation.language_configs.annotation_configs import LanguageAnnotationConfig
+from skellysubs.core.translation.models.old_transcript_models import TranslatedTranscriptSegmentWithMatchedWords, \
+    TranslatedWhisperWordTimestamp
+from skellysubs.core.translation.models.translated_text_models import TranslatedText, TranslationsCollection
+from skellysubs.core.video_annotator.annotate_video_with_subtitles import annotate_video_with_subtitles
+
+VIDEO_WIDTH = 320
+VIDEO_HEIGHT = 240
+VIDEO_FRAMERATE = 10
+VIDEO_SECONDS = 2
+BACKGROUND_COLOR = 40
+
+ANNOTATION_CONFIGS = {
+    "english": LanguageAnnotationConfig(font_file="ARIAL.TTF", font_size_ratio=3, buffer_size=10,
+                                        color=(255, 255, 255)),
+    "spanish": LanguageAnnotationConfig(font_file="ARIAL.TTF", font_size_ratio=3, buffer_size=10,
+                                        color=(0, 255, 255)),
+}
+
+
+def make_segment(start: float, end: float, english: str, spanish: str) -> TranslatedTranscriptSegmentWithMatchedWords:
+    words = english.split()
+    word_duration = (end - start) / len(words)
+    return TranslatedTranscriptSegmentWithMatchedWords(
+        original_segment_text=english,
+        original_language="english",
+        translations=TranslationsCollection(translations={
+            "english": TranslatedText(translated_text=english, translated_language_name="english",
+                                      romanization_method="none", romanized_text=""),
+            "spanish": TranslatedText(translated_text=spanish, translated_language_name="spanish",
+                                      romanization_method="none", romanized_text=""),
+        }),
+        start=start,
+        end=end,
+        words=[TranslatedWhisperWordTimestamp(start=start + index * word_duration,
+                                              end=start + (index + 1) * word_duration,
+                                              original_word=word,
+                                              matched_words={})
+               for index, word in enumerate(words)])
+
+
+@pytest.fixture
+def blank_video_path(tmp_path: Path) -> str:
+    video_path = str(tmp_path / "blank.mp4")
+    video_writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), VIDEO_FRAMERATE,
+                                   (VIDEO_WIDTH, VIDEO_HEIGHT))
+    for _ in range(VIDEO_FRAMERATE * VIDEO_SECONDS):
+        video_writer.write(np.full((VIDEO_HEIGHT, VIDEO_WIDTH, 3), BACKGROUND_COLOR, dtype=np.uint8))
+    video_writer.release()
+    return video_path
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs the ffmpeg executable")
+@pytest.mark.parametrize("pipelined", [False, True])
+@pytest.mark.parametrize("use_sprite_atlas", [False, True])
+def test_annotate_video_with_subtitles_draws_every_frame(blank_video_path: str,
+                                                         tmp_path: Path,
+                                                         pipelined: bool,
+                                                         use_sprite_atlas: bool):
+    segments = [make_segment(start=0.0, end=1.0, english="hello there", spanish="hola"),
+                make_segment(start=1.0, end=2.0, english="good bye", spanish="adios amigo")]
+    subtitled_video_path = str(tmp_path / "subtitled.mp4")
+
+    annotate_video_with_subtitles(video_path=blank_video_path,
+                                  segments=segments,
+                                  subtitled_video_path=subtitled_video_path,
+                                  show_while_annotating=False,
+                                  stream_to_ffmpeg=True,
+                                  pipelined=pipelined,
+                                  use_sprite_atlas=use_sprite_atlas,
+                                  annotation_configs=ANNOTATION_CONFIGS)
+
+    video_reader = cv2.VideoCapture(subtitled_video_path)
+    frames = []
+    while True:
+        read_success, image = video_reader.read()
+        if not read_success:
+            break
+        frames.append(image)
+    video_reader.release()
+
+    assert len(frames) == VIDEO_FRAMERATE * VIDEO_SECONDS
+    for image in frames:
+        assert image.shape == (VIDEO_HEIGHT, VIDEO_WIDTH, 3)
+        # the subtitles are the only thing on the frame that isn't the flat background
+        assert np.abs(image.astype(np.int16) - BACKGROUND_COLOR).max() > 100
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs the ffmpeg executable")
+def test_annotate_video_with_subtitles_in_parallel_mode(blank_video_path: str, tmp_path: Path):
+    segments = [make_segment(start=0.0, end=2.0, english="hello there", spanish="hola")]
+    subtitled_video_path = str(tmp_path / "subtitled_parallel.mp4")
+
+    annotate_video_with_subtitles(video_path=blank_video_path,
+                                  segments=segments,
+                                  subtitled_video_path=subtitled_video_path,
+                                  show_while_annotating=False,
+                                  annotation_configs=ANNOTATION_CONFIGS,
+                                  parallel=True,
+                                  number_of_workers=2)
+
+    video_reader = cv2.VideoCapture(subtitled_video_path)
+    assert int(video_reader.get(cv2.CAP_PROP_FRAME_COUNT)) == VIDEO_FRAMERATE * VIDEO_SECONDS
+    read_success, image = video_reader.read()
+    video_reader.release()
+    assert read_success
+    assert np.abs(image.astype(np.int16) - BACKGROUND_COLOR).max() > 100